@@ -0,0 +1,169 @@
+"""
+BATCH — Pipeline MDSE sobre muchas especificaciones en paralelo
+================================================================
+
+  specs/**/*.req  ──►  ProcessPool  ──►  salida_batch/<spec>/
+                        (N workers)          ├── pim.api
+                                             ├── psm_fastapi.api
+                                             ├── schemas.py
+                                             ├── main.py
+                                             └── carga.py
+
+Cada archivo .req se procesa con pipeline.run() en un proceso del pool,
+con su propio directorio de salida. Un error en una especificación se
+registra en el informe y no detiene al resto.
+
+Uso:
+    python batch.py specs/                     # todos los .req (recursivo)
+    python batch.py "specs/**/*.req" --jobs 8
+    python batch.py specs/ --out build/apis --incremental --in-memory
+    python batch.py specs/ --trace             # + <out>/<spec>/mdse_trace.json
+
+Al terminar se escribe <out>/batch_report.json con el estado, el tiempo
+y las etapas (hits/misses de cache, ms por etapa) de cada especificación.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pipeline
+
+
+def descubrir_specs(entradas) -> list:
+    """Expande directorios (recursivo) y patrones glob a rutas .req."""
+    specs = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            patron = os.path.join(entrada, "**", "*.req")
+        else:
+            patron = entrada
+        specs.update(os.path.abspath(r) for r in glob.glob(patron, recursive=True)
+                     if os.path.isfile(r))
+    return sorted(specs)
+
+
+def directorios_salida(specs, dir_out: str) -> dict:
+    """
+    <dir_out>/<ruta relativa sin extensión>, tomando como raíz el ancestro
+    común de todas las specs; así dos `api.req` en carpetas distintas no
+    se pisan.
+    """
+    if not specs:
+        return {}
+    raiz = os.path.commonpath([os.path.dirname(s) for s in specs])
+    return {
+        s: os.path.join(dir_out, os.path.splitext(os.path.relpath(s, raiz))[0])
+        for s in specs
+    }
+
+
+def procesar_spec(ruta_req: str, dir_spec: str, opciones: dict) -> dict:
+    """Worker: ejecuta el pipeline completo para una especificación."""
+    t0  = time.perf_counter()
+    log = io.StringIO()
+    resultado = {"spec": ruta_req, "salida": dir_spec}
+    opciones  = dict(opciones)
+    if opciones.pop("trazar", False):
+        os.makedirs(dir_spec, exist_ok=True)
+        opciones["traza"] = os.path.join(dir_spec, "mdse_trace.json")
+    try:
+        with contextlib.redirect_stdout(log):
+            informe = pipeline.run(ruta_req=ruta_req, dir_modelos=dir_spec,
+                                   dir_salida=dir_spec, **opciones)
+        resultado.update(estado="ok", **informe)
+    except Exception as e:
+        resultado.update(estado="error", error=f"{type(e).__name__}: {e}",
+                         log=log.getvalue()[-2000:])
+    resultado["segundos"] = round(time.perf_counter() - t0, 4)
+    return resultado
+
+
+def run_batch(entradas, dir_out: str, jobs: int = None, **opciones) -> dict:
+    specs   = descubrir_specs(entradas)
+    destino = directorios_salida(specs, dir_out)
+    jobs    = jobs or os.cpu_count() or 1
+    os.makedirs(dir_out, exist_ok=True)
+
+    print("=" * 60)
+    print(f"  BATCH MDSE — {len(specs)} especificaciones, {jobs} workers")
+    print("=" * 60)
+
+    t0 = time.perf_counter()
+    resultados = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futuros = [pool.submit(procesar_spec, s, destino[s], opciones) for s in specs]
+        for futuro in as_completed(futuros):
+            r = futuro.result()
+            resultados.append(r)
+            icono = "✅" if r["estado"] == "ok" else "❌"
+            print(f"   {icono} {os.path.relpath(r['spec'])}  ({r['segundos']:.2f}s)")
+            if r["estado"] != "ok":
+                print(f"      {r['error']}")
+
+    resultados.sort(key=lambda r: r["spec"])
+    errores = [r for r in resultados if r["estado"] != "ok"]
+    total   = time.perf_counter() - t0
+    reporte = {
+        "specs":         len(specs),
+        "ok":            len(specs) - len(errores),
+        "errores":       len(errores),
+        "workers":       jobs,
+        "segundos":      round(total, 4),
+        "specs_por_seg": round(len(specs) / total, 2) if total else None,
+        "resultados":    resultados,
+    }
+
+    ruta_reporte = os.path.join(dir_out, "batch_report.json")
+    with open(ruta_reporte, "w") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 60)
+    print(f"  {reporte['ok']} ok, {reporte['errores']} con error "
+          f"en {total:.2f}s ({reporte['specs_por_seg']} specs/s)")
+    print(f"  Informe → {ruta_reporte}")
+    print("=" * 60)
+    return reporte
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline MDSE en lote")
+    parser.add_argument("entradas", nargs="+",
+                        help="directorios (se buscan *.req recursivamente) o patrones glob")
+    parser.add_argument("--out", default=os.path.join(pipeline.base, "salida_batch"),
+                        help="directorio raíz de salida (def: salida_batch/)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="procesos del pool (def: número de CPUs)")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--emit-intermediates", action="store_true")
+    parser.add_argument("--platform", default="fastapi",
+                        choices=pipeline.paso2.PLATAFORMAS)
+    parser.add_argument("--storage", default="memory",
+                        choices=pipeline.paso2.ALMACENAMIENTOS)
+    parser.add_argument("--serialization", default="pydantic",
+                        choices=pipeline.paso2.SERIALIZACIONES)
+    parser.add_argument("--metrics", default="none",
+                        choices=pipeline.paso2.METRICAS)
+    parser.add_argument("--layout", default="single",
+                        choices=pipeline.paso2.DISPOSICIONES)
+    parser.add_argument("--admission", default="none",
+                        choices=pipeline.paso2.ADMISIONES)
+    parser.add_argument("--trace", action="store_true",
+                        help="escribir mdse_trace.json en la salida de cada especificación")
+    args = parser.parse_args()
+
+    reporte = run_batch(args.entradas, args.out, args.jobs,
+                        incremental=args.incremental, en_memoria=args.in_memory,
+                        emitir_intermedios=args.emit_intermediates,
+                        plataforma=args.platform, almacenamiento=args.storage,
+                        serializacion=args.serialization, metricas=args.metrics,
+                        disposicion=args.layout, admision=args.admission,
+                        trazar=args.trace)
+    sys.exit(1 if reporte["errores"] else 0)
@@ -0,0 +1,125 @@
+"""
+BENCHMARK — Control de admisión: lecturas durante una ráfaga de escrituras
+===========================================================================
+Genera la especificación de ejemplo con `--storage sqlite` con y sin
+`--admission writes`, levanta cada app con uvicorn y, a la vez:
+
+  • E conexiones escriben sin pausa lotes de POST /productos/bulk; ante
+    un 503 esperan lo que pide su Retry-After, como un cliente correcto
+  • L conexiones leen GET /clientes/{id}
+
+durante D segundos. Informa rps y latencias p50/p99 de las lecturas y,
+de las escrituras, las aceptadas (207) y las rechazadas (503).
+
+Uso:
+    pip install fastapi uvicorn
+    python benchmarks/bench_admision.py [--escritores 128] [--lectores 16] [--segundos 5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base)
+
+import pipeline
+from bench_async import HOST, esperar_puerto, peticion, puerto_libre
+
+CLIENTES = 200
+
+
+def generar(admision: str, destino: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(en_memoria=True, dir_modelos=destino, dir_salida=destino,
+                     almacenamiento="sqlite", admision=admision)
+
+
+async def poblar(puerto: int):
+    reader, writer = await asyncio.open_connection(HOST, puerto)
+    for i in range(CLIENTES):
+        cuerpo = json.dumps({"nombre": f"C{i}", "email": f"c{i}@ejemplo.com",
+                             "edad": 30}).encode()
+        await peticion(reader, writer, "POST", "/clientes", cuerpo)
+    writer.close()
+
+
+async def carga(puerto: int, args) -> dict:
+    lecturas, escrituras = [], {}
+    lote = json.dumps([{"nombre": f"L{i}", "precio": 1.5, "stock": i, "disponible": True}
+                       for i in range(args.lote)]).encode()
+    fin  = time.perf_counter() + args.segundos
+
+    async def escritor():
+        reader, writer = await asyncio.open_connection(HOST, puerto)
+        while time.perf_counter() < fin:
+            estado = await peticion(reader, writer, "POST", "/productos/bulk", lote)
+            escrituras[estado] = escrituras.get(estado, 0) + 1
+            if estado == 503:
+                await asyncio.sleep(1)          # Retry-After: 1
+        writer.close()
+
+    async def lector():
+        reader, writer = await asyncio.open_connection(HOST, puerto)
+        while time.perf_counter() < fin:
+            t0 = time.perf_counter()
+            await peticion(reader, writer, "GET", f"/clientes/{random.randint(1, CLIENTES)}")
+            lecturas.append(time.perf_counter() - t0)
+        writer.close()
+
+    await asyncio.gather(*(escritor() for _ in range(args.escritores)),
+                         *(lector() for _ in range(args.lectores)))
+    return {"lecturas": lecturas, "escrituras": escrituras}
+
+
+def medir(admision: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        generar(admision, tmp)
+        puerto = puerto_libre()
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=tmp, env={**os.environ, "TIENDAONLINE_DB": os.path.join(tmp, "tienda.db")},
+        )
+        try:
+            esperar_puerto(puerto)
+            asyncio.run(poblar(puerto))
+            r = asyncio.run(carga(puerto, args))
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    latencias = sorted(r["lecturas"])
+    pct = lambda p: latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000
+    return {
+        "admision":   admision,
+        "rps":        round(len(latencias) / args.segundos, 1),
+        "p50_ms":     round(pct(0.50), 2),
+        "p99_ms":     round(pct(0.99), 2),
+        "aceptadas":  r["escrituras"].get(207, 0),
+        "rechazadas": r["escrituras"].get(503, 0),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lecturas con y sin control de admisión")
+    parser.add_argument("--escritores", type=int, default=128)
+    parser.add_argument("--lectores",   type=int, default=16)
+    parser.add_argument("--lote",       type=int, default=200, help="productos por POST /bulk")
+    parser.add_argument("--segundos",   type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'admisión':<10}{'lect. rps':>11}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'escr. 207':>11}{'escr. 503':>11}")
+    for admision in ("none", "writes"):
+        r = medir(admision, args)
+        print(f"{r['admision']:<10}{r['rps']:>11}{r['p50_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['aceptadas']:>11}{r['rechazadas']:>11}")
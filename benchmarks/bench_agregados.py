@@ -0,0 +1,148 @@
+"""
+BENCHMARK — Agregados sobre columnas vs listados completos
+===========================================================
+Genera una especificación con `columnar { total by estado }` para cada
+almacén y mide cada app en proceso (ASGI, sin red) con N pedidos:
+
+  • listado   → GET /pedidos y la suma por estado calculada en el cliente,
+                como tendría que hacerlo un informe sin agregados
+  • aggregate → GET /pedidos/aggregate?group_by=estado
+
+y, con `storage : memory`, el cálculo de _Columnas.agregar sin HTTP:
+con NumPy sobre las columnas y con el camino en Python puro que se usa
+cuando NumPy no está instalado.
+
+Uso:
+    pip install fastapi httpx numpy
+    python benchmarks/bench_agregados.py [--pedidos 10000 100000] [--rondas 20]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+
+ESPEC = """
+api Agregados {
+    resource Pedido {
+        operations: listar, crearLote
+        fields {
+            total     : Number
+            estado    : Text
+        }
+        columnar { total by estado }
+    }
+}
+"""
+
+ALMACENAMIENTOS = ("memory", "sqlite")
+ESTADOS = ("nuevo", "pagado", "enviado", "entregado", "cancelado")
+LOTE = 1000
+
+
+def generar(almacenamiento: str, destino: str):
+    ruta_req = os.path.join(destino, "agregados.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, almacenamiento=almacenamiento)
+
+
+def cargar_app(destino: str):
+    """Importa main.py/schemas.py de `destino` sin mezclarlos con otra variante."""
+    for modulo in ("main", "schemas"):
+        sys.modules.pop(modulo, None)
+    os.environ["AGREGADOS_DB"] = os.path.join(destino, "agregados.db")
+    sys.path.insert(0, destino)
+    try:
+        return importlib.import_module("main")
+    finally:
+        sys.path.remove(destino)
+
+
+def medio_ms(funcion, rondas: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rondas):
+        funcion()
+    return (time.perf_counter() - t0) / rondas * 1000
+
+
+async def medir_app(main, args, n: int) -> dict:
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as c:
+        azar = random.Random(n)
+        for inicio in range(0, n, LOTE):
+            cuerpo = json.dumps([
+                {"total": round(azar.uniform(1, 500), 2), "estado": azar.choice(ESTADOS)}
+                for _ in range(min(LOTE, n - inicio))
+            ])
+            r = await c.post("/pedidos/bulk", content=cuerpo,
+                             headers={"content-type": "application/json"})
+            assert r.status_code == 207, r.text
+
+        async def listado():
+            sumas = {}
+            for pedido in (await c.get("/pedidos")).json():
+                sumas[pedido["estado"]] = sumas.get(pedido["estado"], 0.0) + pedido["total"]
+            return sumas
+
+        async def agregado():
+            r = await c.get("/pedidos/aggregate", params={"group_by": "estado"})
+            return {fila["group"]: fila["sum"] for fila in r.json()}
+
+        esperado, obtenido = await listado(), await agregado()
+        assert esperado.keys() == obtenido.keys()
+        assert all(abs(esperado[e] - obtenido[e]) < 1e-6 * n for e in esperado)
+
+        medidas = {}
+        for nombre, consulta in (("listado", listado), ("aggregate", agregado)):
+            rondas = max(1, args.rondas // 10) if nombre == "listado" else args.rondas
+            t0 = time.perf_counter()
+            for _ in range(rondas):
+                await consulta()
+            medidas[nombre] = (time.perf_counter() - t0) / rondas * 1000
+    return medidas
+
+
+def medir_columnas(main, args) -> dict:
+    """_Columnas.agregar sin HTTP: NumPy frente a Python puro."""
+    columnas = main.pedidos_db_columnas
+    medidas  = {"python": medio_ms(lambda: columnas._agregar_python("total", "estado"), args.rondas)}
+    if main.np is not None:
+        medidas["numpy"] = medio_ms(lambda: columnas._agregar_numpy("total", "estado"), args.rondas)
+    return medidas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agregados sobre columnas vs listados completos")
+    parser.add_argument("--pedidos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--rondas", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'pedidos':>9}  {'almacén':<8}{'listado':>12}{'aggregate':>12}"
+          f"{'columnas py':>13}{'columnas np':>13}")
+    for n in args.pedidos:
+        for almacenamiento in ALMACENAMIENTOS:
+            with tempfile.TemporaryDirectory() as tmp:
+                generar(almacenamiento, tmp)
+                main = cargar_app(tmp)
+                http = asyncio.run(medir_app(main, args, n))
+                columnas = medir_columnas(main, args) if almacenamiento == "memory" else {}
+            celdas = [f"{columnas[k]:>10.2f} ms" if k in columnas else f"{'—':>13}"
+                      for k in ("python", "numpy")]
+            print(f"{n:>9}  {almacenamiento:<8}{http['listado']:>9.1f} ms"
+                  f"{http['aggregate']:>9.2f} ms{''.join(celdas)}")
@@ -0,0 +1,60 @@
+"""
+BENCHMARK — Tiempo de arranque del pipeline
+============================================
+Compara, en procesos nuevos (sin caches calientes del intérprete):
+
+  completo     →  python pipeline.py                (las 4 etapas)
+  incremental  →  python pipeline.py --incremental  (sin cambios: 0 etapas)
+
+e informa si textX llegó a importarse en cada caso.
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en un proceso hijo: mide desde antes de importar el pipeline
+SNIPPET = """
+import contextlib, io, json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {base!r})
+import pipeline
+with contextlib.redirect_stdout(io.StringIO()):
+    pipeline.run(incremental={incremental})
+print(json.dumps({{"ms": (time.perf_counter() - t0) * 1000,
+                  "textx": "textx" in sys.modules}}))
+"""
+
+
+def medir(incremental: bool, repeticiones: int):
+    codigo = SNIPPET.format(base=base, incremental=incremental)
+    tiempos, textx = [], False
+    for _ in range(repeticiones):
+        out = subprocess.run([sys.executable, "-c", codigo], cwd=base,
+                             capture_output=True, text=True, check=True)
+        dato = json.loads(out.stdout.strip().splitlines()[-1])
+        tiempos.append(dato["ms"])
+        textx = dato["textx"]
+    return statistics.median(tiempos), textx
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    # Calentar el manifiesto para que la ejecución incremental sea un no-op
+    medir(True, 1)
+
+    print(f"{'modo':<14}{'mediana (ms)':>14}   textX importado")
+    for nombre, incremental in (("completo", False), ("incremental", True)):
+        ms, textx = medir(incremental, args.repeticiones)
+        print(f"{nombre:<14}{ms:>14.1f}   {'sí' if textx else 'no'}")
@@ -0,0 +1,99 @@
+"""
+BENCHMARK — Arranque en frío de la app generada
+================================================
+Genera la misma especificación sintética (10 … 1000 recursos) con las
+dos disposiciones de step3 y mide, en procesos nuevos:
+
+  single          →  import main   (un main.py y un schemas.py con todo)
+  routers         →  import main   (<API>_LAZY_ROUTERS=0: monta todos)
+  routers-lazy    →  import main   (carga perezosa, por defecto)
+
+y el tiempo hasta responder la primera petición (GET /recurso00000s),
+que en la carga perezosa incluye importar su router y sus schemas.
+
+Uso:
+    pip install fastapi httpx
+    python benchmarks/bench_arranque_app.py [--tamanos 10 100 1000] [--repeticiones 5]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+sys.path.insert(0, base)
+
+import pipeline
+from bench_escalabilidad import sintetizar_req
+
+VARIANTES = (
+    ("single",       "single",  "1"),
+    ("routers",      "routers", "0"),
+    ("routers-lazy", "routers", "1"),
+)
+
+# Se ejecuta en un proceso hijo: httpx y asyncio se importan antes de medir
+SNIPPET = """
+import asyncio, json, sys, time
+import httpx
+sys.path.insert(0, {destino!r})
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def primera():
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as c:
+        r = await c.get("/recurso00000s")
+        assert r.status_code == 200, r.text
+
+asyncio.run(primera())
+t2 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "primera_ms": (t2 - t1) * 1000}}))
+"""
+
+
+def generar(recursos: int, disposicion: str, destino: str):
+    os.makedirs(destino, exist_ok=True)
+    ruta_req = os.path.join(destino, "requirements.req")
+    with open(ruta_req, "w") as f:
+        f.write(sintetizar_req(recursos))
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, disposicion=disposicion)
+
+
+def medir(destino: str, perezosa: str, repeticiones: int) -> dict:
+    entorno = dict(os.environ, SINTETICA_LAZY_ROUTERS=perezosa)
+    codigo  = SNIPPET.format(destino=destino)
+    medidas = []
+    for _ in range(repeticiones):
+        out = subprocess.run([sys.executable, "-c", codigo], cwd=destino, env=entorno,
+                             capture_output=True, text=True, check=True)
+        medidas.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {clave: round(statistics.median(m[clave] for m in medidas), 1)
+            for clave in ("import_ms", "primera_ms")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arranque en frío: single vs routers")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'recursos':>9}  {'disposición':<14}{'import main':>14}{'1ª petición':>14}")
+    for recursos in args.tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            for disposicion in ("single", "routers"):
+                generar(recursos, disposicion, os.path.join(tmp, disposicion))
+            for nombre, disposicion, perezosa in VARIANTES:
+                m = medir(os.path.join(tmp, disposicion), perezosa, args.repeticiones)
+                print(f"{recursos:>9}  {nombre:<14}{m['import_ms']:>11.1f} ms"
+                      f"{m['primera_ms']:>11.1f} ms")
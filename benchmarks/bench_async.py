@@ -0,0 +1,158 @@
+"""
+BENCHMARK — Plataforma fastapi vs fastapi-async
+================================================
+Genera la misma especificación con las dos plataformas del PSM, levanta
+cada app con uvicorn y la somete a carga concurrente:
+
+  • C conexiones keep-alive en paralelo durante D segundos
+  • mezcla de GET /productos/{id} y GET /clientes (listado completo)
+
+Informa requests/segundo y latencias p50/p99 de cada destino.
+
+Uso:
+    pip install fastapi uvicorn
+    python benchmarks/bench_async.py [--conexiones 64] [--segundos 5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base)
+
+import pipeline
+
+HOST = "127.0.0.1"
+
+
+# ── Cliente HTTP/1.1 mínimo (stdlib) ──────────────────────────
+
+async def peticion(reader, writer, metodo: str, ruta: str, cuerpo: bytes = b""):
+    cabeceras = f"{metodo} {ruta} HTTP/1.1\r\nHost: {HOST}\r\n"
+    if cuerpo:
+        cabeceras += f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n"
+    writer.write(cabeceras.encode() + b"\r\n" + cuerpo)
+    await writer.drain()
+
+    estado = int((await reader.readline()).split()[1])
+    largo  = 0
+    while True:
+        linea = await reader.readline()
+        if linea in (b"\r\n", b""):
+            break
+        nombre, _, valor = linea.decode().partition(":")
+        if nombre.lower() == "content-length":
+            largo = int(valor)
+    await reader.readexactly(largo)
+    return estado
+
+
+async def poblar(puerto: int, productos: int, clientes: int):
+    reader, writer = await asyncio.open_connection(HOST, puerto)
+    for i in range(productos):
+        cuerpo = json.dumps({"nombre": f"P{i}", "precio": 9.99, "stock": i,
+                             "disponible": True}).encode()
+        await peticion(reader, writer, "POST", "/productos", cuerpo)
+    for i in range(clientes):
+        cuerpo = json.dumps({"nombre": f"C{i}", "email": f"c{i}@ejemplo.com",
+                             "edad": 30}).encode()
+        await peticion(reader, writer, "POST", "/clientes", cuerpo)
+    writer.close()
+
+
+async def carga(puerto: int, conexiones: int, segundos: float, productos: int):
+    latencias = []
+    fin = time.perf_counter() + segundos
+
+    async def trabajador():
+        reader, writer = await asyncio.open_connection(HOST, puerto)
+        while time.perf_counter() < fin:
+            if random.random() < 0.8:
+                ruta = f"/productos/{random.randrange(productos)}"
+            else:
+                ruta = "/clientes"
+            t0 = time.perf_counter()
+            await peticion(reader, writer, "GET", ruta)
+            latencias.append(time.perf_counter() - t0)
+        writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(conexiones)))
+    return latencias, time.perf_counter() - t0
+
+
+# ── Orquestación ──────────────────────────────────────────────
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def esperar_puerto(puerto: int, timeout: float = 15.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        with contextlib.suppress(OSError), socket.create_connection((HOST, puerto), 0.2):
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"uvicorn no respondió en el puerto {puerto}")
+
+
+def generar(plataforma: str, destino: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(en_memoria=True, dir_modelos=destino, dir_salida=destino,
+                     plataforma=plataforma)
+
+
+def medir(plataforma: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        generar(plataforma, tmp)
+        puerto = puerto_libre()
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=tmp,
+        )
+        try:
+            esperar_puerto(puerto)
+            asyncio.run(poblar(puerto, args.productos, args.clientes))
+            latencias, total = asyncio.run(
+                carga(puerto, args.conexiones, args.segundos, args.productos))
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    latencias.sort()
+    pct = lambda p: latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000
+    return {
+        "plataforma": plataforma,
+        "requests":   len(latencias),
+        "rps":        round(len(latencias) / total, 1),
+        "p50_ms":     round(pct(0.50), 2),
+        "p99_ms":     round(pct(0.99), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conexiones", type=int, default=64)
+    parser.add_argument("--segundos",   type=float, default=5.0)
+    parser.add_argument("--productos",  type=int, default=1000)
+    parser.add_argument("--clientes",   type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'plataforma':<16}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for plataforma in ("fastapi", "fastapi-async"):
+        r = medir(plataforma, args)
+        print(f"{r['plataforma']:<16}{r['requests']:>10}{r['rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p99_ms']:>10}")
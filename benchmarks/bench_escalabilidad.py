@@ -0,0 +1,216 @@
+"""
+BENCHMARK — Escalabilidad de los generadores
+=============================================
+Sintetiza requirements.req con 10 … 10.000 recursos (entre 2 y 20
+campos cada uno, con paginación, índices y cache repartidos) y mide por
+separado cada etapa del pipeline y cada lectura de modelo (textX para
+requirements.req; lectura_rapida, como el pipeline, para los .api):
+
+  parse.req → paso1.generar_pim → parse.pim → paso2.generar_psm
+            → parse.psm → paso3.generar_schemas → paso3.generar_main
+
+De cada etapa se registra el tiempo (mejor de N repeticiones) y el pico
+de memoria (tracemalloc, en una pasada aparte para no inflar el tiempo).
+Los resultados se escriben en JSON; con --baseline se comparan contra
+una ejecución guardada y se marca como regresión toda etapa que tarde
+más de (1 + tolerancia) veces lo registrado.
+
+Uso:
+    python benchmarks/bench_escalabilidad.py
+    python benchmarks/bench_escalabilidad.py --tamanos 10 100 --repeticiones 5
+    python benchmarks/bench_escalabilidad.py --guardar-baseline baseline.json
+    python benchmarks/bench_escalabilidad.py --baseline baseline.json   # exit 1 si hay regresiones
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base)
+
+from pipeline import paso1, paso2, paso3
+from pipeline import lectura
+from metamodelos import cargar_metamodelo
+
+GRAMATICAS = os.path.join(base, "modelos")
+TIPOS      = ("Text", "Number", "Bool", "Date")
+OPERACIONES = "listar, obtener, crear, actualizar, eliminar"
+
+# Diferencias por debajo de esto se consideran ruido, aunque superen la tolerancia
+MINIMO_REGRESION_S = 0.005
+
+
+# ── Modelos sintéticos ────────────────────────────────────────
+
+def sintetizar_req(recursos: int, semilla: int = 0) -> str:
+    """requirements.req con `recursos` recursos de 2 a 20 campos."""
+    azar   = random.Random(semilla)
+    lineas = ["api Sintetica {", ""]
+    for i in range(recursos):
+        campos = azar.randint(2, 20)
+        lineas.append(f"    resource Recurso{i:05d} {{")
+        lineas.append(f"        operations: {OPERACIONES}")
+        lineas.append("        fields {")
+        for j in range(campos):
+            lineas.append(f"            campo{j:02d} : {TIPOS[(i + j) % len(TIPOS)]}")
+        lineas.append("        }")
+        if i % 3 == 0:
+            lineas.append("        pagination: limit 50 max 500")
+        if i % 5 == 0:
+            lineas.append("        indexes { campo00 unique; campo01 }")
+        if i % 7 == 0:
+            lineas.append("        cache: 128")
+        lineas.append("    }")
+        lineas.append("")
+    lineas.append("}")
+    return "\n".join(lineas)
+
+
+# ── Medición ──────────────────────────────────────────────────
+
+def _silencioso(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def medir_etapa(fn, repeticiones: int, memoria: bool) -> dict:
+    """Mejor tiempo de `repeticiones` ejecuciones y pico de memoria (MB)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = _silencioso(fn)
+        tiempos.append(time.perf_counter() - t0)
+    medida = {"s": round(min(tiempos), 6)}
+    if memoria:
+        tracemalloc.start()
+        _silencioso(fn)
+        medida["pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        tracemalloc.stop()
+    return medida, resultado
+
+
+def medir_tamano(recursos: int, repeticiones: int, memoria: bool) -> dict:
+    mm_req   = cargar_metamodelo(os.path.join(GRAMATICAS, "req_grammar.tx"))
+    gram_pim = os.path.join(GRAMATICAS, "pim_grammar.tx")
+    gram_psm = os.path.join(GRAMATICAS, "psm_grammar.tx")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_req = os.path.join(tmp, "requirements.req")
+        ruta_pim = os.path.join(tmp, "pim.api")
+        ruta_psm = os.path.join(tmp, "psm_fastapi.api")
+        with open(ruta_req, "w") as f:
+            f.write(sintetizar_req(recursos))
+
+        etapas, modelos = {}, {}
+
+        def etapa(nombre, fn):
+            etapas[nombre], modelos[nombre] = medir_etapa(fn, repeticiones, memoria)
+            return modelos[nombre]
+
+        req = etapa("parse.req",             lambda: mm_req.model_from_file(ruta_req))
+        etapa("paso1.generar_pim",           lambda: paso1.generar_pim(req, ruta_pim))
+        pim = etapa("parse.pim",             lambda: lectura.leer_pim(gram_pim, ruta_pim))
+        etapa("paso2.generar_psm",           lambda: paso2.generar_psm(pim, ruta_psm))
+        psm = etapa("parse.psm",             lambda: lectura.leer_psm(gram_psm, ruta_psm))
+        etapa("paso3.generar_schemas",       lambda: paso3.generar_schemas(
+                                                 psm, os.path.join(tmp, "schemas.py")))
+        etapa("paso3.generar_main",          lambda: paso3.generar_main(
+                                                 psm, os.path.join(tmp, "main.py")))
+
+        tamanos = {os.path.basename(r): os.path.getsize(r)
+                   for r in (ruta_req, ruta_pim, ruta_psm)}
+
+    return {
+        "recursos":  recursos,
+        "campos":    sum(len(r.fields) for r in req.resources),
+        "endpoints": len(pim.endpoints),
+        "routes":    len(psm.routes),
+        "bytes":     tamanos,
+        "etapas":    etapas,
+    }
+
+
+# ── Baseline ──────────────────────────────────────────────────
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list:
+    """[(recursos, etapa, s_baseline, s_actual), ...] que empeoraron."""
+    regresiones = []
+    previos = {str(r["recursos"]): r for r in baseline.get("tamanos", [])}
+    for actual in resultados["tamanos"]:
+        previo = previos.get(str(actual["recursos"]))
+        if previo is None:
+            continue
+        for nombre, medida in actual["etapas"].items():
+            antes = previo["etapas"].get(nombre, {}).get("s")
+            if antes is None:
+                continue
+            if medida["s"] > antes * (1 + tolerancia) and medida["s"] - antes > MINIMO_REGRESION_S:
+                regresiones.append((actual["recursos"], nombre, antes, medida["s"]))
+    return regresiones
+
+
+def imprimir(resultado: dict, memoria: bool):
+    print(f"\n  {resultado['recursos']} recursos — {resultado['campos']} campos, "
+          f"{resultado['endpoints']} endpoints, {resultado['routes']} routes")
+    for nombre, medida in resultado["etapas"].items():
+        pico = f"{medida['pico_mb']:>10.2f} MB" if memoria else ""
+        print(f"    {nombre:<24}{medida['s'] * 1000:>12.1f} ms{pico}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escalabilidad de las etapas del pipeline")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="número de recursos de cada modelo sintético")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="omitir la pasada con tracemalloc (más rápido)")
+    parser.add_argument("--salida", default="bench_escalabilidad.json",
+                        help="JSON con los resultados (def: bench_escalabilidad.json)")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="empeoramiento relativo admitido frente al baseline (def: 0.25)")
+    parser.add_argument("--guardar-baseline", metavar="RUTA",
+                        help="escribir además los resultados como nuevo baseline")
+    args = parser.parse_args()
+    memoria = not args.sin_memoria
+
+    print("=" * 60)
+    print("  BENCHMARK — Escalabilidad de los generadores")
+    print("=" * 60)
+
+    import textx
+    resultados = {
+        "python":       platform.python_version(),
+        "textx":        textx.__version__,
+        "repeticiones": args.repeticiones,
+        "tamanos":      [],
+    }
+    for recursos in args.tamanos:
+        resultado = medir_tamano(recursos, args.repeticiones, memoria)
+        resultados["tamanos"].append(resultado)
+        imprimir(resultado, memoria)
+
+    for ruta in filter(None, (args.salida, args.guardar_baseline)):
+        with open(ruta, "w") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\n  Resultados → {ruta}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        if regresiones:
+            print(f"\n  ❌ {len(regresiones)} regresiones (> {args.tolerancia:.0%} sobre {args.baseline}):")
+            for recursos, nombre, antes, ahora in regresiones:
+                print(f"     {recursos:>6} recursos  {nombre:<24}"
+                      f"{antes * 1000:>10.1f} → {ahora * 1000:.1f} ms")
+            sys.exit(1)
+        print(f"\n  ✅ Sin regresiones frente a {args.baseline}")
@@ -0,0 +1,187 @@
+"""
+BENCHMARK — Exportación NDJSON en streaming frente al listado completo
+======================================================================
+Genera una especificación con un recurso Factura (`exportar`) para cada
+almacén, carga N facturas y llama a la app en proceso como lo haría el
+servidor ASGI, midiendo cada envío de cuerpo:
+
+  • listado  → GET /facturas          (un array JSON entero)
+  • ndjson   → GET /facturas/export   (una línea por factura, en trozos)
+  • gzip     → GET /facturas/export   con Accept-Encoding: gzip
+
+con el tiempo hasta el primer byte, el total, los bytes enviados y el
+pico de memoria reservada durante la petición (tracemalloc). Comprueba
+además que la exportación contiene las mismas facturas que el listado.
+
+Uso:
+    pip install fastapi httpx
+    python benchmarks/bench_exportacion.py [--facturas 10000 100000]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+
+ESPEC = """
+api Exportacion {
+    resource Factura {
+        operations: listar, crearLote, exportar
+        fields {
+            numero    : Number
+            cliente   : Text
+            producto  : Text
+            cantidad  : Number
+            fecha     : Date
+            estado    : Text
+            total     : Number
+        }
+    }
+}
+"""
+
+ALMACENAMIENTOS = ("memory", "sqlite")
+LOTE = 1000
+
+
+def generar(almacenamiento: str, destino: str):
+    ruta_req = os.path.join(destino, "exportacion.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, almacenamiento=almacenamiento)
+
+
+def cargar_app(destino: str):
+    """Importa main.py/schemas.py de `destino` sin mezclarlos con otra variante."""
+    for modulo in ("main", "schemas"):
+        sys.modules.pop(modulo, None)
+    os.environ["EXPORTACION_DB"] = os.path.join(destino, "exportacion.db")
+    sys.path.insert(0, destino)
+    try:
+        return importlib.import_module("main")
+    finally:
+        sys.path.remove(destino)
+
+
+def factura(azar: random.Random, i: int) -> dict:
+    return {
+        "numero": i, "cliente": f"Cliente {azar.randrange(500)}",
+        "producto": f"Producto de catálogo {azar.randrange(2000)}",
+        "cantidad": azar.randint(1, 20), "fecha": f"2024-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d}",
+        "estado": azar.choice(("emitida", "pagada", "anulada")),
+        "total": round(azar.uniform(1, 5000), 2),
+    }
+
+
+async def pedir(app, ruta: str, cabeceras: dict, guardar: bool = False) -> dict:
+    """
+    Una petición ASGI directa: httpx.ASGITransport junta el cuerpo antes
+    de devolverlo, así que no dejaría ver cuándo sale el primer trozo.
+    Sin `guardar` sólo se cuentan los bytes, para no sumarlos al pico.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": ruta, "raw_path": ruta.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in cabeceras.items()],
+    }
+    medida = {"primero": None, "bytes": 0, "cuerpo": bytearray(), "cabeceras": {}}
+
+    pedida = asyncio.Event()
+
+    async def recibir():
+        if pedida.is_set():          # StreamingResponse espera aquí una desconexión
+            await asyncio.Event().wait()
+        pedida.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(mensaje):
+        if mensaje["type"] == "http.response.start":
+            medida["cabeceras"] = {k.decode(): v.decode() for k, v in mensaje["headers"]}
+        elif mensaje["type"] == "http.response.body" and mensaje.get("body"):
+            if medida["primero"] is None:
+                medida["primero"] = time.perf_counter() - t0
+            medida["bytes"] += len(mensaje["body"])
+            if guardar:
+                medida["cuerpo"] += mensaje["body"]
+
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        inicial = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    await app(scope, recibir, enviar)
+    medida["total"] = time.perf_counter() - t0
+    if tracemalloc.is_tracing():
+        medida["pico"] = tracemalloc.get_traced_memory()[1] - inicial
+    return medida
+
+
+async def medir(main, n: int) -> dict:
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as c:
+        azar = random.Random(n)
+        for inicio in range(0, n, LOTE):
+            cuerpo = json.dumps([factura(azar, i) for i in range(inicio, min(n, inicio + LOTE))])
+            r = await c.post("/facturas/bulk", content=cuerpo,
+                             headers={"content-type": "application/json"})
+            assert r.status_code == 207, r.text
+
+    peticiones = {
+        "listado": ("/facturas", {}),
+        "ndjson":  ("/facturas/export", {}),
+        "gzip":    ("/facturas/export", {"Accept-Encoding": "gzip"}),
+    }
+    medidas = {}
+    for nombre, (ruta, cabeceras) in peticiones.items():
+        await pedir(main.app, ruta, cabeceras)                 # calienta caches y sentencias
+        medidas[nombre] = await pedir(main.app, ruta, cabeceras)
+        tracemalloc.start()                                    # aparte: tracemalloc ralentiza
+        try:
+            medidas[nombre]["pico"] = (await pedir(main.app, ruta, cabeceras))["pico"]
+        finally:
+            tracemalloc.stop()
+
+    completo = json.loads(bytes((await pedir(main.app, "/facturas", {}, True))["cuerpo"]))
+    for cabeceras in ({}, {"Accept-Encoding": "gzip"}):
+        m = await pedir(main.app, "/facturas/export", cabeceras, True)
+        cuerpo = bytes(m["cuerpo"])
+        if cabeceras:
+            assert m["cabeceras"].get("content-encoding") == "gzip"
+            cuerpo = gzip.decompress(cuerpo)
+        assert [json.loads(l) for l in cuerpo.splitlines()] == completo, cabeceras
+    return medidas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportación NDJSON frente al listado completo")
+    parser.add_argument("--facturas", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'facturas':>9}  {'almacén':<8}{'respuesta':<10}"
+          f"{'1er byte':>11}{'total':>11}{'enviado':>12}{'pico mem.':>12}")
+    for n in args.facturas:
+        for almacenamiento in ALMACENAMIENTOS:
+            with tempfile.TemporaryDirectory() as tmp:
+                generar(almacenamiento, tmp)
+                medidas = asyncio.run(medir(cargar_app(tmp), n))
+            for nombre, m in medidas.items():
+                print(f"{n:>9}  {almacenamiento:<8}{nombre:<10}"
+                      f"{m['primero'] * 1000:>8.1f} ms{m['total'] * 1000:>8.1f} ms"
+                      f"{m['bytes'] / 2**20:>8.2f} MiB{m['pico'] / 2**20:>8.2f} MiB")
@@ -0,0 +1,107 @@
+"""
+BENCHMARK — Lectura rápida de los .api intermedios frente a textX
+==================================================================
+Sintetiza requirements.req con 10 … 10.000 recursos (los mismos modelos
+que bench_escalabilidad), escribe pim.api y psm_fastapi.api con los
+generadores y mide, para cada archivo, el mejor tiempo de N lecturas:
+
+  • textx   → metamodelo.model_from_file (Arpeggio, gramática completa)
+  • rapida  → lectura_rapida.leer_pim / leer_psm (línea a línea)
+
+Comprueba además que ambas lecturas son equivalentes: lo leído por la
+lectura rápida se vuelve a serializar idéntico al archivo, y el PSM
+construido y el código generado a partir de cada lectura coinciden.
+
+Uso:
+    python benchmarks/bench_lectura.py [--tamanos 10 100 1000 10000] [--repeticiones 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base)
+
+from pipeline import paso1, paso2, paso3, lectura
+from metamodelos import cargar_metamodelo
+from bench_escalabilidad import GRAMATICAS, sintetizar_req
+
+
+def mejor(fn, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = fn()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def codigo(psm, destino: str) -> dict:
+    """schemas.py y main.py generados a partir de `psm`."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        rutas  = paso3.generar_schemas(psm, os.path.join(destino, "schemas.py"))
+        rutas += paso3.generar_main(psm, os.path.join(destino, "main.py"))
+    textos = {}
+    for ruta in rutas:
+        with open(ruta) as f:
+            textos[os.path.relpath(ruta, destino)] = f.read()
+    return textos
+
+
+def medir(recursos: int, repeticiones: int) -> dict:
+    gram_req = os.path.join(GRAMATICAS, "req_grammar.tx")
+    gram_pim = os.path.join(GRAMATICAS, "pim_grammar.tx")
+    gram_psm = os.path.join(GRAMATICAS, "psm_grammar.tx")
+    mm_pim, mm_psm = cargar_metamodelo(gram_pim), cargar_metamodelo(gram_psm)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_req = os.path.join(tmp, "requirements.req")
+        ruta_pim = os.path.join(tmp, "pim.api")
+        ruta_psm = os.path.join(tmp, "psm_fastapi.api")
+        with open(ruta_req, "w") as f:
+            f.write(sintetizar_req(recursos))
+        with contextlib.redirect_stdout(io.StringIO()):
+            req = cargar_metamodelo(gram_req).model_from_file(ruta_req)
+            paso2.generar_psm(paso1.generar_pim(req, ruta_pim), ruta_psm)
+
+        t_pim_x, pim_x = mejor(lambda: mm_pim.model_from_file(ruta_pim), repeticiones)
+        t_pim_r, pim_r = mejor(lambda: lectura.leer_pim(gram_pim, ruta_pim), repeticiones)
+        t_psm_x, psm_x = mejor(lambda: mm_psm.model_from_file(ruta_psm), repeticiones)
+        t_psm_r, psm_r = mejor(lambda: lectura.leer_psm(gram_psm, ruta_psm), repeticiones)
+
+        with open(ruta_pim) as f:
+            assert paso1.serializar_pim(pim_r) == f.read(), "pim.api no se reproduce"
+        with open(ruta_psm) as f:
+            assert paso2.serializar_psm(psm_r) == f.read(), "psm_fastapi.api no se reproduce"
+        assert (paso2.serializar_psm(paso2.construir_psm(pim_x))
+                == paso2.serializar_psm(paso2.construir_psm(pim_r))), "PSM distinto"
+        with tempfile.TemporaryDirectory() as d_x, tempfile.TemporaryDirectory() as d_r:
+            assert codigo(psm_x, d_x) == codigo(psm_r, d_r), "código generado distinto"
+
+        tamanos = {r: os.path.getsize(r) for r in (ruta_pim, ruta_psm)}
+
+    return {
+        "recursos": recursos,
+        "pim.api":  (tamanos[ruta_pim], t_pim_x, t_pim_r),
+        "psm_fastapi.api": (tamanos[ruta_psm], t_psm_x, t_psm_r),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lectura rápida de los .api frente a textX")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'recursos':>9}  {'archivo':<17}{'tamaño':>11}{'textx':>12}{'rápida':>12}{'mejora':>9}")
+    for recursos in args.tamanos:
+        r = medir(recursos, args.repeticiones)
+        for archivo in ("pim.api", "psm_fastapi.api"):
+            tamano, t_x, t_r = r[archivo]
+            print(f"{recursos:>9}  {archivo:<17}{tamano / 2**20:>7.2f} MiB"
+                  f"{t_x * 1000:>9.1f} ms{t_r * 1000:>9.1f} ms{t_x / t_r:>8.1f}x")
@@ -0,0 +1,131 @@
+"""
+BENCHMARK — Proyección `?fields=` frente a la respuesta completa
+=================================================================
+Genera una especificación con un recurso Factura de siete campos para
+cada almacén y serialización, carga N facturas y mide cada app en
+proceso (ASGI, sin red):
+
+  • completo  → GET /facturas                       (los siete campos)
+  • fields    → GET /facturas?fields=numero,total   (sólo dos)
+
+con el tamaño de cada respuesta y su tiempo medio. Comprueba además que
+la proyección coincide con los mismos campos de la respuesta completa.
+
+Uso:
+    pip install fastapi httpx
+    python benchmarks/bench_proyeccion.py [--facturas 1000 10000] [--rondas 20]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+
+ESPEC = """
+api Proyeccion {
+    resource Factura {
+        operations: listar, obtener, crearLote
+        fields {
+            numero    : Number
+            cliente   : Text
+            producto  : Text
+            cantidad  : Number
+            fecha     : Date
+            estado    : Text
+            total     : Number
+        }
+    }
+}
+"""
+
+VARIANTES = [(a, s) for a in ("memory", "sqlite") for s in ("pydantic", "fast")]
+CAMPOS    = "numero,total"
+LOTE      = 1000
+
+
+def generar(almacenamiento: str, serializacion: str, destino: str):
+    ruta_req = os.path.join(destino, "proyeccion.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, almacenamiento=almacenamiento,
+                     serializacion=serializacion)
+
+
+def cargar_app(destino: str):
+    """Importa main.py/schemas.py de `destino` sin mezclarlos con otra variante."""
+    for modulo in ("main", "schemas"):
+        sys.modules.pop(modulo, None)
+    os.environ["PROYECCION_DB"] = os.path.join(destino, "proyeccion.db")
+    sys.path.insert(0, destino)
+    try:
+        return importlib.import_module("main")
+    finally:
+        sys.path.remove(destino)
+
+
+def factura(azar: random.Random, i: int) -> dict:
+    return {
+        "numero": i, "cliente": f"Cliente {azar.randrange(500)}",
+        "producto": f"Producto de catálogo {azar.randrange(2000)}",
+        "cantidad": azar.randint(1, 20), "fecha": f"2024-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d}",
+        "estado": azar.choice(("emitida", "pagada", "anulada")),
+        "total": round(azar.uniform(1, 5000), 2),
+    }
+
+
+async def medir(main, args, n: int) -> dict:
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as c:
+        azar = random.Random(n)
+        for inicio in range(0, n, LOTE):
+            cuerpo = json.dumps([factura(azar, i) for i in range(inicio, min(n, inicio + LOTE))])
+            r = await c.post("/facturas/bulk", content=cuerpo,
+                             headers={"content-type": "application/json"})
+            assert r.status_code == 207, r.text
+
+        completo = (await c.get("/facturas")).json()
+        proyeccion = (await c.get("/facturas", params={"fields": CAMPOS})).json()
+        campos = CAMPOS.split(",")
+        assert proyeccion == [{k: f[k] for k in campos} for f in completo]
+
+        medidas = {}
+        for nombre, params in (("completo", {}), ("fields", {"fields": CAMPOS})):
+            t0 = time.perf_counter()
+            for _ in range(args.rondas):
+                r = await c.get("/facturas", params=params)
+            medidas[nombre] = ((time.perf_counter() - t0) / args.rondas * 1000, len(r.content))
+    return medidas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Proyección ?fields= frente a la respuesta completa")
+    parser.add_argument("--facturas", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--rondas", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'facturas':>9}  {'almacén':<8}{'serializ.':<10}"
+          f"{'completo':>22}{'fields':>22}{'ahorro':>9}")
+    for n in args.facturas:
+        for almacenamiento, serializacion in VARIANTES:
+            with tempfile.TemporaryDirectory() as tmp:
+                generar(almacenamiento, serializacion, tmp)
+                m = asyncio.run(medir(cargar_app(tmp), args, n))
+            (t_c, b_c), (t_f, b_f) = m["completo"], m["fields"]
+            print(f"{n:>9}  {almacenamiento:<8}{serializacion:<10}"
+                  f"{t_c:>8.2f} ms {b_c / 1024:>8.0f} KiB"
+                  f"{t_f:>8.2f} ms {b_f / 1024:>8.0f} KiB{1 - t_f / t_c:>8.0%}")
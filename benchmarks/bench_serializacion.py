@@ -0,0 +1,139 @@
+"""
+BENCHMARK — Serialización pydantic vs fast
+===========================================
+Genera la misma especificación con las dos serializaciones del PSM y
+mide cada app en proceso (ASGI, sin red) para aislar el coste de
+codificar y decodificar JSON:
+
+  • encode → GET /productos con N productos en el almacén
+  • decode → POST /productos/bulk con un lote de N productos
+
+Informa productos/segundo en cada sentido y memoria por objeto.
+
+Uso:
+    pip install fastapi httpx
+    python benchmarks/bench_serializacion.py [--productos 1000] [--rondas 200]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+
+ESPEC = """
+api Bench {
+    resource Producto {
+        operations: listar, crearLote
+        fields {
+            nombre    : Text
+            precio    : Number
+            stock     : Number
+            disponible: Bool
+            fecha     : Date
+        }
+    }
+}
+"""
+
+
+def generar(serializacion: str, destino: str):
+    ruta_req = os.path.join(destino, "bench.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, serializacion=serializacion)
+
+
+def cargar_app(destino: str):
+    """Importa main.py/schemas.py de `destino` sin mezclarlos con otra variante."""
+    for modulo in ("main", "schemas"):
+        sys.modules.pop(modulo, None)
+    sys.path.insert(0, destino)
+    try:
+        return importlib.import_module("main")
+    finally:
+        sys.path.remove(destino)
+
+
+def lote(n: int) -> bytes:
+    return json.dumps([
+        {"nombre": f"P{i}", "precio": 9.99, "stock": i, "disponible": True,
+         "fecha": "2024-01-15T00:00:00"}
+        for i in range(n)
+    ]).encode()
+
+
+async def medir_app(main, args) -> dict:
+    transporte = httpx.ASGITransport(app=main.app)
+    cabeceras  = {"Content-Type": "application/json"}
+    cuerpo     = lote(args.productos)
+
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as c:
+        r = await c.post("/productos/bulk", content=cuerpo, headers=cabeceras)
+        assert r.status_code == 207, r.text
+
+        r = await c.get("/productos")
+        assert len(r.json()) == args.productos
+
+        t0 = time.perf_counter()
+        for _ in range(args.rondas):
+            await c.get("/productos")
+        encode = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(args.rondas):
+            await c.post("/productos/bulk", content=cuerpo, headers=cabeceras)
+        decode = time.perf_counter() - t0
+
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objetos = [main.Producto(nombre=f"P{i}", precio=9.99, stock=i, disponible=True,
+                             fecha="2024-01-15T00:00:00") for i in range(args.productos)]
+    bytes_por_objeto = (tracemalloc.get_traced_memory()[0] - antes) / len(objetos)
+    tracemalloc.stop()
+
+    total = args.productos * args.rondas
+    return {
+        "encode_por_seg": round(total / encode),
+        "decode_por_seg": round(total / decode),
+        "bytes_objeto":   round(bytes_por_objeto),
+    }
+
+
+def medir(serializacion: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        generar(serializacion, tmp)
+        main = cargar_app(tmp)
+        resultado = asyncio.run(medir_app(main, args))
+    return {"serializacion": serializacion, **resultado}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--productos", type=int, default=1000)
+    parser.add_argument("--rondas",    type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'serialización':<16}{'encode/s':>12}{'decode/s':>12}{'bytes/obj':>12}")
+    resultados = [medir(s, args) for s in pipeline.paso2.SERIALIZACIONES]
+    for r in resultados:
+        print(f"{r['serializacion']:<16}{r['encode_por_seg']:>12}"
+              f"{r['decode_por_seg']:>12}{r['bytes_objeto']:>12}")
+
+    previo, rapido = resultados
+    print(f"\nfast / pydantic: encode x{rapido['encode_por_seg'] / previo['encode_por_seg']:.2f}, "
+          f"decode x{rapido['decode_por_seg'] / previo['decode_por_seg']:.2f}")
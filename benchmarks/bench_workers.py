@@ -0,0 +1,164 @@
+"""
+BENCHMARK — Varios workers de uvicorn sobre el mismo almacén
+=============================================================
+Genera la misma especificación con `storage : memory` y `storage :
+shared`, levanta cada app con `uvicorn --workers N` y comprueba que los
+workers ven los mismos datos:
+
+  • altas    → N×M POST /productos/bulk de un elemento, cada uno por una
+               conexión nueva (el kernel las reparte entre los workers)
+  • lecturas → GET /productos/{id} de cada alta, también por conexiones
+               nuevas: con `memory` muchas caen en un worker que no la
+               vio (404) o que dio ese mismo ID a otro producto
+  • cache    → PUT en un worker y GET cacheado en todos los demás: con
+               `shared` ninguno debe responder la versión anterior
+
+y mide lecturas/segundo con clientes keep-alive repartidos entre los
+workers. Termina con código 1 si `shared` muestra alguna inconsistencia.
+
+Uso:
+    pip install fastapi uvicorn httpx
+    python benchmarks/bench_workers.py [--workers 4] [--altas 50] [--lecturas 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+
+ESPEC = """
+api Workers {
+    resource Producto {
+        operations: listar, obtener, crear, actualizar, crearLote
+        fields {
+            nombre    : Text
+            precio    : Number
+            stock     : Number
+        }
+        cache: 256
+    }
+}
+"""
+
+ALMACENAMIENTOS = ("memory", "shared")
+
+
+def generar(almacenamiento: str, destino: str):
+    ruta_req = os.path.join(destino, "workers.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, almacenamiento=almacenamiento)
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def servidor(destino: str, workers: int):
+    """uvicorn con `workers` procesos sobre main:app; cede la URL base."""
+    puerto  = puerto_libre()
+    entorno = dict(os.environ, WORKERS_DB=os.path.join(destino, "workers.db"))
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=destino, env=entorno)
+    url = f"http://127.0.0.1:{puerto}"
+    try:
+        limite = time.monotonic() + 30
+        while True:
+            with contextlib.suppress(httpx.HTTPError):
+                if httpx.get(url + "/openapi.json").status_code == 200:
+                    break
+            if time.monotonic() > limite or proceso.poll() is not None:
+                raise RuntimeError("uvicorn no arrancó")
+            time.sleep(0.2)
+        time.sleep(0.5 * workers)   # que arranquen también los demás workers
+        yield url
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=30)
+
+
+def producto(i: int) -> dict:
+    return {"nombre": f"P{i}", "precio": 1.5, "stock": i}
+
+
+def comprobar(url: str, args) -> dict:
+    """Cuenta lecturas que no ven una escritura hecha en otra conexión."""
+    with ThreadPoolExecutor(args.workers * 4) as hilos:
+        altas = list(hilos.map(lambda i: httpx.post(url + "/productos/bulk", json=[producto(i)]),
+                               range(args.workers * args.altas)))
+        ids   = [r.json()[0]["id"] for r in altas]
+        leidas = list(hilos.map(lambda i: httpx.get(f"{url}/productos/{i}"), ids))
+        perdidas = sum(r.status_code != 200 or r.json()["nombre"] != f"P{n}"
+                       for n, r in enumerate(leidas))
+
+        # Calienta la cache de todos los workers y cambia el producto en uno
+        objetivo = ids[0]
+        list(hilos.map(lambda _: httpx.get(f"{url}/productos/{objetivo}"), range(args.workers * 8)))
+        httpx.put(f"{url}/productos/{objetivo}", json=producto(-1))
+        nombres  = list(hilos.map(lambda _: httpx.get(f"{url}/productos/{objetivo}").json().get("nombre"),
+                                  range(args.workers * 8)))
+        obsoletas = sum(nombre != "P-1" for nombre in nombres)
+
+    return {"ids": ids, "perdidas": perdidas,
+            "lecturas_cache": len(nombres), "obsoletas": obsoletas}
+
+
+def medir_lecturas(url: str, ids: list, args) -> float:
+    """GET /productos/{id} por segundo con un cliente keep-alive por hilo."""
+    hilos = args.workers * 4
+    por_hilo = args.lecturas // hilos
+
+    def leer(_):
+        with httpx.Client(base_url=url) as cliente:
+            for i in range(por_hilo):
+                cliente.get(f"/productos/{ids[i % len(ids)]}")
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        list(ejecutor.map(leer, range(hilos)))
+    return por_hilo * hilos / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coherencia y rendimiento con varios workers")
+    parser.add_argument("--workers",  type=int, default=4)
+    parser.add_argument("--altas",    type=int, default=50, help="altas por worker")
+    parser.add_argument("--lecturas", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'almacén':<10}{'altas':>8}{'perdidas':>10}{'obsoletas':>11}{'lecturas/s':>12}")
+    inconsistente = False
+    for almacenamiento in ALMACENAMIENTOS:
+        with tempfile.TemporaryDirectory() as tmp:
+            generar(almacenamiento, tmp)
+            with servidor(tmp, args.workers) as url:
+                r = comprobar(url, args)
+                rps = medir_lecturas(url, r["ids"], args)
+        print(f"{almacenamiento:<10}{len(r['ids']):>8}{r['perdidas']:>10}"
+              f"{r['obsoletas']:>8}/{r['lecturas_cache']:<3}{rps:>11.0f}")
+        if almacenamiento == "shared" and (r["perdidas"] or r["obsoletas"]):
+            inconsistente = True
+
+    if inconsistente:
+        print("\n  ❌ storage shared: algún worker no vio las escrituras de otro")
+        sys.exit(1)
+    print(f"\n  ✅ storage shared: {args.workers} workers ven los mismos datos")
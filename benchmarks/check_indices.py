@@ -0,0 +1,213 @@
+"""
+COMPROBACIÓN — Índices secundarios (únicos y por fecha) bajo concurrencia
+==========================================================================
+Genera una especificación con un índice único (`codigo`) y dos no únicos
+(`fecha`, de tipo Date, y `sala`) y, para cada almacén, plataforma y
+disposición, importa la app y en proceso (ASGI, sin red):
+
+  • lanza a la vez muchas altas con el mismo `codigo` (y lotes que lo
+    repiten): debe crearse exactamente una y el resto recibir 409
+  • con handlers síncronos, repite la prueba llamando al handler desde
+    varios hilos a la vez, como el threadpool de un servidor con carga
+  • mezcla altas, modificaciones y bajas concurrentes
+  • compara GET /eventos?fecha=… y ?sala=… con el filtro recalculado
+    desde GET /eventos
+
+Termina con código 1 si alguna variante no se importa, admite un
+duplicado o filtra distinto del recálculo.
+
+Uso:
+    pip install fastapi httpx
+    python benchmarks/check_indices.py [--concurrentes 50] [--operaciones 500] [--hilos 16]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import itertools
+import os
+import random
+import sys
+import tempfile
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+from fastapi import HTTPException
+
+ESPEC = """
+api Indices {
+    resource Evento {
+        operations: listar, obtener, crear, actualizar, eliminar, crearLote
+        fields {
+            codigo : Text
+            fecha  : Date
+            sala   : Text
+        }
+        indexes { codigo unique; fecha; sala }
+    }
+}
+"""
+
+ALMACENAMIENTOS = ("memory", "sqlite", "shared")
+PLATAFORMAS     = ("fastapi", "fastapi-async")
+DISPOSICIONES   = ("single", "routers")
+FECHAS = ("2024-01-15T00:00:00", "2024-02-01T09:30:00", "2024-03-10T18:00:00")
+SALAS  = ("norte", "sur")
+
+
+def generar(almacenamiento: str, plataforma: str, disposicion: str, destino: str):
+    ruta_req = os.path.join(destino, "indices.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, almacenamiento=almacenamiento,
+                     plataforma=plataforma, disposicion=disposicion)
+
+
+@contextlib.contextmanager
+def cargar_app(destino: str):
+    """
+    Importa main.py (y sus módulos) de `destino` sin mezclarlos con otra
+    variante; `destino` sigue en sys.path mientras se usa, porque los
+    routers se cargan en la primera petición.
+    """
+    for modulo in list(sys.modules):
+        if modulo.split(".")[0] in ("main", "schemas", "comun", "esquemas", "routers"):
+            del sys.modules[modulo]
+    os.environ["INDICES_DB"] = os.path.join(destino, "indices.db")
+    sys.path.insert(0, destino)
+    try:
+        yield importlib.import_module("main")
+    finally:
+        sys.path.remove(destino)
+
+
+def evento(azar: random.Random, codigo: str) -> dict:
+    return {"codigo": codigo, "fecha": azar.choice(FECHAS), "sala": azar.choice(SALAS)}
+
+
+def alta_eventos(app):
+    """La ruta POST /eventos; con routers, dentro del router ya montado."""
+    rutas = list(app.routes)
+    while rutas:
+        ruta = rutas.pop()
+        if hasattr(ruta, "original_router"):     # FastAPI reciente: include_router no aplana
+            rutas += ruta.original_router.routes
+        elif getattr(ruta, "path", None) == "/eventos" and "POST" in ruta.methods:
+            return ruta
+
+
+def altas_en_hilos(app, codigo: str, hilos: int) -> int:
+    """
+    POST /eventos con el mismo `codigo` desde `hilos` hilos que arrancan
+    a la vez; devuelve cuántas altas se aceptaron.
+    """
+    ruta   = alta_eventos(app)
+    modelo = typing.get_type_hints(ruta.endpoint)["data"]
+    salida = threading.Barrier(hilos)
+
+    def alta(_):
+        dato = modelo(codigo=codigo, fecha=FECHAS[0], sala=SALAS[0])
+        salida.wait()
+        try:
+            ruta.endpoint(data=dato)
+            return True
+        except HTTPException:
+            return False
+
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        return sum(ejecutor.map(alta, range(hilos)))
+
+
+async def comprobar(main, args) -> list:
+    """Devuelve la lista de fallos de la variante cargada en `main`."""
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://check") as c:
+        azar, fallos = random.Random(args.semilla), []
+
+        # Altas simultáneas del mismo código: una sola puede ganar
+        repetido = await asyncio.gather(*[
+            c.post("/eventos", json=evento(azar, "repetido")) for _ in range(args.concurrentes)
+        ])
+        estados = sorted(r.status_code for r in repetido)
+        if estados != [201] + [409] * (args.concurrentes - 1):
+            fallos.append(f"altas repetidas → {estados.count(201)} creadas")
+        lotes = await asyncio.gather(*[
+            c.post("/eventos/bulk", json=[evento(azar, "lote"), evento(azar, "lote")])
+            for _ in range(args.concurrentes // 5 or 1)
+        ])
+        creados = sum(f["status"] == 201 for r in lotes for f in r.json())
+        if creados != 1:
+            fallos.append(f"lotes repetidos → {creados} creados")
+        if not asyncio.iscoroutinefunction(alta_eventos(main.app).endpoint):
+            for ronda in range(args.rondas):
+                creados = altas_en_hilos(main.app, f"hilos{ronda}", args.hilos)
+                if creados != 1:
+                    fallos.append(f"altas desde {args.hilos} hilos → {creados} creadas")
+                    break
+
+        # Altas, modificaciones y bajas concurrentes sobre pocos códigos
+        async def operacion(i: int):
+            codigo = f"c{azar.randrange(20)}"
+            if i % 4 == 3:
+                await c.delete(f"/eventos/{azar.randrange(i + 1)}")
+            elif i % 4 == 2:
+                await c.put(f"/eventos/{azar.randrange(i + 1)}", json=evento(azar, codigo))
+            else:
+                await c.post("/eventos", json=evento(azar, codigo))
+        await asyncio.gather(*[operacion(i) for i in range(args.operaciones)])
+
+        eventos = (await c.get("/eventos")).json()
+        codigos = [e["codigo"] for e in eventos]
+        if len(codigos) != len(set(codigos)):
+            fallos.append(f"{len(codigos) - len(set(codigos))} códigos duplicados en el almacén")
+        for campo, valores in (("fecha", FECHAS), ("sala", SALAS)):
+            for valor in valores:
+                r = await c.get("/eventos", params={campo: valor})
+                esperado = sorted(e["codigo"] for e in eventos if e[campo] == valor)
+                if r.status_code != 200 or sorted(e["codigo"] for e in r.json()) != esperado:
+                    fallos.append(f"?{campo}={valor} distinto del recálculo")
+    return fallos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índices secundarios bajo concurrencia")
+    parser.add_argument("--concurrentes", type=int, default=50)
+    parser.add_argument("--operaciones", type=int, default=500)
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--rondas", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    # Cambios de hilo mucho más frecuentes: las carreras entre handlers
+    # del threadpool aparecen en unas pocas peticiones
+    sys.setswitchinterval(1e-6)
+
+    fallidos = []
+    for almacenamiento, plataforma, disposicion in itertools.product(
+            ALMACENAMIENTOS, PLATAFORMAS, DISPOSICIONES):
+        variante = f"{almacenamiento}/{plataforma}/{disposicion}"
+        with tempfile.TemporaryDirectory() as tmp:
+            generar(almacenamiento, plataforma, disposicion, tmp)
+            try:
+                with cargar_app(tmp) as main:
+                    fallos = asyncio.run(comprobar(main, args))
+            except Exception as e:
+                fallos = [f"{type(e).__name__}: {e}"]
+        print(f"  {variante:<34}{'ok' if not fallos else '; '.join(fallos)}")
+        if fallos:
+            fallidos.append(variante)
+
+    if fallidos:
+        print(f"\n  ❌ índices incoherentes en {', '.join(fallidos)}")
+        sys.exit(1)
+    print("\n  ✅ índices coherentes y sin duplicados en todas las variantes")
@@ -0,0 +1,168 @@
+"""
+COMPROBACIÓN — Resúmenes mantenidos frente a recalcularlos
+===========================================================
+Genera una especificación con dos `resumen` (uno por estado y otro
+global) para cada almacén y, en proceso (ASGI, sin red), mezcla al azar
+altas, altas por lote, modificaciones (cambiando de grupo) y bajas.
+Tras cada tanda compara
+
+  • GET /ventas/resumen/porEstado y GET /ventas/resumen/total
+  • con los mismos contadores recalculados desde GET /ventas
+
+y al final mide cuánto tarda cada lectura. Termina con código 1 si algún
+resumen no coincide con el recálculo.
+
+Uso:
+    pip install fastapi httpx
+    python benchmarks/check_resumenes.py [--operaciones 5000] [--tandas 10]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+base = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(base))
+
+import httpx
+import pipeline
+
+ESPEC = """
+api Resumenes {
+    resource Venta {
+        operations: listar, obtener, crear, actualizar, eliminar, crearLote
+        fields {
+            importe   : Number
+            estado    : Text
+            canal     : Text
+        }
+        resumen porEstado by estado { ventas : count; ingresos : sum importe }
+        resumen total { ventas : count; ingresos : sum importe }
+    }
+}
+"""
+
+ALMACENAMIENTOS = ("memory", "sqlite", "shared")
+ESTADOS = ("nuevo", "pagado", "enviado", "cancelado")
+
+
+def generar(almacenamiento: str, destino: str):
+    ruta_req = os.path.join(destino, "resumenes.req")
+    with open(ruta_req, "w") as f:
+        f.write(ESPEC)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=destino,
+                     dir_salida=destino, almacenamiento=almacenamiento)
+
+
+def cargar_app(destino: str):
+    """Importa main.py/schemas.py de `destino` sin mezclarlos con otra variante."""
+    for modulo in ("main", "schemas"):
+        sys.modules.pop(modulo, None)
+    os.environ["RESUMENES_DB"] = os.path.join(destino, "resumenes.db")
+    sys.path.insert(0, destino)
+    try:
+        return importlib.import_module("main")
+    finally:
+        sys.path.remove(destino)
+
+
+def venta(azar: random.Random) -> dict:
+    return {"importe": round(azar.uniform(1, 500), 2), "estado": azar.choice(ESTADOS),
+            "canal": azar.choice(("web", "tienda"))}
+
+
+def recalcular(ventas: list) -> tuple:
+    """Los dos resúmenes de ESPEC, calculados recorriendo todas las ventas."""
+    grupos = {}
+    for v in ventas:
+        fila = grupos.setdefault(v["estado"], {"group": v["estado"], "ventas": 0, "ingresos": 0.0})
+        fila["ventas"]   += 1
+        fila["ingresos"] += v["importe"]
+    total = {"ventas": len(ventas), "ingresos": sum(v["importe"] for v in ventas)}
+    return [grupos[g] for g in sorted(grupos)], [total]
+
+
+def iguales(esperado: list, obtenido: list) -> bool:
+    if len(esperado) != len(obtenido):
+        return False
+    for e, o in zip(esperado, obtenido):
+        if e.keys() != o.keys() or e.get("group") != o.get("group") or e["ventas"] != o["ventas"]:
+            return False
+        if abs(e["ingresos"] - o["ingresos"]) > 1e-6 * max(1.0, abs(e["ingresos"])):
+            return False
+    return True
+
+
+async def comprobar(main, args) -> dict:
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://check") as c:
+        azar, ids, fallos = random.Random(args.semilla), [], 0
+        por_tanda = max(1, args.operaciones // args.tandas)
+        for _ in range(args.tandas):
+            for _ in range(por_tanda):
+                operacion = azar.random()
+                if operacion < 0.35:
+                    r = await c.post("/ventas", json=venta(azar))
+                    assert r.status_code == 201, r.text   # sin id: sólo cuenta en los resúmenes
+                elif operacion < 0.45 or len(ids) < 2:
+                    r = await c.post("/ventas/bulk", content=json.dumps(
+                        [venta(azar) for _ in range(azar.randint(1, 20))]),
+                        headers={"content-type": "application/json"})
+                    assert r.status_code == 207, r.text
+                    ids += [fila["id"] for fila in r.json()]
+                elif operacion < 0.75:
+                    r = await c.put(f"/ventas/{azar.choice(ids)}", json=venta(azar))
+                    assert r.status_code == 200, r.text
+                else:
+                    r = await c.delete(f"/ventas/{ids.pop(azar.randrange(len(ids)))}")
+                    assert r.status_code == 200, r.text
+
+            por_estado, total = recalcular((await c.get("/ventas")).json())
+            if not iguales(por_estado, (await c.get("/ventas/resumen/porEstado")).json()):
+                fallos += 1
+            if not iguales(total, (await c.get("/ventas/resumen/total")).json()):
+                fallos += 1
+
+        ventas = (await c.get("/ventas")).json()
+        medidas = {"n": len(ventas), "fallos": fallos}
+        for nombre, ruta in (("listado", "/ventas"), ("resumen", "/ventas/resumen/porEstado")):
+            rondas = max(1, args.rondas // 10) if nombre == "listado" else args.rondas
+            t0 = time.perf_counter()
+            for _ in range(rondas):
+                await c.get(ruta)
+            medidas[nombre] = (time.perf_counter() - t0) / rondas * 1000
+    return medidas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resúmenes mantenidos frente a recalcularlos")
+    parser.add_argument("--operaciones", type=int, default=5000)
+    parser.add_argument("--tandas", type=int, default=10)
+    parser.add_argument("--rondas", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'almacén':<10}{'ventas':>8}{'fallos':>8}{'listado':>12}{'resumen':>12}")
+    fallidos = []
+    for almacenamiento in ALMACENAMIENTOS:
+        with tempfile.TemporaryDirectory() as tmp:
+            generar(almacenamiento, tmp)
+            r = asyncio.run(comprobar(cargar_app(tmp), args))
+        print(f"{almacenamiento:<10}{r['n']:>8}{r['fallos']:>8}"
+              f"{r['listado']:>9.2f} ms{r['resumen']:>9.3f} ms")
+        if r["fallos"]:
+            fallidos.append(almacenamiento)
+
+    if fallidos:
+        print(f"\n  ❌ resúmenes distintos del recálculo con storage {', '.join(fallidos)}")
+        sys.exit(1)
+    print("\n  ✅ los resúmenes coinciden con el recálculo en todos los almacenes")
@@ -0,0 +1,85 @@
+"""
+CACHE INCREMENTAL — Manifiesto de hashes por etapa
+===================================================
+Guarda, para cada etapa del pipeline, un hash del contenido de sus
+entradas (modelo, gramática y código fuente del generador) y de las
+salidas que produjo.
+
+Una etapa se omite cuando:
+  • el hash de sus entradas coincide con el registrado, y
+  • todas sus salidas (las pedidas y las registradas en la última
+    ejecución) existen y no fueron modificadas a mano.
+
+El manifiesto es un JSON simple:
+
+  {
+    "etapas": {
+      "paso1.generar_pim": {
+        "entrada": "<sha256>",
+        "salidas": {"pim.api": "<sha256>"}
+      },
+      ...
+    }
+  }
+"""
+
+import hashlib
+import json
+import os
+
+
+def hash_archivos(rutas, opciones=None) -> str:
+    """
+    sha256 del contenido de varios archivos (el orden importa) y, si se
+    dan, de las opciones que cambian la salida de la etapa.
+    """
+    h = hashlib.sha256()
+    if opciones:
+        h.update(json.dumps(opciones, sort_keys=True).encode())
+    for ruta in rutas:
+        h.update(os.path.basename(ruta).encode())
+        h.update(b"\0")
+        with open(ruta, "rb") as f:
+            h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class CacheEtapas:
+    """Manifiesto de cache persistido en disco."""
+
+    def __init__(self, ruta_manifiesto: str):
+        self.ruta  = ruta_manifiesto
+        self.base  = os.path.dirname(os.path.abspath(ruta_manifiesto))
+        self.etapas = {}
+        if os.path.exists(ruta_manifiesto):
+            try:
+                with open(ruta_manifiesto) as f:
+                    self.etapas = json.load(f).get("etapas", {})
+            except (OSError, ValueError):
+                self.etapas = {}     # manifiesto corrupto → se reconstruye
+
+    def _rel(self, ruta: str) -> str:
+        return os.path.relpath(os.path.abspath(ruta), self.base)
+
+    def vigente(self, nombre: str, entradas, salidas, opciones=None) -> bool:
+        """True si la etapa puede omitirse."""
+        registro = self.etapas.get(nombre)
+        if not registro or registro.get("entrada") != hash_archivos(entradas, opciones):
+            return False
+        registradas = registro.get("salidas", {})
+        for ruta in list(salidas) + [os.path.join(self.base, r) for r in registradas]:
+            esperado = registradas.get(self._rel(ruta))
+            if not os.path.exists(ruta) or esperado != hash_archivos([ruta]):
+                return False
+        return True
+
+    def registrar(self, nombre: str, entradas, salidas, opciones=None):
+        self.etapas[nombre] = {
+            "entrada": hash_archivos(entradas, opciones),
+            "salidas": {self._rel(r): hash_archivos([r]) for r in salidas},
+        }
+
+    def guardar(self):
+        with open(self.ruta, "w") as f:
+            json.dump({"etapas": self.etapas}, f, indent=2, sort_keys=True)
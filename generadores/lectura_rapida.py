@@ -0,0 +1,294 @@
+"""
+LECTURA RÁPIDA — pim.api y psm_fastapi.api sin pasar por Arpeggio
+==================================================================
+pim.api y psm_fastapi.api los escriben step1 y step2, siempre con la
+misma disposición: una declaración por línea y en el orden de la
+gramática. Este lector los recorre línea a línea, reconoce cada línea
+con una expresión regular y construye directamente los objetos de
+modelos_memoria, con los mismos atributos que el modelo textX
+(`modelClasses`, `endpoints`, `schemas`, `routes`…).
+
+Si alguna línea no encaja en esa disposición canónica —un .api editado
+a mano con otro formato, o con un error— el archivo entero se lee con
+textX, que acepta la gramática completa y señala los errores con su
+posición.
+"""
+
+import os
+import re
+
+from metamodelos import cargar_metamodelo
+from modelos_memoria import (
+    PIMApi, PIMModelClass, PIMEndpoint, Field, Path, Param,
+    PSMApi, Schema, SchemaField, Route, PathParam, QueryParam, Body, Admission,
+    ResponseType, Pagination, Indexes, Index, Cache, Columnar, Resumen, Medida,
+)
+
+ID     = r"[^\W\d]\w*"
+TIPO   = rf"(?P<lista>List\[\s*)?(?P<tipo>{ID})(?(lista)\s*\])"   # X o List[X]
+CADENA = r'"([^"\\]*)"'                             # sin escapes: si no, textX
+
+# ── Líneas comunes a las dos gramáticas ───────────────────────
+CAMPO      = re.compile(rf"({ID})\s*:\s*({ID})")
+INDEXES    = re.compile(r"indexes\s*\{(.*)\}")
+INDICE     = re.compile(rf"({ID})(\s+unique)?")
+CACHE      = re.compile(r"cache\s*:\s*(\d+)")
+COLUMNAR   = re.compile(r"columnar\s*\{(.*)\}")
+RESUMEN    = re.compile(rf"resumen\s+({ID})(?:\s+by\s+({ID}))?\s*\{{(.*)\}}")
+MEDIDA     = re.compile(rf"({ID})\s*:\s*(?:(count)|sum\s+({ID}))")
+SUMMARY    = re.compile(rf"summary\s*:\s*{CADENA}")
+RESPONSE   = re.compile(rf"response\s*:\s*{TIPO}")
+PAGINATION = re.compile(r"pagination\s*:\s*limit\s+(\d+)\s+max\s+(\d+)")
+
+# ── pim.api ───────────────────────────────────────────────────
+PIM         = re.compile(rf"pim\s+({ID})\s*\{{")
+MODEL_CLASS = re.compile(rf"modelClass\s+({ID})\s*\{{")
+ENDPOINT    = re.compile(rf"endpoint\s+({ID})\s+([/a-zA-Z0-9_{{}}]+)\s*\{{")
+PARAMS      = re.compile(r"params\s*:\s*(.+)")
+PARAM       = re.compile(rf"({ID})\s*:\s*{TIPO}")
+
+# ── psm_fastapi.api ───────────────────────────────────────────
+PSM         = re.compile(rf"psm\s+([a-zA-Z_][a-zA-Z0-9_\-]*)\s+({ID})\s*\{{")
+OPCION      = re.compile(rf"(storage|serialization|metrics|layout)\s*:\s*({ID})")
+SCHEMA      = re.compile(rf"schema\s+({ID})\s*\{{")
+ROUTE       = re.compile(rf"route\s+({ID})\s+{CADENA}\s*\{{")
+PATH_PARAM  = re.compile(rf"path_param\s*:\s*({ID})\s*:\s*({ID})")
+QUERY_PARAM = re.compile(rf"query_param\s*:\s*({ID})\s*:\s*{TIPO}")
+BODY        = re.compile(rf"body\s*:\s*{TIPO}")
+STATUS      = re.compile(r"status\s*:\s*(\d+)")
+ADMISSION   = re.compile(r"admission\s*:\s*concurrency\s+(\d+)\s+queue\s+(\d+)")
+
+OPCIONES_PSM = ("storage", "serialization", "metrics", "layout")
+
+
+class _NoCanonico(Exception):
+    """La línea `numero` no sigue la disposición que escriben los generadores."""
+
+    def __init__(self, numero: int):
+        super().__init__(numero)
+        self.numero = numero
+
+
+class _Lector:
+    """Líneas no vacías de un archivo, sin sangría, leídas según se piden."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.numero  = 0
+
+    def siguiente(self) -> str:
+        for linea in self.archivo:
+            self.numero += 1
+            linea = linea.strip()
+            if linea:
+                return linea
+        return ""                     # fin de archivo: no encaja con nada
+
+    def exigir(self, patron: re.Pattern) -> re.Match:
+        m = patron.fullmatch(self.siguiente())
+        if m is None:
+            raise _NoCanonico(self.numero)
+        return m
+
+    def fin(self):
+        """Tras la llave de cierre del modelo sólo pueden quedar líneas vacías."""
+        if self.siguiente():
+            raise _NoCanonico(self.numero)
+
+
+def leer_pim(ruta_gramatica: str, ruta_modelo: str):
+    """pim.api → PIMApi; con textX si el archivo no tiene la disposición canónica."""
+    return _leer(_pim, ruta_gramatica, ruta_modelo)
+
+
+def leer_psm(ruta_gramatica: str, ruta_modelo: str):
+    """psm_fastapi.api → PSMApi; con textX si el archivo no tiene la disposición canónica."""
+    return _leer(_psm, ruta_gramatica, ruta_modelo)
+
+
+def _leer(construir, ruta_gramatica: str, ruta_modelo: str):
+    with open(ruta_modelo) as f:
+        try:
+            return construir(_Lector(f))
+        except _NoCanonico as e:
+            numero = e.numero
+    print(f"   ↩️  {os.path.basename(ruta_modelo)}:{numero} fuera de la disposición "
+          f"canónica: se lee con textX")
+    return cargar_metamodelo(ruta_gramatica).model_from_file(ruta_modelo)
+
+
+# ── pim.api ───────────────────────────────────────────────────
+
+def _pim(lector: _Lector) -> PIMApi:
+    pim = PIMApi(name=lector.exigir(PIM)[1])
+    while (linea := lector.siguiente()) != "}":
+        if m := MODEL_CLASS.fullmatch(linea):
+            pim.modelClasses.append(_clase(lector, PIMModelClass(m[1]), Field))
+        elif m := ENDPOINT.fullmatch(linea):
+            pim.endpoints.append(_endpoint(lector, m[1], m[2]))
+        else:
+            raise _NoCanonico(lector.numero)
+    lector.fin()
+    return pim
+
+
+def _endpoint(lector: _Lector, metodo: str, ruta: str) -> PIMEndpoint:
+    summary  = lector.exigir(SUMMARY)[1]
+    params   = _params(lector, lector.exigir(PARAMS)[1])
+    response = _respuesta(lector.exigir(RESPONSE))
+    endpoint = PIMEndpoint(metodo, Path(ruta), summary, params, response)
+    linea = lector.siguiente()
+    if m := PAGINATION.fullmatch(linea):
+        endpoint.pagination = Pagination(int(m[1]), int(m[2]))
+        linea = lector.siguiente()
+    if linea != "}":
+        raise _NoCanonico(lector.numero)
+    return endpoint
+
+
+def _params(lector: _Lector, texto: str) -> list:
+    """none | id:Number, body:List[Producto]"""
+    if texto == "none":
+        return []
+    params = []
+    for parte in texto.split(","):
+        m = PARAM.fullmatch(parte.strip())
+        if m is None:
+            raise _NoCanonico(lector.numero)
+        params.append(Param(m[1], m["tipo"], list=bool(m["lista"])))
+    return params
+
+
+# ── psm_fastapi.api ───────────────────────────────────────────
+
+def _psm(lector: _Lector) -> PSMApi:
+    m   = lector.exigir(PSM)
+    psm = PSMApi(platform=m[1], name=m[2])
+
+    # Opciones de la cabecera, cada una como mucho una vez y en su orden
+    linea, siguiente = lector.siguiente(), 0
+    while (m := OPCION.fullmatch(linea)) and OPCIONES_PSM.index(m[1]) >= siguiente:
+        setattr(psm, m[1], m[2])
+        siguiente = OPCIONES_PSM.index(m[1]) + 1
+        linea = lector.siguiente()
+
+    while m := SCHEMA.fullmatch(linea):
+        psm.schemas.append(_clase(lector, Schema(m[1]), SchemaField))
+        linea = lector.siguiente()
+    while m := ROUTE.fullmatch(linea):
+        psm.routes.append(_route(lector, m[1], m[2]))
+        linea = lector.siguiente()
+    if linea != "}" or not psm.schemas or not psm.routes:
+        raise _NoCanonico(lector.numero)
+    lector.fin()
+    return psm
+
+
+def _route(lector: _Lector, metodo: str, ruta: str) -> Route:
+    summary = lector.exigir(SUMMARY)[1]
+    linea   = lector.siguiente()
+    opcionales = {}
+    for nombre, patron in (("path_param", PATH_PARAM), ("query_param", QUERY_PARAM),
+                           ("body", BODY)):
+        if m := patron.fullmatch(linea):
+            opcionales[nombre] = m
+            linea = lector.siguiente()
+    m = RESPONSE.fullmatch(linea)
+    if m is None:
+        raise _NoCanonico(lector.numero)
+    route = Route(metodo, ruta, summary, _respuesta(m), int(lector.exigir(STATUS)[1]))
+
+    if m := opcionales.get("path_param"):
+        route.path_param = PathParam(m[1], m[2])
+    if m := opcionales.get("query_param"):
+        route.query_param = QueryParam(m[1], m["tipo"], list=bool(m["lista"]))
+    if m := opcionales.get("body"):
+        route.body = Body(m["tipo"], list=bool(m["lista"]))
+
+    linea = lector.siguiente()
+    if m := PAGINATION.fullmatch(linea):
+        route.pagination = Pagination(int(m[1]), int(m[2]))
+        linea = lector.siguiente()
+    if m := ADMISSION.fullmatch(linea):
+        route.admission = Admission(int(m[1]), int(m[2]))
+        linea = lector.siguiente()
+    if linea != "}":
+        raise _NoCanonico(lector.numero)
+    return route
+
+
+# ── Comunes: modelClass / schema y tipos ──────────────────────
+
+def _respuesta(m: re.Match) -> ResponseType:
+    return ResponseType(m["tipo"], list=bool(m["lista"]))
+
+
+def _clase(lector: _Lector, clase, campo):
+    """
+    Cuerpo de un modelClass o schema: campos y, en este orden y cada uno
+    opcional, indexes, cache, columnar y los resúmenes.
+    """
+    linea = lector.siguiente()
+    while m := CAMPO.fullmatch(linea):
+        clase.fields.append(campo(m[1], m[2]))
+        linea = lector.siguiente()
+    if not clase.fields:
+        raise _NoCanonico(lector.numero)
+
+    if m := INDEXES.fullmatch(linea):
+        clase.indexes = _indexes(lector, m[1])
+        linea = lector.siguiente()
+    if m := CACHE.fullmatch(linea):
+        clase.cache = Cache(int(m[1]))
+        linea = lector.siguiente()
+    if m := COLUMNAR.fullmatch(linea):
+        clase.columnar = _columnar(lector, m[1])
+        linea = lector.siguiente()
+    while m := RESUMEN.fullmatch(linea):
+        clase.resumenes.append(Resumen(m[1], m[2], _medidas(lector, m[3])))
+        linea = lector.siguiente()
+    if linea != "}":
+        raise _NoCanonico(lector.numero)
+    return clase
+
+
+def _separar(lector: _Lector, texto: str, separador: str, final: bool = False) -> list:
+    """Partes no vacías de `texto`; con `final`, admite el separador al final."""
+    partes = [p.strip() for p in texto.split(separador)]
+    if final and len(partes) > 1 and not partes[-1]:
+        partes.pop()
+    if not all(partes):
+        raise _NoCanonico(lector.numero)
+    return partes
+
+
+def _indexes(lector: _Lector, texto: str) -> Indexes:
+    """email unique; estado"""
+    indices = []
+    for parte in _separar(lector, texto, ";", final=True):
+        m = INDICE.fullmatch(parte)
+        if m is None:
+            raise _NoCanonico(lector.numero)
+        indices.append(Index(m[1], unique=bool(m[2])))
+    return Indexes(indices)
+
+
+def _columnar(lector: _Lector, texto: str) -> Columnar:
+    """total, numero by estado"""
+    campos, _, grupos = texto.partition(" by ")
+    columnar = Columnar(_separar(lector, campos, ","),
+                        _separar(lector, grupos, ",") if grupos.strip() else [])
+    if not all(re.fullmatch(ID, n) for n in columnar.fields + columnar.groups):
+        raise _NoCanonico(lector.numero)
+    return columnar
+
+
+def _medidas(lector: _Lector, texto: str) -> list:
+    """pedidos : count; ingresos : sum total"""
+    medidas = []
+    for parte in _separar(lector, texto, ";", final=True):
+        m = MEDIDA.fullmatch(parte)
+        if m is None:
+            raise _NoCanonico(lector.numero)
+        medidas.append(Medida(m[1], "count") if m[2] else Medida(m[1], "sum", m[3]))
+    return medidas
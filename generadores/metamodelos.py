@@ -0,0 +1,36 @@
+"""
+METAMODELOS — Carga perezosa y memoizada de las gramáticas textX
+=================================================================
+textX se importa sólo la primera vez que se pide un metamodelo, de
+modo que una ejecución incremental sin cambios no paga ni el import
+ni la compilación de las tres gramáticas.
+
+Cada metamodelo se construye una única vez por proceso, con clave
+(hash de la gramática, versión de textX); batch y watch reutilizan
+así el mismo metamodelo para todos los modelos que leen.
+
+Nota: los metamodelos de textX no son serializables (las clases de
+cada regla se crean dinámicamente y el metamodelo guarda un handle
+de archivo), por eso la cache vive en memoria y no en disco.
+"""
+
+import hashlib
+
+_METAMODELOS = {}
+
+
+def cargar_metamodelo(ruta_gramatica: str):
+    """Devuelve el metamodelo de `ruta_gramatica`, construyéndolo una sola vez."""
+    import textx
+
+    with open(ruta_gramatica, "rb") as f:
+        clave = (hashlib.sha256(f.read()).hexdigest(), textx.__version__)
+
+    if clave not in _METAMODELOS:
+        _METAMODELOS[clave] = textx.metamodel_from_file(ruta_gramatica)
+    return _METAMODELOS[clave]
+
+
+def leer_modelo(ruta_gramatica: str, ruta_modelo: str):
+    """Atajo: metamodelo (cacheado) + parseo del modelo."""
+    return cargar_metamodelo(ruta_gramatica).model_from_file(ruta_modelo)
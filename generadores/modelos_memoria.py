@@ -0,0 +1,204 @@
+"""
+MODELOS EN MEMORIA — Grafos de objetos PIM / PSM sin textX
+===========================================================
+Clases ligeras con los MISMOS atributos que textX construye a partir
+de pim_grammar.tx y psm_grammar.tx. Permiten encadenar las
+transformaciones M2M objeto → objeto sin escribir y volver a parsear
+los archivos .api intermedios:
+
+  requirements.req ──► PIMApi ──► PSMApi ──► schemas.py / main.py
+                      (memoria)  (memoria)
+
+Cada clase lleva el nombre de la regla de la gramática que representa.
+Las cláusulas que pim.api y psm_fastapi.api escriben igual se
+serializan aquí, una sola vez para los dos pasos.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+# ── PIM (pim_grammar.tx) ──────────────────────────────────────
+
+@dataclass
+class Field:
+    name: str
+    type: str
+
+
+@dataclass
+class Index:
+    field:  str
+    unique: bool = False
+
+
+@dataclass
+class Indexes:
+    indexes: List[Index] = field(default_factory=list)
+
+
+@dataclass
+class Cache:
+    size: int
+
+
+@dataclass
+class Columnar:
+    fields: List[str]
+    groups: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Medida:
+    name:  str
+    tipo:  str                   # count | sum
+    campo: Optional[str] = None  # campo sumado (sum)
+
+
+@dataclass
+class Resumen:
+    name:    str
+    group:   Optional[str] = None
+    medidas: List[Medida]  = field(default_factory=list)
+
+
+@dataclass
+class PIMModelClass:
+    name:      str
+    fields:    List[Field] = field(default_factory=list)
+    indexes:   Optional[Indexes]  = None
+    cache:     Optional[Cache]    = None
+    columnar:  Optional[Columnar] = None
+    resumenes: List[Resumen]      = field(default_factory=list)
+
+
+@dataclass
+class Path:
+    value: str
+
+
+@dataclass
+class Param:
+    name: str
+    type: str
+    list: bool = False
+
+
+@dataclass
+class ResponseType:
+    name: str
+    list: bool = False
+
+
+@dataclass
+class Pagination:
+    limit: int
+    max:   int
+
+
+@dataclass
+class PIMEndpoint:
+    method:     str
+    path:       Path
+    summary:    str
+    params:     List[Param]
+    response:   ResponseType
+    pagination: Optional[Pagination] = None
+
+
+@dataclass
+class PIMApi:
+    name:         str
+    modelClasses: List[PIMModelClass] = field(default_factory=list)
+    endpoints:    List[PIMEndpoint]   = field(default_factory=list)
+
+
+# ── PSM (psm_grammar.tx) ──────────────────────────────────────
+
+@dataclass
+class SchemaField:
+    name: str
+    type: str
+
+
+@dataclass
+class Schema:
+    name:      str
+    fields:    List[SchemaField] = field(default_factory=list)
+    indexes:   Optional[Indexes]  = None
+    cache:     Optional[Cache]    = None
+    columnar:  Optional[Columnar] = None
+    resumenes: List[Resumen]      = field(default_factory=list)
+
+
+@dataclass
+class PathParam:
+    name: str
+    type: str
+
+
+@dataclass
+class QueryParam:
+    name: str
+    type: str
+    list: bool = False
+
+
+@dataclass
+class Body:
+    type: str
+    list: bool = False
+
+
+@dataclass
+class Admission:
+    concurrency: int
+    queue:       int
+
+
+@dataclass
+class Route:
+    method:      str
+    path:        str
+    summary:     str
+    response:    ResponseType
+    status:      int
+    path_param:  Optional[PathParam]  = None
+    body:        Optional[Body]       = None
+    pagination:  Optional[Pagination] = None
+    query_param: Optional[QueryParam] = None
+    admission:   Optional[Admission]  = None
+
+
+@dataclass
+class PSMApi:
+    platform:      str
+    name:          str
+    storage:       str = "memory"
+    serialization: str = "pydantic"
+    metrics:       str = "none"
+    layout:        str = "single"
+    schemas:       List[Schema] = field(default_factory=list)
+    routes:        List[Route]  = field(default_factory=list)
+
+
+# ── Cláusulas comunes a pim_grammar.tx y psm_grammar.tx ───────
+
+def serializar_indexes(indexes) -> str:
+    """indexes { email unique; estado }"""
+    partes = [f"{i.field} unique" if i.unique else i.field for i in indexes.indexes]
+    return f"indexes {{ {'; '.join(partes)} }}"
+
+def serializar_columnar(columnar) -> str:
+    """columnar { total, numero by estado }"""
+    grupos = f" by {', '.join(columnar.groups)}" if columnar.groups else ""
+    return f"columnar {{ {', '.join(columnar.fields)}{grupos} }}"
+
+def serializar_resumen(resumen) -> str:
+    """resumen porEstado by estado { pedidos : count; ingresos : sum total }"""
+    grupo   = f" by {resumen.group}" if resumen.group else ""
+    medidas = "; ".join(
+        f"{m.name} : sum {m.campo}" if m.tipo == "sum" else f"{m.name} : count"
+        for m in resumen.medidas
+    )
+    return f"resumen {resumen.name}{grupo} {{ {medidas} }}"
@@ -7,51 +7,165 @@ Las operaciones abstractas (listar, obtener, crear...)
 se convierten en endpoints HTTP con método, ruta,
 parámetros y tipo de respuesta.
 
-operación  →  método HTTP  +  ruta
-─────────────────────────────────────
-listar     →  GET    /recursos
-obtener    →  GET    /recursos/{id}
-crear      →  POST   /recursos
-actualizar →  PUT    /recursos/{id}
-eliminar   →  DELETE /recursos/{id}
+operación     →  método HTTP  +  ruta
+────────────────────────────────────────────────────
+listar        →  GET    /recursos
+obtener       →  GET    /recursos/{id}
+crear         →  POST   /recursos
+actualizar    →  PUT    /recursos/{id}
+eliminar      →  DELETE /recursos/{id}
+crearLote     →  POST   /recursos/bulk        (body: List[Recurso])
+obtenerVarios →  GET    /recursos/bulk?ids=   (ids:  List[Number])
+exportar      →  GET    /recursos/export      (response: NDJSON)
+
+Las operaciones de lote responden List[Resultado]: un estado por
+elemento, de modo que un fallo parcial no invalida el resto del lote.
+`exportar` envía la colección entera como NDJSON, un objeto por línea,
+en trozos según se leen del almacén.
+
+Un recurso con `columnar { total, numero by estado }` añade además
+
+columnar      →  GET    /recursos/aggregate   (response: List[Agregado])
+
+con count, sum, min, max y mean de un campo Number, en total o
+agrupados por un campo Text; y cada `resumen porEstado by estado { … }`
+
+resumen       →  GET    /recursos/resumen/porEstado   (response: List[ResumenPorEstado])
+
+con contadores y sumas que el código generado mantiene en cada alta,
+modificación y baja, en vez de recalcularlos en cada lectura.
+
+construir_pim() devuelve el PIM como grafo de objetos en memoria
+(modelos_memoria.PIMApi); serializar_pim()/generar_pim() lo escriben
+además como texto en pim.api.
 """
 
-from textx import metamodel_from_file
+from metamodelos import cargar_metamodelo
+from modelos_memoria import (
+    PIMApi, PIMModelClass, PIMEndpoint, Field, Path, Param, ResponseType,
+    Pagination, Indexes, Index, Cache, Columnar, Resumen, Medida,
+    serializar_indexes, serializar_columnar, serializar_resumen,
+)
 import os
 
-# Mapa: operación abstracta → (método HTTP, tiene {id} en ruta)
+# Mapa: operación abstracta (en minúsculas) → (método HTTP, tiene {id} en ruta, respuesta)
 OPERATION_MAP = {
-    "listar":     ("GET",    False, "List[{name}]"),
-    "obtener":    ("GET",    True,  "{name}"),
-    "crear":      ("POST",   False, "{name}"),
-    "actualizar": ("PUT",    True,  "{name}"),
-    "eliminar":   ("DELETE", True,  "Message"),
+    "listar":        ("GET",    False, "List[{name}]"),
+    "obtener":       ("GET",    True,  "{name}"),
+    "crear":         ("POST",   False, "{name}"),
+    "actualizar":    ("PUT",    True,  "{name}"),
+    "eliminar":      ("DELETE", True,  "Message"),
+    "crearlote":     ("POST",   False, "List[Resultado]"),
+    "obtenervarios": ("GET",    False, "List[Resultado]"),
+    "exportar":      ("GET",    False, "NDJSON"),
 }
 
 SUMMARIES = {
-    "listar":     "Listar todos los {plural}",
-    "obtener":    "Obtener un {singular} por ID",
-    "crear":      "Crear un nuevo {singular}",
-    "actualizar": "Actualizar un {singular} existente",
-    "eliminar":   "Eliminar un {singular}",
+    "listar":        "Listar todos los {plural}",
+    "obtener":       "Obtener un {singular} por ID",
+    "crear":         "Crear un nuevo {singular}",
+    "actualizar":    "Actualizar un {singular} existente",
+    "eliminar":      "Eliminar un {singular}",
+    "crearlote":     "Crear varios {plural} en un lote",
+    "obtenervarios": "Obtener varios {plural} por ID",
+    "exportar":      "Exportar todos los {plural} (NDJSON)",
+}
+
+# Operaciones de lote y exportación: sub-ruta fija bajo el recurso
+SUFIJOS = {
+    "crearlote":     "/bulk",
+    "obtenervarios": "/bulk",
+    "exportar":      "/export",
 }
 
 def generate_model_class(lineas, model):    
-    for resource in model.resources:
-        lineas.append(f"    modelClass {resource.name} {{")
-        for field in resource.fields: 
+    for mc in model.modelClasses:
+        lineas.append(f"    modelClass {mc.name} {{")
+        for field in mc.fields: 
             lineas.append(f"        {field.name} : {field.type}")
+        if mc.indexes:
+            lineas.append(f"        {serializar_indexes(mc.indexes)}")
+        if mc.cache:
+            lineas.append(f"        cache : {mc.cache.size}")
+        if mc.columnar:
+            lineas.append(f"        {serializar_columnar(mc.columnar)}")
+        for resumen in mc.resumenes:
+            lineas.append(f"        {serializar_resumen(resumen)}")
         lineas.append(f"    }}")
         lineas.append("")
 
-def generar_pim(req_model, ruta_salida: str):
-    lineas = []
-    lineas.append("")
-    lineas.append(f"pim {req_model.name} {{")
-    lineas.append("")
-    
-    generate_model_class(lineas, req_model)
-    
+def construir_indexes(resource):
+    """Copia el bloque `indexes` validando que cada campo exista."""
+    if not resource.indexes:
+        return None
+    campos = {f.name for f in resource.fields}
+    for idx in resource.indexes.indexes:
+        if idx.field not in campos:
+            raise ValueError(
+                f"Índice sobre campo inexistente: {resource.name}.{idx.field}"
+            )
+    return Indexes([Index(i.field, bool(i.unique)) for i in resource.indexes.indexes])
+
+def construir_columnar(resource):
+    """Copia el bloque `columnar`: columnas Number, agrupación por campos Text."""
+    if not resource.columnar:
+        return None
+    tipos = {f.name: f.type for f in resource.fields}
+    for campo in resource.columnar.fields:
+        if tipos.get(campo) != "Number":
+            raise ValueError(
+                f"Columna no numérica: {resource.name}.{campo} (columnar admite campos Number)"
+            )
+    for campo in resource.columnar.groups:
+        if tipos.get(campo) != "Text":
+            raise ValueError(
+                f"Agrupación por campo no Text: {resource.name}.{campo}"
+            )
+    return Columnar(list(resource.columnar.fields), list(resource.columnar.groups))
+
+def construir_resumenes(resource) -> list:
+    """Copia los bloques `resumen`: agrupan por un campo Text y suman campos Number."""
+    tipos, resumenes = {f.name: f.type for f in resource.fields}, []
+    for resumen in resource.resumenes:
+        if any(r.name == resumen.name for r in resumenes):
+            raise ValueError(f"Resumen repetido: {resource.name}.{resumen.name}")
+        if resumen.group and tipos.get(resumen.group) != "Text":
+            raise ValueError(
+                f"Agrupación por campo no Text: {resource.name}.{resumen.group}"
+            )
+        nombres = [m.name for m in resumen.medidas]
+        if len(set(nombres)) < len(nombres) or "group" in nombres:
+            raise ValueError(
+                f"Medidas repetidas o reservadas (group) en el resumen {resource.name}.{resumen.name}"
+            )
+        for medida in resumen.medidas:
+            if medida.tipo == "sum" and tipos.get(medida.campo) != "Number":
+                raise ValueError(
+                    f"Suma de campo no numérico: {resource.name}.{medida.campo}"
+                )
+        resumenes.append(Resumen(
+            resumen.name, resumen.group or None,
+            [Medida(m.name, m.tipo, m.campo or None) for m in resumen.medidas],
+        ))
+    return resumenes
+
+def nombre_resumen(resumen) -> str:
+    """porEstado → ResumenPorEstado (step2 le antepone el recurso)."""
+    return f"Resumen{resumen.name[0].upper()}{resumen.name[1:]}"
+
+def construir_pim(req_model) -> PIMApi:
+    """M2M objeto → objeto: modelo de requisitos → grafo PIM en memoria."""
+    pim = PIMApi(name=req_model.name)
+
+    for resource in req_model.resources:
+        pim.modelClasses.append(PIMModelClass(
+            name=resource.name,
+            fields=[Field(f.name, f.type) for f in resource.fields],
+            indexes=construir_indexes(resource),
+            cache=Cache(resource.cache.size) if resource.cache else None,
+            columnar=construir_columnar(resource),
+            resumenes=construir_resumenes(resource),
+        ))
 
     for resource in req_model.resources:
         nombre     = resource.name                     # Producto
@@ -70,37 +184,107 @@ def generar_pim(req_model, ruta_salida: str):
             summary_tpl                = SUMMARIES[op_name]
 
             ruta     = f"{ruta_base}/{{id}}" if tiene_id else ruta_base
-            response = resp_tpl.format(name=nombre)
+            ruta    += SUFIJOS.get(op_name, "")
             summary  = summary_tpl.format(singular=singular, plural=plural)
+            if resp_tpl.startswith("List["):
+                response = ResponseType(name=resp_tpl[5:-1].format(name=nombre), list=True)
+            else:
+                response = ResponseType(name=resp_tpl.format(name=nombre))
 
             # Parámetros
             params = []
             if tiene_id:
-                params.append("id:Number")
+                params.append(Param("id", "Number"))
             if op_name in ("crear", "actualizar"):
-                params.append(f"body:{nombre}")
-            param_str = ", ".join(params) if params else "none"
+                params.append(Param("body", nombre))
+            if op_name == "crearlote":
+                params.append(Param("body", nombre, list=True))
+            if op_name == "obtenervarios":
+                params.append(Param("ids", "Number", list=True))
+
+            # Paginación: sólo aplica al listado
+            pagination = None
+            if op_name == "listar" and resource.pagination:
+                pagination = Pagination(resource.pagination.limit,
+                                        resource.pagination.max)
+
+            pim.endpoints.append(PIMEndpoint(
+                method=metodo, path=Path(ruta), summary=summary,
+                params=params, response=response, pagination=pagination,
+            ))
+
+        # Agregados sobre las columnas numéricas
+        if resource.columnar:
+            pim.endpoints.append(PIMEndpoint(
+                method="GET", path=Path(f"{ruta_base}/aggregate"),
+                summary=f"Agregados numéricos de {plural}",
+                params=[], response=ResponseType(name="Agregado", list=True),
+            ))
+
+        # Resúmenes mantenidos en cada escritura: sólo lectura
+        for resumen in resource.resumenes:
+            pim.endpoints.append(PIMEndpoint(
+                method="GET", path=Path(f"{ruta_base}/resumen/{resumen.name}"),
+                summary=f"Resumen {resumen.name} de {plural}",
+                params=[], response=ResponseType(name=nombre_resumen(resumen), list=True),
+            ))
+
+    return pim
 
-            lineas.append(f"    endpoint {metodo} {ruta} {{")
-            lineas.append(f'        summary  : "{summary}"')
-            lineas.append(f"        params   : {param_str}")
-            lineas.append(f"        response : {response}")
-            lineas.append(f"    }}")
-            lineas.append("")
+def serializar_endpoint(ep) -> list:
+    """Líneas de un endpoint en pim.api."""
+    param_str = ", ".join(
+        f"{p.name}:List[{p.type}]" if p.list else f"{p.name}:{p.type}"
+        for p in ep.params
+    ) or "none"
+    if ep.response.list:
+        response = f"List[{ep.response.name}]"
+    else:
+        response = ep.response.name
+
+    lineas = []
+    lineas.append(f"    endpoint {ep.method} {ep.path.value} {{")
+    lineas.append(f'        summary  : "{ep.summary}"')
+    lineas.append(f"        params   : {param_str}")
+    lineas.append(f"        response : {response}")
+    if ep.pagination:
+        lineas.append(f"        pagination : limit {ep.pagination.limit} max {ep.pagination.max}")
+    lineas.append(f"    }}")
+    lineas.append("")
+    return lineas
+
+def cabecera_pim(pim) -> list:
+    """Primeras líneas de pim.api."""
+    return ["", f"pim {pim.name} {{", ""]
+
+def serializar_pim(pim) -> str:
+    """M2T del grafo PIM al formato textual de pim.api."""
+    lineas = cabecera_pim(pim)
+    generate_model_class(lineas, pim)
+
+    for ep in pim.endpoints:
+        lineas += serializar_endpoint(ep)
 
     lineas.append("}")
+    return "\n".join(lineas)
 
+def escribir_pim(pim, ruta_salida: str):
     with open(ruta_salida, "w") as f:
-        f.write("\n".join(lineas))
+        f.write(serializar_pim(pim))
 
     print(f"\n  ✅ PIM generado → {os.path.basename(ruta_salida)}")
 
+def generar_pim(req_model, ruta_salida: str):
+    pim = construir_pim(req_model)
+    escribir_pim(pim, ruta_salida)
+    return pim
+
 
 if __name__ == "__main__":
     base    = os.path.dirname(os.path.abspath(__file__))
     modelos = os.path.join(base, "..", "modelos")
 
-    mm  = metamodel_from_file(os.path.join(modelos, "req_grammar.tx"))
+    mm  = cargar_metamodelo(os.path.join(modelos, "req_grammar.tx"))
 
     print("📋 Leyendo requisitos de API...")
     req = mm.model_from_file(os.path.join(modelos, "requirements.req"))
@@ -11,9 +11,17 @@ Los tipos abstractos del PIM se mapean a tipos Python/Pydantic:
 
 Los endpoints reciben status codes HTTP concretos y
 sus parámetros se clasifican como path_param o body.
+
+construir_psm() acepta tanto el PIM parseado por textX como el grafo
+en memoria de step1 y devuelve un modelos_memoria.PSMApi.
 """
 
-from textx import metamodel_from_file
+from lectura_rapida import leer_pim
+from modelos_memoria import (
+    PSMApi, Schema, SchemaField, Route, PathParam, QueryParam, Body, ResponseType,
+    Pagination, Indexes, Index, Cache, Columnar, Resumen, Medida, Admission,
+    serializar_indexes, serializar_columnar, serializar_resumen,
+)
 import re
 import os
 
@@ -28,6 +36,47 @@ PYTHON_TYPES = {
 # Campos numéricos enteros por nombre
 INTEGER_FIELDS = {"id", "stock", "edad", "numero"}
 
+# Plataformas destino soportadas por step3
+#   fastapi        → handlers `def` (threadpool de FastAPI)
+#   fastapi-async  → handlers `async def` sobre el event loop
+PLATAFORMAS = ("fastapi", "fastapi-async")
+
+# Almacenamiento del código generado
+#   memory → dicts en memoria del proceso
+#   sqlite → tablas SQLite (WAL) con pool de conexiones
+#   shared → lo mismo en memoria compartida (/dev/shm), común a todos los
+#            workers del host, con las versiones de la cache GET mapeadas
+ALMACENAMIENTOS = ("memory", "sqlite", "shared")
+
+# Serialización de schemas y respuestas
+#   pydantic → BaseModel + response_model (FastAPI revalida cada respuesta)
+#   fast     → dataclasses pydantic con slots y tipos estrictos; los
+#              handlers responden JSON directo, sin revalidar lo almacenado
+SERIALIZACIONES = ("pydantic", "fast")
+
+# Observabilidad de la app generada
+#   none       → sin instrumentar
+#   prometheus → middleware con latencia por ruta, peticiones por estado y
+#                tamaño de los almacenes, expuestos en GET /metrics
+METRICAS = ("none", "prometheus")
+
+# Control de admisión por ruta (`admission` en cada route del PSM, que
+# también puede fijarse a mano en psm_fastapi.api)
+#   none   → sin límites
+#   writes → cada POST/PUT/DELETE atiende a la vez ADMISION_CONCURRENCIA
+#            peticiones por worker y deja esperar ADMISION_COLA; las demás
+#            reciben 503 al momento, así las escrituras no se llevan el
+#            threadpool (ni la latencia) de las lecturas
+ADMISIONES = ("none", "writes")
+ADMISION_CONCURRENCIA = 4
+ADMISION_COLA         = 16
+
+# Disposición del código generado
+#   single  → un main.py y un schemas.py con todo
+#   routers → un APIRouter y un módulo de schemas por recurso; main.py
+#             sólo los monta (por defecto, con la primera petición)
+DISPOSICIONES = ("single", "routers")
+
 # Mapeo de respuesta abstracta → status code HTTP
 STATUS_CODES = {
     "POST": 201,
@@ -36,6 +85,10 @@ STATUS_CODES = {
     "DELETE": 200,
 }
 
+# Las operaciones de lote (respuesta List[Resultado]) informan un estado
+# por elemento → 207 Multi-Status
+STATUS_LOTE = 207
+
 def tipo_python(field_name: str, pim_type: str) -> str:
     if pim_type == "Number":
         return "int" if field_name.lower() in INTEGER_FIELDS else "float"
@@ -50,6 +103,10 @@ def nombre_param_especifico(path: str, resource_name: str) -> str:
     """Convierte {id} en {producto_id} según el recurso."""
     return f"{resource_name.lower()}_id"
 
+def parametros(ep) -> list:
+    """Params del endpoint: textX los anida en ParamList, el grafo en memoria no."""
+    return getattr(ep.params, "params", ep.params)
+
 def inferir_resource(path: str) -> str:
     """Extrae el nombre del recurso desde la ruta: /productos → Producto"""
     partes = path.strip("/").split("/")
@@ -87,22 +144,61 @@ SCHEMAS = {
 }
 
 def generate_schemas(model, lineas):
-    modelClasses = model.modelClasses
-    for mc in modelClasses:
-        lineas.append(f"    schema {mc.name} {{")
-        for field in mc.fields:
-            lineas.append(f"        {field.name} : {PYTHON_TYPES[field.type]}")
+    for schema in model.schemas:
+        lineas.append(f"    schema {schema.name} {{")
+        for field in schema.fields:
+            lineas.append(f"        {field.name} : {field.type}")
+        if schema.indexes:
+            lineas.append(f"        {serializar_indexes(schema.indexes)}")
+        if getattr(schema, "cache", None):
+            lineas.append(f"        cache : {schema.cache.size}")
+        if getattr(schema, "columnar", None):
+            lineas.append(f"        {serializar_columnar(schema.columnar)}")
+        for resumen in getattr(schema, "resumenes", []):
+            lineas.append(f"        {serializar_resumen(resumen)}")
         lineas.append("    }")
         lineas.append("")
             
 
-def generar_psm(pim_model, ruta_salida: str):
-    lineas = []
-    lineas.append("")
-    lineas.append(f"psm fastapi {pim_model.name} {{")
-    lineas.append("")
-    
-    generate_schemas(pim_model, lineas)
+def construir_psm(pim_model, plataforma: str = "fastapi",
+                  almacenamiento: str = "memory",
+                  serializacion: str = "pydantic", metricas: str = "none",
+                  disposicion: str = "single", admision: str = "none") -> PSMApi:
+    """M2M objeto → objeto: PIM (textX o en memoria) → grafo PSM."""
+    if plataforma not in PLATAFORMAS:
+        raise ValueError(f"Plataforma desconocida: {plataforma} (opciones: {PLATAFORMAS})")
+    if almacenamiento not in ALMACENAMIENTOS:
+        raise ValueError(f"Almacenamiento desconocido: {almacenamiento} "
+                         f"(opciones: {ALMACENAMIENTOS})")
+    if serializacion not in SERIALIZACIONES:
+        raise ValueError(f"Serialización desconocida: {serializacion} "
+                         f"(opciones: {SERIALIZACIONES})")
+    if metricas not in METRICAS:
+        raise ValueError(f"Métricas desconocidas: {metricas} (opciones: {METRICAS})")
+    if disposicion not in DISPOSICIONES:
+        raise ValueError(f"Disposición desconocida: {disposicion} (opciones: {DISPOSICIONES})")
+    if admision not in ADMISIONES:
+        raise ValueError(f"Admisión desconocida: {admision} (opciones: {ADMISIONES})")
+    psm = PSMApi(platform=plataforma, name=pim_model.name, storage=almacenamiento,
+                 serialization=serializacion, metrics=metricas, layout=disposicion)
+
+    for mc in pim_model.modelClasses:
+        indexes = None
+        if mc.indexes:
+            indexes = Indexes([Index(i.field, bool(i.unique)) for i in mc.indexes.indexes])
+        psm.schemas.append(Schema(
+            name=mc.name,
+            fields=[SchemaField(f.name, PYTHON_TYPES[f.type]) for f in mc.fields],
+            indexes=indexes,
+            cache=Cache(mc.cache.size) if mc.cache else None,
+            columnar=Columnar(list(mc.columnar.fields), list(mc.columnar.groups))
+                     if mc.columnar else None,
+            resumenes=[
+                Resumen(r.name, r.group or None,
+                        [Medida(m.name, m.tipo, m.campo or None) for m in r.medidas])
+                for r in mc.resumenes
+            ],
+        ))
 
     # Routes
     for ep in pim_model.endpoints:
@@ -111,6 +207,7 @@ def generar_psm(pim_model, ruta_salida: str):
         resource  = inferir_resource(path)
         path_param_orig = extraer_path_param(path)
         status    = STATUS_CODES.get(method, 200)
+        params    = {p.name: p for p in parametros(ep)}
 
         # Ruta con nombre de param específico
         if path_param_orig:
@@ -121,44 +218,135 @@ def generar_psm(pim_model, ruta_salida: str):
             param_name = None
 
         # Respuesta
-        if ep.response.list:
-            response_str = f"List[{ep.response.name}]"
+        if ep.response.name == "Resultado":
+            response = ResponseType(name=f"{resource}Resultado", list=True)
+            status   = STATUS_LOTE
+        elif ep.response.name == "Agregado":
+            response = ResponseType(name=f"{resource}Agregado", list=True)
+        elif "/resumen/" in path and ep.response.name.startswith("Resumen"):
+            response = ResponseType(name=f"{resource}{ep.response.name}", list=True)
+        elif ep.response.list:
+            response = ResponseType(name=ep.response.name, list=True)
         elif ep.response.name == "Message":
-            response_str = "dict"
+            response = ResponseType(name="dict")
         else:
-            response_str = ep.response.name
-
-        lineas.append(f'    route {method} "{ruta_psm}" {{')
-        lineas.append(f'        summary    : "{ep.summary}"')
+            response = ResponseType(name=ep.response.name)
 
-        if param_name:
-            lineas.append(f"        path_param : {param_name}:int")
+        # Lista de IDs en la query (obtenerVarios)
+        query_param = None
+        if "ids" in params:
+            query_param = QueryParam("ids", "int", list=bool(params["ids"].list))
 
-        # Body para POST y PUT
+        # Body para POST y PUT; una lista de objetos en las altas por lote
+        body = None
         if method in ("POST", "PUT"):
-            lineas.append(f"        body       : {resource}")
+            body = Body(resource, list=bool(getattr(params.get("body"), "list", False)))
 
-        lineas.append(f"        response   : {response_str}")
-        lineas.append(f"        status     : {status}")
-        lineas.append(f"    }}")
+        psm.routes.append(Route(
+            method=method, path=ruta_psm, summary=ep.summary,
+            response=response, status=status,
+            path_param=PathParam(param_name, "int") if param_name else None,
+            body=body,
+            pagination=Pagination(ep.pagination.limit, ep.pagination.max)
+                       if ep.pagination else None,
+            query_param=query_param,
+            admission=Admission(ADMISION_CONCURRENCIA, ADMISION_COLA)
+                      if admision == "writes" and method in ("POST", "PUT", "DELETE") else None,
+        ))
+
+    return psm
+
+
+def cabecera_psm(psm) -> list:
+    """Primeras líneas de psm_fastapi.api: plataforma, nombre y opciones."""
+    lineas = []
+    lineas.append("")
+    lineas.append(f"psm {psm.platform} {psm.name} {{")
+    lineas.append("")
+    if psm.storage != "memory":
+        lineas.append(f"    storage : {psm.storage}")
+    if psm.serialization != "pydantic":
+        lineas.append(f"    serialization : {psm.serialization}")
+    if psm.metrics != "none":
+        lineas.append(f"    metrics : {psm.metrics}")
+    if psm.layout != "single":
+        lineas.append(f"    layout : {psm.layout}")
+    if (psm.storage, psm.serialization, psm.metrics, psm.layout) != \
+            ("memory", "pydantic", "none", "single"):
         lineas.append("")
+    return lineas
+
+
+def serializar_route(route) -> list:
+    """Líneas de una route en psm_fastapi.api."""
+    if route.response.list:
+        response_str = f"List[{route.response.name}]"
+    else:
+        response_str = route.response.name
+
+    lineas = []
+    lineas.append(f'    route {route.method} "{route.path}" {{')
+    lineas.append(f'        summary    : "{route.summary}"')
+
+    if route.path_param:
+        lineas.append(f"        path_param : {route.path_param.name}:{route.path_param.type}")
+
+    query = getattr(route, "query_param", None)
+    if query:
+        tipo = f"List[{query.type}]" if query.list else query.type
+        lineas.append(f"        query_param: {query.name}:{tipo}")
+
+    if route.body:
+        tipo = f"List[{route.body.type}]" if route.body.list else route.body.type
+        lineas.append(f"        body       : {tipo}")
+
+    lineas.append(f"        response   : {response_str}")
+    lineas.append(f"        status     : {route.status}")
+    if route.pagination:
+        lineas.append(f"        pagination : limit {route.pagination.limit} max {route.pagination.max}")
+    admission = getattr(route, "admission", None)
+    if admission:
+        lineas.append(f"        admission  : concurrency {admission.concurrency} queue {admission.queue}")
+    lineas.append(f"    }}")
+    lineas.append("")
+    return lineas
+
+
+def serializar_psm(psm) -> str:
+    """M2T del grafo PSM al formato textual de psm_fastapi.api."""
+    lineas = cabecera_psm(psm)
+    generate_schemas(psm, lineas)
+
+    for route in psm.routes:
+        lineas += serializar_route(route)
 
     lineas.append("}")
+    return "\n".join(lineas)
 
+
+def escribir_psm(psm, ruta_salida: str):
     with open(ruta_salida, "w") as f:
-        f.write("\n".join(lineas))
+        f.write(serializar_psm(psm))
 
     print(f"  ✅ PSM FastAPI generado → {os.path.basename(ruta_salida)}")
 
 
+def generar_psm(pim_model, ruta_salida: str, plataforma: str = "fastapi",
+                almacenamiento: str = "memory", serializacion: str = "pydantic",
+                metricas: str = "none", disposicion: str = "single",
+                admision: str = "none"):
+    psm = construir_psm(pim_model, plataforma, almacenamiento, serializacion, metricas,
+                        disposicion, admision)
+    escribir_psm(psm, ruta_salida)
+    return psm
+
+
 if __name__ == "__main__":
     base    = os.path.dirname(os.path.abspath(__file__))
     modelos = os.path.join(base, "..", "modelos")
 
-    mm  = metamodel_from_file(os.path.join(modelos, "pim_grammar.tx"))
-
     print("📐 Leyendo PIM...")
-    pim = mm.model_from_file(os.path.join(modelos, "pim.api"))
+    pim = leer_pim(os.path.join(modelos, "pim_grammar.tx"), os.path.join(modelos, "pim.api"))
     print(f"   API: {pim.name} — {len(pim.endpoints)} endpoints")
 
     print("\n🔁 M2M: PIM → PSM FastAPI")
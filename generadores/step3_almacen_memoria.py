@@ -0,0 +1,556 @@
+"""
+PASO 3 — Almacén en memoria (`storage : memory`)
+=================================================
+Un dict por recurso con su contador de IDs, índices secundarios, orden
+de claves para paginar, columnas densas y resúmenes, y el cuerpo de
+cada handler sobre él. Con handlers síncronos (threadpool) cada recurso
+tiene un threading.Lock; con `fastapi-async` el event loop ya serializa
+las escrituras.
+"""
+
+from step3_comun import (
+    _es_agregado, _es_exportacion, _inferir_resource, _resumen_de, _tupla,
+)
+
+def _generar_almacen_memoria(psm_model, almacenes, paginados, asincrono,
+                             compartido: bool = True, por_recurso: bool = True) -> list:
+    """
+    Dicts en memoria del proceso + índices (por recurso) y helpers de
+    índices y serialización (compartidos).
+    """
+    indices   = [i for a in almacenes.values() for i in a["indices"]]
+    multiples = any(not i["unico"] for i in indices)
+    columnas  = any(a["columnar"] for a in almacenes.values())
+    resumenes = any(a["resumenes"] for a in almacenes.values())
+
+    lineas = []
+    # Antes que los almacenes, que instancian sus columnas y resúmenes
+    if columnas and compartido:
+        lineas += _generar_columnas()
+    if resumenes and compartido:
+        lineas += _generar_resumenes()
+    if por_recurso:
+        lineas.append("# Base de datos simulada en memoria: clave primaria → objeto")
+        lineas.append("# Las claves salen de un contador monotónico y no se reutilizan")
+        lineas.append("# al eliminar, así los IDs siguen siendo estables.")
+        if asincrono:
+            lineas.append("#")
+            lineas.append("# Handlers async: el almacén sólo se toca desde el event loop y")
+            lineas.append("# ninguna sección crítica contiene un `await`, así que cada alta,")
+            lineas.append("# modificación o baja (con sus índices) es atómica sin locks.")
+            lineas.append("# Los listados se serializan con pydantic-core; los grandes, en el")
+            lineas.append("# threadpool para no bloquear el loop.")
+        else:
+            lineas.append("#")
+            lineas.append("# Handlers síncronos: corren en el threadpool, así que cada alta,")
+            lineas.append("# modificación o baja (clave, índices y orden) se hace con el lock")
+            lineas.append("# de su recurso; las lecturas no lo toman.")
+
+        for schema in psm_model.schemas:
+            db_name = f"{schema.name.lower()}s_db"
+            lineas.append(f"{db_name}: Dict[int, {schema.name}] = {{}}")
+            lineas.append(f"{db_name}_ids = count()")
+            if not asincrono:
+                lineas.append(f"{db_name}_lock = threading.Lock()")
+            for idx in almacenes[schema.name]["indices"]:
+                destino = "int" if idx["unico"] else "Set[int]"
+                lineas.append(f"{db_name}_por_{idx['campo']}: Dict[{idx['tipo']}, {destino}] = {{}}")
+            if schema.name in paginados:
+                lineas.append(f"{db_name}_orden: List[int] = []   # claves ordenadas → cursor")
+                lineas.append(f"{db_name}_bajas = 0               # claves de _orden ya eliminadas")
+            columnar = almacenes[schema.name]["columnar"]
+            if columnar:
+                args = [_tupla(columnar["campos"])]
+                if columnar["grupos"]:
+                    args.append(_tupla(columnar["grupos"]))
+                lineas.append(f"{db_name}_columnas = _Columnas({', '.join(args)})")
+            for resumen in almacenes[schema.name]["resumenes"]:
+                grupo   = f'"{resumen["grupo"]}"' if resumen["grupo"] else "None"
+                medidas = [f'("{n}", ' + (f'"{c}")' if c else "None)") for n, c in resumen["medidas"]]
+                coma    = "," if len(medidas) == 1 else ""
+                lineas.append(f"{db_name}_resumen_{resumen['nombre']} = "
+                              f"_Resumen({grupo}, ({', '.join(medidas)}{coma}))")
+
+    if multiples and compartido:
+        lineas.append("")
+        lineas.append("")
+        lineas.append("# Índices secundarios no únicos: valor → conjunto de claves")
+        lineas.append("def _indexar(indice: dict, valor, pk: int):")
+        lineas.append("    indice.setdefault(valor, set()).add(pk)")
+        lineas.append("")
+        lineas.append("def _desindexar(indice: dict, valor, pk: int):")
+        lineas.append("    claves = indice.get(valor)")
+        lineas.append("    if claves is not None:")
+        lineas.append("        claves.discard(pk)")
+        lineas.append("        if not claves:")
+        lineas.append("            del indice[valor]")
+
+    if asincrono:
+        listados = [
+            r for r in almacenes
+            if not almacenes[r]["cache"] and any(_inferir_resource(rt.path) == r and rt.method == "GET"
+                   and not rt.path_param and not getattr(rt, "pagination", None)
+                   for rt in psm_model.routes)
+        ]
+        lineas.append("")
+        lineas.append("")
+        if compartido:
+            lineas.append("LISTA_EN_THREADPOOL = 1000   # a partir de aquí se serializa fuera del loop")
+            lineas.append("")
+        if por_recurso:
+            for r in listados:
+                lineas.append(f"_lista_{r.lower()} = TypeAdapter(List[{r}])")
+            lineas.append("")
+        if compartido:
+            lineas.append("async def _responder_lista(adaptador: TypeAdapter, items: list) -> Response:")
+            lineas.append("    if len(items) < LISTA_EN_THREADPOOL:")
+            lineas.append("        contenido = adaptador.dump_json(items)")
+            lineas.append("    else:")
+            lineas.append("        contenido = await run_in_threadpool(adaptador.dump_json, items)")
+            lineas.append('    return Response(contenido, media_type="application/json")')
+
+    return lineas
+
+
+def _generar_columnas() -> list:
+    """
+    _Columnas: los campos de `columnar` de un recurso en arrays densos,
+    mantenidos en cada alta, modificación y baja, y sus agregados.
+    """
+    lineas = []
+    lineas.append("# Columnas numéricas (recursos con `columnar`): cada campo en un")
+    lineas.append("# array('d') denso, 8 bytes por valor y sin un objeto por fila. NumPy")
+    lineas.append("# las lee sin copiarlas (np.frombuffer) y agrega en código vectorial;")
+    lineas.append("# sin NumPy los agregados se calculan en Python.")
+    lineas.append("try:")
+    lineas.append("    import numpy as np")
+    lineas.append("except ImportError:")
+    lineas.append("    np = None")
+    lineas.append("")
+    lineas.append("class _Columnas:")
+    lineas.append('    """')
+    lineas.append("    Fila i ↔ clave pks[i]. Una baja mueve la última fila a su hueco, así")
+    lineas.append("    las columnas siguen densas. Los campos de agrupación se guardan")
+    lineas.append("    codificados: un código entero por fila y el valor de cada código.")
+    lineas.append('    """')
+    lineas.append("    def __init__(self, campos: tuple, grupos: tuple = ()):")
+    lineas.append('        self.pks       = array("q")')
+    lineas.append("        self.posicion: Dict[int, int] = {}")
+    lineas.append('        self.valores   = {c: array("d") for c in campos}')
+    lineas.append('        self.codigos   = {g: array("q") for g in grupos}')
+    lineas.append("        self.codigo_de = {g: {} for g in grupos}   # valor → código")
+    lineas.append("        self.etiquetas = {g: [] for g in grupos}   # código → valor")
+    lineas.append("        self.lock      = threading.Lock()")
+    lineas.append("")
+    lineas.append("    def _codigo(self, grupo: str, valor) -> int:")
+    lineas.append("        codigos = self.codigo_de[grupo]")
+    lineas.append("        if valor not in codigos:")
+    lineas.append("            codigos[valor] = len(codigos)")
+    lineas.append("            self.etiquetas[grupo].append(valor)")
+    lineas.append("        return codigos[valor]")
+    lineas.append("")
+    lineas.append("    def alta(self, pk: int, item):")
+    lineas.append("        with self.lock:")
+    lineas.append("            self.posicion[pk] = len(self.pks)")
+    lineas.append("            self.pks.append(pk)")
+    lineas.append("            for campo, columna in self.valores.items():")
+    lineas.append("                columna.append(getattr(item, campo))")
+    lineas.append("            for grupo, columna in self.codigos.items():")
+    lineas.append("                columna.append(self._codigo(grupo, getattr(item, grupo)))")
+    lineas.append("")
+    lineas.append("    def modificacion(self, pk: int, item):")
+    lineas.append("        with self.lock:")
+    lineas.append("            i = self.posicion[pk]")
+    lineas.append("            for campo, columna in self.valores.items():")
+    lineas.append("                columna[i] = getattr(item, campo)")
+    lineas.append("            for grupo, columna in self.codigos.items():")
+    lineas.append("                columna[i] = self._codigo(grupo, getattr(item, grupo))")
+    lineas.append("")
+    lineas.append("    def baja(self, pk: int):")
+    lineas.append("        with self.lock:")
+    lineas.append("            i, ultima = self.posicion.pop(pk), len(self.pks) - 1")
+    lineas.append("            for columna in (self.pks, *self.valores.values(), *self.codigos.values()):")
+    lineas.append("                columna[i] = columna[ultima]")
+    lineas.append("                del columna[ultima]")
+    lineas.append("            if i != ultima:")
+    lineas.append("                self.posicion[self.pks[i]] = i")
+    lineas.append("")
+    lineas.append("    def agregar(self, campo: str, grupo: str = None) -> list:")
+    lineas.append('        """count, sum, min, max y mean de `campo`, en total o por `grupo`."""')
+    lineas.append("        with self.lock:")
+    lineas.append("            # Las vistas de NumPy se liberan antes de soltar el lock: un")
+    lineas.append("            # array con vistas vivas no puede crecer")
+    lineas.append("            calcular = self._agregar_numpy if np is not None else self._agregar_python")
+    lineas.append("            filas = calcular(campo, grupo)")
+    lineas.append('        return sorted(filas, key=lambda f: f["group"]) if grupo else filas')
+    lineas.append("")
+    lineas.append("    def _agregar_numpy(self, campo: str, grupo: str = None) -> list:")
+    lineas.append("        valores = np.frombuffer(self.valores[campo], dtype=np.float64)")
+    lineas.append("        if grupo is None:")
+    lineas.append("            if not len(valores):")
+    lineas.append("                return [self._fila(None, 0, 0.0, None, None)]")
+    lineas.append("            return [self._fila(None, len(valores), float(valores.sum()),")
+    lineas.append("                               float(valores.min()), float(valores.max()))]")
+    lineas.append("        codigos = np.frombuffer(self.codigos[grupo], dtype=np.int64)")
+    lineas.append("        if not len(codigos):")
+    lineas.append("            return []")
+    lineas.append("        etiquetas = self.etiquetas[grupo]")
+    lineas.append("        if len(etiquetas) <= np.iinfo(np.int16).max:")
+    lineas.append("            codigos = codigos.astype(np.int16)   # argsort estable → radix sort")
+    lineas.append("        # Filas ordenadas por código: cada grupo es un tramo contiguo")
+    lineas.append('        orden     = np.argsort(codigos, kind="stable")')
+    lineas.append("        ordenados = codigos[orden]")
+    lineas.append("        inicios   = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])")
+    lineas.append("        tramos    = valores[orden]")
+    lineas.append("        return [")
+    lineas.append("            self._fila(etiquetas[c], n, s, mi, ma)")
+    lineas.append("            for c, n, s, mi, ma in zip(")
+    lineas.append("                ordenados[inicios].tolist(),")
+    lineas.append("                np.diff(np.r_[inicios, len(ordenados)]).tolist(),")
+    lineas.append("                np.add.reduceat(tramos, inicios).tolist(),")
+    lineas.append("                np.minimum.reduceat(tramos, inicios).tolist(),")
+    lineas.append("                np.maximum.reduceat(tramos, inicios).tolist(),")
+    lineas.append("            )")
+    lineas.append("        ]")
+    lineas.append("")
+    lineas.append("    def _agregar_python(self, campo: str, grupo: str = None) -> list:")
+    lineas.append("        valores = self.valores[campo]")
+    lineas.append("        if grupo is None:")
+    lineas.append("            if not valores:")
+    lineas.append("                return [self._fila(None, 0, 0.0, None, None)]")
+    lineas.append("            return [self._fila(None, len(valores), sum(valores), min(valores), max(valores))]")
+    lineas.append("        tramos = {}")
+    lineas.append("        for codigo, valor in zip(self.codigos[grupo], valores):")
+    lineas.append("            tramos.setdefault(codigo, []).append(valor)")
+    lineas.append("        etiquetas = self.etiquetas[grupo]")
+    lineas.append("        return [self._fila(etiquetas[c], len(v), sum(v), min(v), max(v))")
+    lineas.append("                for c, v in tramos.items()]")
+    lineas.append("")
+    lineas.append("    @staticmethod")
+    lineas.append("    def _fila(grupo, n: int, suma: float, minimo, maximo) -> dict:")
+    lineas.append('        return {"group": grupo, "count": n, "sum": suma, "min": minimo,')
+    lineas.append('                "max": maximo, "mean": suma / n if n else None}')
+    lineas.append("")
+    lineas.append("")
+    return lineas
+
+def _generar_resumenes() -> list:
+    """_Resumen: contadores y sumas por grupo de un `resumen`, al día en cada escritura."""
+    lineas = []
+    lineas.append("# Resúmenes (`resumen` en requirements.req): contadores y sumas por")
+    lineas.append("# grupo que cada alta, modificación y baja actualiza en O(1); leerlos")
+    lineas.append("# no recorre el almacén.")
+    lineas.append("class _Resumen:")
+    lineas.append('    """')
+    lineas.append("    valor del grupo → [elementos, medida, ...]. Una medida `count` suma")
+    lineas.append("    1 por elemento y una `sum`, el valor de su campo. Un grupo se borra")
+    lineas.append("    con su último elemento, así sus sumas no arrastran redondeos.")
+    lineas.append('    """')
+    lineas.append("    def __init__(self, grupo: str, medidas: tuple):")
+    lineas.append("        self.grupo   = grupo                               # None → un solo grupo")
+    lineas.append("        self.nombres = tuple(nombre for nombre, _ in medidas)")
+    lineas.append("        self.campos  = tuple(campo for _, campo in medidas)   # None → count")
+    lineas.append("        self.filas: Dict = {}")
+    lineas.append("        self.lock    = threading.Lock()")
+    lineas.append("")
+    lineas.append("    def _vacia(self) -> list:")
+    lineas.append("        return [0] + [0 if campo is None else 0.0 for campo in self.campos]")
+    lineas.append("")
+    lineas.append("    def _sumar(self, item, signo: int):")
+    lineas.append("        clave = getattr(item, self.grupo) if self.grupo else None")
+    lineas.append("        fila  = self.filas.get(clave)")
+    lineas.append("        if fila is None:")
+    lineas.append("            fila = self.filas[clave] = self._vacia()")
+    lineas.append("        fila[0] += signo")
+    lineas.append("        if not fila[0]:")
+    lineas.append("            del self.filas[clave]")
+    lineas.append("            return")
+    lineas.append("        for i, campo in enumerate(self.campos, 1):")
+    lineas.append("            fila[i] += signo * getattr(item, campo) if campo else signo")
+    lineas.append("")
+    lineas.append("    def alta(self, item):")
+    lineas.append("        with self.lock:")
+    lineas.append("            self._sumar(item, 1)")
+    lineas.append("")
+    lineas.append("    def modificacion(self, antes, despues):")
+    lineas.append("        with self.lock:")
+    lineas.append("            self._sumar(antes, -1)")
+    lineas.append("            self._sumar(despues, 1)")
+    lineas.append("")
+    lineas.append("    def baja(self, item):")
+    lineas.append("        with self.lock:")
+    lineas.append("            self._sumar(item, -1)")
+    lineas.append("")
+    lineas.append("    def consultar(self) -> list:")
+    lineas.append("        with self.lock:")
+    lineas.append("            if self.grupo is None:")
+    lineas.append("                return [dict(zip(self.nombres, self.filas.get(None, self._vacia())[1:]))]")
+    lineas.append('            return [{"group": clave, **dict(zip(self.nombres, fila[1:]))}')
+    lineas.append("                    for clave, fila in sorted(self.filas.items())]")
+    lineas.append("")
+    lineas.append("")
+    return lineas
+
+def _generar_cuerpo(method: str, resource: str, db_name: str, route, almacen=None,
+                    asincrono: bool = False) -> list:
+    """
+    Genera un cuerpo stub realista para cada tipo de endpoint.
+
+    `almacen` describe las estructuras auxiliares del recurso
+    (ver _describir_almacen). Con `asincrono` los listados completos se
+    devuelven ya serializados con _responder_lista; sin él, las escrituras
+    se hacen con el lock del recurso.
+    """
+    almacen   = almacen or {}
+    clave     = almacen.get("clave")
+    indices   = almacen.get("indices", [])
+    orden     = f"{db_name}_orden" if almacen.get("orden") else None
+    columnas  = f"{db_name}_columnas" if almacen.get("columnar") else None
+    resumenes = [f"{db_name}_resumen_{r['nombre']}" for r in almacen.get("resumenes", [])]
+    nombre_id = route.path_param.name if route.path_param else None
+    no_existe = [
+        f'        raise HTTPException(status_code=404, detail="{resource} no encontrado")',
+    ]
+    query      = getattr(route, "query_param", None)
+    demasiados = [
+        f'        raise HTTPException(status_code=413, detail=f"Máximo {{LOTE_MAX}} elementos por lote")',
+    ]
+
+    def nombre_indice(idx):
+        return f"{db_name}_por_{idx['campo']}"
+
+    def alta(objeto: str, pk: str) -> list:
+        lineas = []
+        for idx in indices:
+            valor = f"{objeto}.{idx['campo']}"
+            if idx["unico"]:
+                lineas.append(f"    {nombre_indice(idx)}[{valor}] = {pk}")
+            else:
+                lineas.append(f"    _indexar({nombre_indice(idx)}, {valor}, {pk})")
+        return lineas
+
+    def baja(objeto: str, pk: str) -> list:
+        lineas = []
+        for idx in indices:
+            valor = f"{objeto}.{idx['campo']}"
+            if idx["unico"] and idx["conflicto"]:
+                lineas.append(f"    del {nombre_indice(idx)}[{valor}]")
+            elif idx["unico"]:
+                lineas.append(f"    {nombre_indice(idx)}.pop({valor}, None)")
+            else:
+                lineas.append(f"    _desindexar({nombre_indice(idx)}, {valor}, {pk})")
+        return lineas
+
+    def devolver_lista(expr: str, sangria: str = "    ") -> list:
+        if asincrono:
+            return [
+                f"{sangria}items = {expr}",
+                f"{sangria}return await _responder_lista(_lista_{resource.lower()}, items)",
+            ]
+        return [f"{sangria}return {expr}"]
+
+    def exclusivo(lineas: list, sangria: str = "    ") -> list:
+        # Sin await de por medio, el event loop ya serializa las escrituras
+        if asincrono:
+            return lineas
+        return [f"{sangria}with {db_name}_lock:"] + ["    " + l for l in lineas]
+
+    def sin_duplicados(pk: str = None) -> list:
+        lineas = []
+        for idx in indices:
+            if not idx["conflicto"]:
+                continue
+            valor = f"data.{idx['campo']}"
+            if pk is None:
+                lineas.append(f"    if {valor} in {nombre_indice(idx)}:")
+            else:
+                lineas.append(f"    if {nombre_indice(idx)}.get({valor}, {pk}) != {pk}:")
+            lineas.append(
+                f'        raise HTTPException(status_code=409, '
+                f'detail="{resource} con {idx["campo"]} duplicado")'
+            )
+        return lineas
+
+    if getattr(route.body, "list", False):
+        # Alta por lote: una pasada con un solo bloqueo para todo el lote;
+        # un duplicado sólo invalida su elemento
+        lineas = [f"    if len(data) > LOTE_MAX:"] + demasiados + [f"    resultados = []"]
+        escritura = [f"    for item in data:"]
+        for idx in indices:
+            if idx["conflicto"]:
+                escritura += [
+                    f"        if item.{idx['campo']} in {nombre_indice(idx)}:",
+                    f'            resultados.append({{"status": 409, '
+                    f'"detail": "{resource} con {idx["campo"]} duplicado"}})',
+                    f"            continue",
+                ]
+        escritura += [
+            f"        pk = next({db_name}_ids)",
+            f"        {db_name}[pk] = item",
+        ] + ["    " + l for l in alta("item", "pk")]
+        if orden:
+            escritura.append(f"        {orden}.append(pk)")
+        if columnas:
+            escritura.append(f"        {columnas}.alta(pk, item)")
+        escritura += [f"        {r}.alta(item)" for r in resumenes]
+        escritura.append(
+            f'        resultados.append({{"status": 201, '
+            f'"id": {f"item.{clave}" if clave else "pk"}, "item": item}})'
+        )
+        return lineas + exclusivo(escritura) + [f"    return resultados"]
+
+    if _es_agregado(route):
+        # Agregados sobre las columnas, sin recorrer los objetos
+        grupo = ", group_by" if almacen["columnar"]["grupos"] else ""
+        return [f"    return {columnas}.agregar(field{grupo})"]
+
+    resumen = _resumen_de(route, almacen)
+    if resumen:
+        # Contadores ya calculados: no recorre el almacén
+        return [f"    return {db_name}_resumen_{resumen['nombre']}.consultar()"]
+
+    if _es_exportacion(route):
+        # Se copia la lista de claves, no los objetos: cada trozo se
+        # serializa al enviarse y lo borrado entretanto se omite
+        return [
+            f"    def trozos():",
+            f"        claves = list({db_name})",
+            f"        for inicio in range(0, len(claves), EXPORTAR_BLOQUE):",
+            f"            items = map({db_name}.get, claves[inicio:inicio + EXPORTAR_BLOQUE])",
+            f'            yield b"".join(to_json(item) + b"\\n" for item in items if item is not None)',
+            f"    return _exportar(request, trozos())",
+        ]
+
+    if query:
+        # Lectura múltiple: un acceso O(1) por ID, en el orden pedido
+        if clave:
+            buscar = f"{db_name}.get({db_name}_por_{clave}.get(i))"
+        else:
+            buscar = f"{db_name}.get(i)"
+        return [f"    if len({query.name}) > LOTE_MAX:"] + demasiados + [
+            f"    resultados = []",
+            f"    for i in {query.name}:",
+            f"        item = {buscar}",
+            f"        if item is None:",
+            f'            resultados.append({{"status": 404, "id": i, '
+            f'"detail": "{resource} no encontrado"}})',
+            f"        else:",
+            f'            resultados.append({{"status": 200, "id": i, "item": item}})',
+            f"    return resultados",
+        ]
+
+    if method == "get" and not nombre_id:
+        # Filtros por índice: intersección de los conjuntos de claves
+        filtros = []
+        for idx in indices:
+            if not idx["filtro"]:
+                continue
+            campo = idx["campo"]
+            if idx["unico"]:
+                conjunto = f"{{{nombre_indice(idx)}[{campo}]}} if {campo} in {nombre_indice(idx)} else set()"
+            else:
+                conjunto = f"{nombre_indice(idx)}.get({campo}, set())"
+            filtros += [
+                f"    if {campo} is not None:",
+                f"        conjuntos.append({conjunto})",
+            ]
+        if filtros:
+            filtros = [f"    conjuntos = []"] + filtros
+
+        if getattr(route, "pagination", None):
+            # Keyset sobre la clave primaria: O(log n + limit) por página. Las
+            # bajas pendientes de compactar se saltan; la página se completa
+            # con las claves siguientes
+            seleccion = [f"    orden = {orden}"]
+            if filtros:
+                seleccion = filtros + [
+                    f"    orden = sorted(set.intersection(*conjuntos)) if conjuntos else {orden}",
+                ]
+            return seleccion + [
+                f"    i = bisect_right(orden, cursor) if cursor is not None else 0",
+                f"    items = []",
+                f"    while len(items) < limit and i < len(orden):",
+                f"        claves = orden[i:i + limit - len(items)]",
+                f"        i += len(claves)",
+                f"        items += [item for item in map({db_name}.get, claves) if item is not None]",
+                f"    ultimo = orden[i - 1] if items else None",
+                f"    while i < len(orden) and orden[i] not in {db_name}:",
+                f"        i += 1",
+                f"    return {{",
+                f'        "items": items,',
+                f'        "next_cursor": ultimo if i < len(orden) else None,',
+                f"    }}",
+            ]
+
+        if filtros:
+            return filtros + [
+                f"    if conjuntos:",
+            ] + devolver_lista(
+                f"[{db_name}[k] for k in sorted(set.intersection(*conjuntos))]", "        "
+            ) + devolver_lista(f"list({db_name}.values())")
+        return devolver_lista(f"list({db_name}.values())")
+
+    # Con clave natural, el {id} de la ruta se traduce a la clave primaria
+    resolver, pk = [], nombre_id
+    if nombre_id and clave:
+        resolver, pk = [f"    pk = {db_name}_por_{clave}.get({nombre_id})"], "pk"
+
+    if method == "get" and nombre_id:
+        return resolver + [
+            f"    item = {db_name}.get({pk})",
+            f"    if item is None:",
+        ] + no_existe + [
+            f"    return item",
+        ]
+
+    if method == "post":
+        # El 409 y la escritura, en la misma sección crítica
+        lineas = sin_duplicados() + [
+            f"    pk = next({db_name}_ids)",
+            f"    {db_name}[pk] = data",
+        ] + alta("data", "pk")
+        if orden:
+            # Clave y append en la misma sección crítica → sigue ordenada
+            lineas.append(f"    {orden}.append(pk)")
+        if columnas:
+            lineas.append(f"    {columnas}.alta(pk, data)")
+        lineas += [f"    {r}.alta(data)" for r in resumenes]
+        return exclusivo(lineas) + [f"    return data"]
+
+    if method == "put":
+        # La comprobación va dentro: una baja concurrente no se resucita
+        lineas = resolver + [
+            f"    if {pk} not in {db_name}:",
+        ] + no_existe + sin_duplicados(pk)
+        if indices:
+            lineas += baja(f"{db_name}[{pk}]", pk) + alta("data", pk)
+        if columnas:
+            lineas.append(f"    {columnas}.modificacion({pk}, data)")
+        lineas += [f"    {r}.modificacion({db_name}[{pk}], data)" for r in resumenes]
+        lineas.append(f"    {db_name}[{pk}] = data")
+        return exclusivo(lineas) + [f"    return data"]
+
+    if method == "delete":
+        lineas = resolver + [
+            f"    item = {db_name}.pop({pk}, None)",
+            f"    if item is None:",
+        ] + no_existe + baja("item", pk)
+        if orden:
+            # La clave se queda en el orden hasta que las bajas pasan de la
+            # mitad; entonces se compacta en una lista nueva (las lecturas en
+            # curso siguen con la suya): O(1) amortizado por baja
+            lineas += [
+                f"    {db_name}_bajas += 1",
+                f"    if 2 * {db_name}_bajas > len({orden}):",
+                f"        {orden} = [k for k in {orden} if k in {db_name}]",
+                f"        {db_name}_bajas = 0",
+            ]
+        if columnas:
+            lineas.append(f"    {columnas}.baja({pk})")
+        lineas += [f"    {r}.baja(item)" for r in resumenes]
+        globales = [f"    global {orden}, {db_name}_bajas"] if orden else []
+        return globales + exclusivo(lineas) + [
+            f'    return {{"message": "{resource} eliminado correctamente"}}',
+        ]
+
+    return ["    pass"]
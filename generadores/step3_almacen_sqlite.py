@@ -0,0 +1,463 @@
+"""
+PASO 3 — Almacén SQLite (`storage : sqlite` y `storage : shared`)
+==================================================================
+Una tabla por recurso (índices, columnas y resúmenes mantenidos con
+triggers), el pool de conexiones y el cuerpo de cada handler en SQL.
+
+Con `storage : shared` todos los workers de un host (`uvicorn --workers N`)
+comparten una base SQLite en memoria compartida (/dev/shm): el índice
+WAL y las páginas se leen por mmap y la escritura se serializa con los
+bloqueos de SQLite. Las caches GET de cada worker se validan contra un
+contador por recurso mapeado en memoria, así un GET cacheado no sale
+del proceso y ve las escrituras de los demás workers; el resto de
+lecturas consulta la base compartida.
+
+Sin <API>_DB la base se llama como la API más una huella del directorio
+de la app, así dos salidas con el mismo nombre de API no comparten
+datos, y el primer worker que arranca la vacía.
+"""
+
+from step3_comun import (
+    _entre_procesos, _es_agregado, _es_exportacion, _resumen_de, _tupla,
+)
+
+# Tipos Python del PSM → afinidad de columna SQLite
+TIPOS_SQLITE = {
+    "str":      "TEXT",
+    "int":      "INTEGER",
+    "float":    "REAL",
+    "bool":     "BOOLEAN",    # 0/1, convertido de vuelta a bool al leer
+    "datetime": "TEXT",       # ISO 8601, tal cual lo serializa Pydantic
+}
+
+def _condicion_clave(tabla: str, clave: str = None) -> str:
+    """WHERE que localiza la fila del {id} de la ruta."""
+    if clave:
+        # Igual que en memoria: ante duplicados gana el alta más reciente
+        return f"pk = (SELECT pk FROM {tabla} WHERE {clave} = ? ORDER BY pk DESC LIMIT 1)"
+    return "pk = ?"
+
+def _generar_almacen_sqlite(psm_model, almacenes, asincrono, rapido: bool = False,
+                            compartido: bool = True, por_recurso: bool = True) -> list:
+    """
+    DDL y pool de conexiones (compartidos) y sentencias SQL, una constante
+    por operación (por recurso).
+    """
+    lineas = []
+    if compartido:
+        lineas += _infra_sqlite(psm_model, almacenes, asincrono, rapido)
+    if not por_recurso:
+        return lineas
+
+    for schema in psm_model.schemas:
+        tabla    = f"{schema.name.lower()}s"
+        const    = tabla.upper()
+        campos   = [f.name for f in schema.fields]
+        donde    = _condicion_clave(tabla, almacenes[schema.name]["clave"])
+        lineas.append("")
+        tupla    = ", ".join(f'"{c}"' for c in campos) + ("," if len(campos) == 1 else "")
+        lineas.append(f"{const}_COLUMNAS = ({tupla})")
+        lineas.append(f'SQL_{const}_SELECT     = "SELECT pk, {", ".join(campos)} FROM {tabla}"')
+        lineas.append(f'SQL_{const}_LISTAR     = SQL_{const}_SELECT + " ORDER BY pk"')
+        lineas.append(f'SQL_{const}_OBTENER    = SQL_{const}_SELECT + " WHERE {donde}"')
+        lineas.append(f'SQL_{const}_INSERTAR   = "INSERT INTO {tabla} ({", ".join(campos)}) '
+                      f'VALUES ({", ".join("?" for _ in campos)})"')
+        lineas.append(f'SQL_{const}_ACTUALIZAR = "UPDATE {tabla} SET '
+                      f'{", ".join(f"{c} = ?" for c in campos)} WHERE {donde}"')
+        lineas.append(f'SQL_{const}_ELIMINAR   = "DELETE FROM {tabla} WHERE {donde}"')
+        if almacenes[schema.name].get("lote"):
+            columna = almacenes[schema.name]["clave"] or "pk"
+            lineas.append(f'SQL_{const}_VARIOS     = SQL_{const}_SELECT + '
+                          f'" WHERE {columna} IN ({{marcas}}) ORDER BY pk"')
+        columnar = almacenes[schema.name]["columnar"]
+        if columnar:
+            # Agregados: los calcula SQLite, una sentencia por (campo, grupo)
+            lineas.append(f"SQL_{const}_AGREGAR = {{")
+            for campo in columnar["campos"]:
+                funciones = ", ".join(f"{f}({campo})" for f in ("COUNT", "TOTAL", "MIN", "MAX", "AVG"))
+                lineas.append(f'    ("{campo}", None): "SELECT NULL, {funciones} FROM {tabla}",')
+                for grupo in columnar["grupos"]:
+                    lineas.append(f'    ("{campo}", "{grupo}"): "SELECT {grupo}, {funciones} '
+                                  f'FROM {tabla} GROUP BY {grupo} ORDER BY {grupo}",')
+            lineas.append("}")
+        for resumen in almacenes[schema.name]["resumenes"]:
+            # Lee la tabla que mantienen los triggers: una fila por grupo
+            tabla_r  = f"{tabla}_resumen_{resumen['nombre'].lower()}"
+            medidas  = [f"m_{n}" if c else "n" for n, c in resumen["medidas"]]
+            if resumen["grupo"]:
+                sql = f"SELECT grupo, {', '.join(medidas)} FROM {tabla_r} ORDER BY grupo"
+            else:
+                sql = "SELECT " + ", ".join(f"TOTAL({m})" if m != "n" else "COALESCE(SUM(n), 0)"
+                                            for m in medidas) + f" FROM {tabla_r}"
+            lineas.append(f'SQL_{const}_RESUMEN_{resumen["nombre"].upper()} = "{sql}"')
+
+    return lineas
+
+def _infra_sqlite(psm_model, almacenes, asincrono, rapido: bool) -> list:
+    """DDL de todas las tablas, pool de conexiones y conversión fila ↔ modelo."""
+    prefijo  = psm_model.name.upper()
+    procesos = _entre_procesos(psm_model)
+
+    lineas = []
+    lineas.append("# Persistencia SQLite en modo WAL con un pool de conexiones.")
+    lineas.append("# Cada sentencia es una constante: sqlite3 la prepara una vez por")
+    lineas.append("# conexión y la reutiliza desde su cache de sentencias.")
+    if asincrono:
+        lineas.append("# Los handlers async ejecutan cada consulta en el threadpool.")
+    if procesos:
+        lineas.append("# La base es común a todos los workers del host (uvicorn --workers N)")
+        lineas.append("# y vive por defecto en memoria compartida: SQLite serializa las")
+        lineas.append("# escrituras con sus bloqueos y cada conexión lee las páginas por mmap.")
+        lineas.append(f"# Sin {prefijo}_DB el nombre sale del directorio de la app (otra")
+        lineas.append("# app con el mismo nombre no la comparte) y el primer worker que")
+        lineas.append("# arranca la vacía, como un almacén en memoria; con la variable se")
+        lineas.append("# usa esa base tal cual.")
+        lineas.append('DIR_COMPARTIDO = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()')
+        lineas.append("DIR_APP   = os.path.dirname(os.path.abspath(__file__))")
+        lineas.append(f'DB_PROPIA = "{prefijo}_DB" not in os.environ')
+        lineas.append(f'DB_PATH   = os.environ.get("{prefijo}_DB", os.path.join(')
+        lineas.append(f'    DIR_COMPARTIDO, f"{psm_model.name.lower()}-'
+                      '{hashlib.sha1(DIR_APP.encode()).hexdigest()[:12]}.db"))')
+        lineas.append(f'MMAP_SIZE = int(os.environ.get("{prefijo}_DB_MMAP", str(256 * 2**20)))')
+    else:
+        lineas.append(f'DB_PATH   = os.environ.get("{prefijo}_DB", "{psm_model.name.lower()}.db")')
+    lineas.append(f'POOL_SIZE = int(os.environ.get("{prefijo}_DB_POOL", "8"))')
+    lineas.append("")
+    lineas.append("DDL = [")
+    for schema in psm_model.schemas:
+        tabla    = f"{schema.name.lower()}s"
+        columnas = ", ".join(
+            f"{f.name} {TIPOS_SQLITE.get(f.type, 'TEXT')} NOT NULL" for f in schema.fields
+        )
+        lineas.append(f'    "CREATE TABLE IF NOT EXISTS {tabla} '
+                      f'(pk INTEGER PRIMARY KEY AUTOINCREMENT, {columnas})",')
+        for idx in almacenes[schema.name]["indices"]:
+            unico = "UNIQUE " if idx["conflicto"] else ""
+            lineas.append(f'    "CREATE {unico}INDEX IF NOT EXISTS ix_{tabla}_{idx["campo"]} '
+                          f'ON {tabla} ({idx["campo"]})",')
+        columnar = almacenes[schema.name]["columnar"]
+        for grupo in columnar["grupos"] if columnar else []:
+            # Índice cubriente: GROUP BY lo recorre en orden, sin ordenar ni leer la tabla
+            lineas.append(f'    "CREATE INDEX IF NOT EXISTS ix_{tabla}_{grupo}_columnas '
+                          f'ON {tabla} ({", ".join([grupo] + columnar["campos"])})",')
+        for resumen in almacenes[schema.name]["resumenes"]:
+            lineas += _ddl_resumen(tabla, resumen)
+    lineas.append("]")
+    lineas.append("")
+    lineas.append('sqlite3.register_converter("BOOLEAN", lambda v: v != b"0")')
+    lineas.append("")
+    lineas.append("def _nueva_conexion() -> sqlite3.Connection:")
+    lineas.append("    con = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256,")
+    lineas.append("                          detect_types=sqlite3.PARSE_DECLTYPES)")
+    lineas.append('    con.execute("PRAGMA journal_mode=WAL")')
+    lineas.append('    con.execute("PRAGMA synchronous=NORMAL")')
+    if procesos:
+        lineas.append('    con.execute(f"PRAGMA mmap_size={MMAP_SIZE}")')
+    lineas.append("    return con")
+    lineas.append("")
+    lineas.append("_pool: queue.LifoQueue = queue.LifoQueue()")
+    lineas.append("")
+    if procesos:
+        lineas += _vaciado_compartido()
+    lineas.append("def _iniciar_db():")
+    lineas.append("    con = _nueva_conexion()")
+    lineas.append("    with con:")
+    lineas.append("        for sentencia in DDL:")
+    lineas.append("            con.execute(sentencia)")
+    lineas.append("    _pool.put(con)")
+    lineas.append("    for _ in range(POOL_SIZE - 1):")
+    lineas.append("        _pool.put(_nueva_conexion())")
+    lineas.append("")
+    if procesos:
+        lineas.append("_vivo = _vaciar_si_primero() if DB_PROPIA else None")
+    lineas.append("_iniciar_db()")
+    lineas.append("")
+    lineas.append("@contextmanager")
+    lineas.append("def _conexion():")
+    lineas.append('    """Toma una conexión del pool; commit al salir, rollback si hay error."""')
+    lineas.append("    con = _pool.get()")
+    lineas.append("    try:")
+    lineas.append("        with con:")
+    lineas.append("            yield con")
+    lineas.append("    finally:")
+    lineas.append("        _pool.put(con)")
+    lineas.append("")
+    lineas.append("def _a_fila(data) -> tuple:")
+    if rapido:
+        lineas.append("    return tuple(to_jsonable_python(data).values())")
+    else:
+        lineas.append('    return tuple(data.model_dump(mode="json").values())')
+    lineas.append("")
+    lineas.append("def _a_modelo(modelo, columnas, fila):")
+    lineas.append("    return modelo(**dict(zip(columnas, fila)))")
+
+    return lineas
+
+def _vaciado_compartido() -> list:
+    """Con `shared`, el primer worker vivo borra la base del arranque anterior."""
+    lineas = []
+    lineas.append("def _vaciar_si_primero() -> int:")
+    lineas.append('    """')
+    lineas.append("    Cada worker tiene un flock compartido sobre DB_PATH.workers mientras")
+    lineas.append("    vive: si el exclusivo se concede, no queda ninguno y la base (con su")
+    lineas.append("    WAL y las versiones de la cache) es de un arranque anterior.")
+    lineas.append("    DB_PATH.arranque ordena a los workers que arrancan a la vez. Devuelve")
+    lineas.append("    el descriptor que mantiene el flock.")
+    lineas.append('    """')
+    lineas.append('    vivo     = os.open(DB_PATH + ".workers", os.O_RDWR | os.O_CREAT, 0o600)')
+    lineas.append('    arranque = os.open(DB_PATH + ".arranque", os.O_RDWR | os.O_CREAT, 0o600)')
+    lineas.append("    try:")
+    lineas.append("        fcntl.flock(arranque, fcntl.LOCK_EX)")
+    lineas.append("        try:")
+    lineas.append("            fcntl.flock(vivo, fcntl.LOCK_EX | fcntl.LOCK_NB)")
+    lineas.append("        except BlockingIOError:")
+    lineas.append("            pass")
+    lineas.append("        else:")
+    lineas.append('            for sufijo in ("", "-wal", "-shm", ".gen"):')
+    lineas.append("                try:")
+    lineas.append("                    os.remove(DB_PATH + sufijo)")
+    lineas.append("                except FileNotFoundError:")
+    lineas.append("                    pass")
+    lineas.append("        fcntl.flock(vivo, fcntl.LOCK_SH)")
+    lineas.append("    finally:")
+    lineas.append("        os.close(arranque)")
+    lineas.append("    return vivo")
+    lineas.append("")
+    return lineas
+
+def _ddl_resumen(tabla: str, resumen: dict) -> list:
+    """
+    Tabla de un `resumen` (grupo → n y una suma por medida `sum`), los
+    triggers que la actualizan en cada INSERT/UPDATE/DELETE y su
+    reconstrucción al arrancar, por si la tabla de datos es anterior.
+    """
+    tabla_r = f"{tabla}_resumen_{resumen['nombre'].lower()}"
+    grupo   = resumen["grupo"]
+    sumas   = [(f"m_{n}", c) for n, c in resumen["medidas"] if c]
+    columnas = "".join(f", {m} REAL NOT NULL" for m, _ in sumas)
+    nombres  = "".join(f", {m}" for m, _ in sumas)
+
+    def alta(fila: str) -> str:
+        clave   = f"{fila}.{grupo}" if grupo else "''"
+        valores = "".join(f", {fila}.{c}" for _, c in sumas)
+        suma    = "".join(f", {m} = {m} + excluded.{m}" for m, _ in sumas)
+        return (f"INSERT INTO {tabla_r} (grupo, n{nombres}) VALUES ({clave}, 1{valores}) "
+                f"ON CONFLICT (grupo) DO UPDATE SET n = n + 1{suma};")
+
+    def baja(fila: str) -> str:
+        clave = f"{fila}.{grupo}" if grupo else "''"
+        resta = "".join(f", {m} = {m} - {fila}.{c}" for m, c in sumas)
+        return (f"UPDATE {tabla_r} SET n = n - 1{resta} WHERE grupo = {clave}; "
+                f"DELETE FROM {tabla_r} WHERE grupo = {clave} AND n = 0;")
+
+    disparador = f"CREATE TRIGGER IF NOT EXISTS tr_{tabla_r}"
+    lineas = [
+        f'    "CREATE TABLE IF NOT EXISTS {tabla_r} '
+        f'(grupo TEXT PRIMARY KEY, n INTEGER NOT NULL{columnas})",',
+        f'    "{disparador}_alta AFTER INSERT ON {tabla} BEGIN {alta("NEW")} END",',
+        f'    "{disparador}_baja AFTER DELETE ON {tabla} BEGIN {baja("OLD")} END",',
+    ]
+    afectadas = ([grupo] if grupo else []) + [c for _, c in sumas]
+    if afectadas:
+        lineas.append(f'    "{disparador}_cambio AFTER UPDATE OF {", ".join(dict.fromkeys(afectadas))} '
+                      f'ON {tabla} BEGIN {baja("OLD")} {alta("NEW")} END",')
+    sumas_sql = "".join(f", TOTAL({c})" for _, c in sumas)
+    return lineas + [
+        f'    "DELETE FROM {tabla_r}",',
+        f'    "INSERT INTO {tabla_r} (grupo, n{nombres}) '
+        f'SELECT {grupo or chr(39) * 2}, COUNT(*){sumas_sql} FROM {tabla} GROUP BY 1",',
+    ]
+
+def _modelos_sqlite(resource: str) -> dict:
+    """
+    Lo que devuelven los handlers (un modelo, una lista de modelos) → la
+    fila o las filas de las que sale: con `?fields=` se proyectan las
+    filas, sin construir los modelos.
+    """
+    const  = f"{resource.lower()}s".upper()
+    modelo = f"_a_modelo({resource}, {const}_COLUMNAS, fila[1:])"
+    return {modelo: "fila", f"[{modelo} for fila in filas]": "filas"}
+
+def _generar_cuerpo_sqlite(method: str, resource: str, route, almacen) -> list:
+    """Cuerpo de cada endpoint sobre las sentencias de _generar_almacen_sqlite."""
+    const     = f"{resource.lower()}s".upper()
+    indices   = almacen.get("indices", [])
+    nombre_id = route.path_param.name if route.path_param else None
+    modelo, modelos = _modelos_sqlite(resource)   # sus claves: un modelo y la lista
+    no_existe = [
+        f'        raise HTTPException(status_code=404, detail="{resource} no encontrado")',
+    ]
+    clave      = almacen.get("clave")
+    query      = getattr(route, "query_param", None)
+    demasiados = [
+        f'        raise HTTPException(status_code=413, detail=f"Máximo {{LOTE_MAX}} elementos por lote")',
+    ]
+
+    def sin_duplicados(lineas: list) -> list:
+        """Envuelve `lineas` para traducir violaciones UNIQUE en 409."""
+        unicos = [i["campo"] for i in indices if i["conflicto"]]
+        if not unicos:
+            return lineas
+        return ["    try:"] + ["    " + l for l in lineas] + [
+            "    except sqlite3.IntegrityError:",
+            f'        raise HTTPException(status_code=409, '
+            f'detail="{resource} con {"/".join(unicos)} duplicado")',
+        ]
+
+    if getattr(route.body, "list", False):
+        # Alta por lote en una sola transacción; un INSERT rechazado por
+        # UNIQUE sólo deshace esa sentencia y el resto del lote sigue
+        unicos = [i["campo"] for i in indices if i["conflicto"]]
+        insertar = [f"            cur = con.execute(SQL_{const}_INSERTAR, _a_fila(item))"]
+        if unicos:
+            insertar = ["            try:", "    " + insertar[0]] + [
+                "            except sqlite3.IntegrityError:",
+                f'                resultados.append({{"status": 409, '
+                f'"detail": "{resource} con {"/".join(unicos)} duplicado"}})',
+                "                continue",
+            ]
+        return [f"    if len(data) > LOTE_MAX:"] + demasiados + [
+            f"    resultados = []",
+            f"    with _conexion() as con:",
+            f"        for item in data:",
+        ] + insertar + [
+            f'            resultados.append({{"status": 201, '
+            f'"id": {f"item.{clave}" if clave else "cur.lastrowid"}, "item": item}})',
+            f"    return resultados",
+        ]
+
+    if _es_agregado(route):
+        grupo = "group_by" if almacen["columnar"]["grupos"] else "None"
+        return [
+            f"    with _conexion() as con:",
+            f"        filas = con.execute(SQL_{const}_AGREGAR[field, {grupo}]).fetchall()",
+            f'    claves = ("group", "count", "sum", "min", "max", "mean")',
+            f"    return [dict(zip(claves, fila)) for fila in filas]",
+        ]
+
+    resumen = _resumen_de(route, almacen)
+    if resumen:
+        claves = (["group"] if resumen["grupo"] else []) + [n for n, _ in resumen["medidas"]]
+        return [
+            f"    with _conexion() as con:",
+            f"        filas = con.execute(SQL_{const}_RESUMEN_{resumen['nombre'].upper()}).fetchall()",
+            f"    claves = {_tupla(claves)}",
+            f"    return [dict(zip(claves, fila)) for fila in filas]",
+        ]
+
+    if _es_exportacion(route):
+        # Un cursor durante toda la exportación: fetchmany lee cada trozo de
+        # la misma instantánea y las filas se serializan sin construir modelos
+        return [
+            f"    def trozos():",
+            f"        with _conexion() as con:",
+            f"            cur = con.execute(SQL_{const}_LISTAR)",
+            f"            while filas := cur.fetchmany(EXPORTAR_BLOQUE):",
+            f'                yield b"".join(to_json(dict(zip({const}_COLUMNAS, fila[1:]))) + b"\\n"',
+            f"                               for fila in filas)",
+            f"    return _exportar(request, trozos())",
+        ]
+
+    if query:
+        # Lectura múltiple: una sola consulta IN (...) para todo el lote
+        columna = 1 + almacen["campos"].index(clave) if clave else 0
+        return [f"    if len({query.name}) > LOTE_MAX:"] + demasiados + [
+            f'    sql = SQL_{const}_VARIOS.format(marcas=", ".join("?" * len({query.name})))',
+            f"    with _conexion() as con:",
+            f"        filas = con.execute(sql, {query.name}).fetchall()",
+            f"    encontradas = {{fila[{columna}]: fila for fila in filas}}",
+            f"    resultados = []",
+            f"    for i in {query.name}:",
+            f"        fila = encontradas.get(i)",
+            f"        if fila is None:",
+            f'            resultados.append({{"status": 404, "id": i, '
+            f'"detail": "{resource} no encontrado"}})',
+            f"        else:",
+            f'            resultados.append({{"status": 200, "id": i, "item": {modelo}}})',
+            f"    return resultados",
+        ]
+
+    if method == "get" and not nombre_id:
+        filtros   = [i for i in indices if i["filtro"]]
+        paginado  = getattr(route, "pagination", None)
+        if not filtros and not paginado:
+            return [
+                f"    with _conexion() as con:",
+                f"        filas = con.execute(SQL_{const}_LISTAR).fetchall()",
+                f"    return {modelos}",
+            ]
+        lineas = [f"    condiciones, valores = [], []"]
+        for idx in filtros:
+            valor = f"{idx['campo']}.isoformat()" if idx["tipo"] == "datetime" else idx["campo"]
+            lineas += [
+                f"    if {idx['campo']} is not None:",
+                f'        condiciones.append("{idx["campo"]} = ?")',
+                f"        valores.append({valor})",
+            ]
+        if paginado:
+            lineas += [
+                f"    if cursor is not None:",
+                f'        condiciones.append("pk > ?")',
+                f"        valores.append(cursor)",
+            ]
+        lineas += [
+            f"    sql = SQL_{const}_SELECT",
+            f"    if condiciones:",
+            f'        sql += " WHERE " + " AND ".join(condiciones)',
+        ]
+        if paginado:
+            # Keyset sobre pk: se pide una fila de más para saber si hay otra página
+            return lineas + [
+                f'    sql += " ORDER BY pk LIMIT ?"',
+                f"    valores.append(limit + 1)",
+                f"    with _conexion() as con:",
+                f"        filas = con.execute(sql, valores).fetchall()",
+                f"    hay_mas = len(filas) > limit",
+                f"    filas = filas[:limit]",
+                f"    return {{",
+                f'        "items": {modelos},',
+                f'        "next_cursor": filas[-1][0] if hay_mas else None,',
+                f"    }}",
+            ]
+        return lineas + [
+            f'    sql += " ORDER BY pk"',
+            f"    with _conexion() as con:",
+            f"        filas = con.execute(sql, valores).fetchall()",
+            f"    return {modelos}",
+        ]
+
+    if method == "get" and nombre_id:
+        return [
+            f"    with _conexion() as con:",
+            f"        fila = con.execute(SQL_{const}_OBTENER, ({nombre_id},)).fetchone()",
+            f"    if fila is None:",
+        ] + no_existe + [
+            f"    return {modelo}",
+        ]
+
+    if method == "post":
+        return sin_duplicados([
+            f"    with _conexion() as con:",
+            f"        con.execute(SQL_{const}_INSERTAR, _a_fila(data))",
+        ]) + [f"    return data"]
+
+    if method == "put":
+        return sin_duplicados([
+            f"    with _conexion() as con:",
+            f"        cur = con.execute(SQL_{const}_ACTUALIZAR, _a_fila(data) + ({nombre_id},))",
+        ]) + [
+            f"    if cur.rowcount == 0:",
+        ] + no_existe + [
+            f"    return data",
+        ]
+
+    if method == "delete":
+        return [
+            f"    with _conexion() as con:",
+            f"        cur = con.execute(SQL_{const}_ELIMINAR, ({nombre_id},))",
+            f"    if cur.rowcount == 0:",
+        ] + no_existe + [
+            f'    return {{"message": "{resource} eliminado correctamente"}}',
+        ]
+
+    return ["    pass"]
@@ -0,0 +1,390 @@
+"""
+PASO 3 — M2T: PSM FastAPI → carga.py
+======================================
+carga.py levanta main.py con uvicorn, lo puebla con los mismos valores
+de ejemplo que los schemas y mide, route a route, rps y latencias
+p50/p95/p99 con un cliente HTTP/1.1 sobre asyncio, sin dependencias.
+
+Sólo depende del PSM y de step3_comun: cambiar cómo se genera main.py no
+invalida carga.py en `--incremental`.
+"""
+
+from step3_comun import (
+    _cabecera, _clave_natural, _describir_almacen, _ejemplo_valor, _en_sqlite,
+    _es_exportacion, _inferir_resource, _tupla, escribir_si_cambia,
+)
+import os
+
+# Módulos de los que depende carga.py: entradas de su etapa del paso 3
+FUENTES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{modulo}.py")
+    for modulo in ("step3_carga", "step3_comun")
+]
+
+# Parámetros por defecto de la prueba de carga generada
+CARGA_PETICIONES    = 1000   # peticiones medidas por route
+CARGA_CONEXIONES    = 16     # conexiones keep-alive simultáneas
+CARGA_POBLACION     = 100    # elementos creados por recurso antes de medir
+CARGA_CALENTAMIENTO = 20     # peticiones sin medir antes de cada route
+CARGA_LOTE          = 10     # elementos por POST /bulk e IDs por GET /bulk?ids=
+
+def generar_carga(psm_model, ruta_salida: str) -> list:
+    """
+    Escribe carga.py: una prueba de carga asyncio que recorre todas las
+    routes del PSM contra la app generada. Devuelve las rutas escritas.
+    """
+    escribir_si_cambia(ruta_salida, "\n".join(_lineas_carga(psm_model)))
+    print(f"  ✅ carga.py   generado → {os.path.basename(ruta_salida)} "
+          f"({len(psm_model.routes)} routes)")
+    return [ruta_salida]
+
+def _operacion_carga(route) -> str:
+    """Qué hace la route, a efectos de construir su petición."""
+    if _es_exportacion(route):
+        return "exportar"
+    if route.method == "POST":
+        return "crearLote" if getattr(route.body, "list", False) else "crear"
+    if route.method == "PUT":
+        return "actualizar"
+    if route.method == "DELETE":
+        return "eliminar"
+    if getattr(route, "query_param", None):
+        return "obtenerVarios"
+    if route.path_param:
+        return "obtener"
+    return "consultar"          # listado, agregados, resúmenes
+
+def _lineas_carga(psm_model) -> list:
+    lineas  = _cabecera("PRUEBA DE CARGA — GENERADA AUTOMÁTICAMENTE")[:-1]
+    lineas += _datos_carga(psm_model)
+    lineas += _cliente_carga()
+    lineas += _ejecucion_carga(psm_model)
+    return lineas
+
+def _datos_carga(psm_model) -> list:
+    """Docstring, constantes y los datos del PSM: ejemplos, campos únicos y routes."""
+    lineas = []
+    lineas.append('"""')
+    lineas.append(f"Prueba de carga de {psm_model.name}: una medición por cada route del PSM.")
+    lineas.append("")
+    lineas.append("Levanta main.py con uvicorn en un puerto libre (almacén vacío), crea")
+    lineas.append("--poblacion elementos de cada recurso y lanza, route a route,")
+    lineas.append("--peticiones peticiones repartidas entre --conexiones conexiones")
+    lineas.append("keep-alive. Informa, por route, peticiones por segundo, latencias")
+    lineas.append("p50/p95/p99 y los códigos de estado recibidos.")
+    lineas.append("")
+    lineas.append("Los cuerpos usan los mismos valores de ejemplo que los schemas; los")
+    lineas.append("campos únicos y las claves naturales se numeran por elemento. Los")
+    lineas.append("DELETE van al final y borran elementos creados por la propia prueba.")
+    lineas.append("")
+    lineas.append("Uso:")
+    lineas.append("    pip install fastapi uvicorn")
+    lineas.append("    python carga.py [--peticiones N] [--conexiones C] [--json base.json]")
+    lineas.append("    python carga.py --url http://127.0.0.1:8000   # app ya levantada, vacía")
+    lineas.append('"""')
+    lineas.append("")
+    lineas.append("import argparse")
+    lineas.append("import asyncio")
+    lineas.append("import json")
+    lineas.append("import os")
+    lineas.append("import random")
+    lineas.append("import socket")
+    lineas.append("import subprocess")
+    lineas.append("import sys")
+    lineas.append("import tempfile")
+    lineas.append("import time")
+    lineas.append("from urllib.parse import urlsplit")
+    lineas.append("")
+    primera_pk = 1 if _en_sqlite(psm_model) else 0
+    origen_pk  = "AUTOINCREMENT desde 1" if primera_pk else "count() desde 0"
+    lineas.append("DIRECTORIO  = os.path.dirname(os.path.abspath(__file__))")
+    lineas.append(f'VARIABLE_DB = "{psm_model.name.upper()}_DB"   # base SQLite de la app levantada')
+    lineas.append(f"PRIMERA_PK  = {primera_pk}   # {origen_pk}")
+    lineas.append('HOST        = "127.0.0.1"')
+    lineas.append("")
+
+    lineas.append("# Cuerpo de ejemplo de cada recurso (los valores de los schemas)")
+    lineas.append("EJEMPLOS = {")
+    for schema in psm_model.schemas:
+        valores = ", ".join(f'"{f.name}": {_ejemplo_valor(f.name, f.type)}' for f in schema.fields)
+        lineas.append(f'    "{schema.name}": {{{valores}}},')
+    lineas.append("}")
+    lineas.append("")
+
+    unicos, claves = {}, {}
+    for schema in psm_model.schemas:
+        clave = _clave_natural(schema)
+        campos = [i["campo"] for i in _describir_almacen(schema, ())["indices"] if i["unico"]]
+        if campos:
+            unicos[schema.name] = campos
+        if clave:
+            claves[schema.name] = clave
+    lineas.append("# Campos que no pueden repetirse entre elementos: se numeran")
+    lineas.append("UNICOS = {")
+    for recurso, campos in unicos.items():
+        lineas.append(f'    "{recurso}": {_tupla(campos)},')
+    lineas.append("}")
+    lineas.append("")
+    lineas.append("# Recursos cuyo {id} en la ruta es una clave natural del cuerpo")
+    lineas.append("CLAVES = {")
+    for recurso, clave in claves.items():
+        lineas.append(f'    "{recurso}": "{clave}",')
+    lineas.append("}")
+    lineas.append("")
+
+    lineas.append("# (método, ruta, recurso, operación) de cada route, en el orden del PSM")
+    lineas.append("ROUTES = [")
+    for route in psm_model.routes:
+        lineas.append(f'    ("{route.method}", "{route.path}", "{_inferir_resource(route.path)}", '
+                      f'"{_operacion_carga(route)}"),')
+    lineas.append("]")
+    lineas.append("")
+    lineas.append("")
+    return lineas
+
+def _cliente_carga() -> list:
+    """Datos de la prueba y un cliente HTTP/1.1 mínimo sobre asyncio."""
+    lineas = []
+    lineas.append("class Datos:")
+    lineas.append('    """Numera los cuerpos de cada recurso y recuerda los IDs que existen."""')
+    lineas.append("")
+    lineas.append("    def __init__(self, semilla: int, lote: int):")
+    lineas.append("        self.azar    = random.Random(semilla)")
+    lineas.append("        self.lote    = lote")
+    lineas.append("        self.numeros = dict.fromkeys(EJEMPLOS, 0)   # siguiente cuerpo")
+    lineas.append("        self.altas   = dict.fromkeys(EJEMPLOS, 0)   # altas aceptadas")
+    lineas.append("        self.vivos   = {r: [] for r in EJEMPLOS}")
+    lineas.append("")
+    lineas.append("    def cuerpo(self, recurso: str) -> dict:")
+    lineas.append("        n = self.numeros[recurso]")
+    lineas.append("        self.numeros[recurso] += 1")
+    lineas.append("        item = dict(EJEMPLOS[recurso])")
+    lineas.append("        for campo in UNICOS.get(recurso, ()):")
+    lineas.append("            valor = item[campo]")
+    lineas.append('            item[campo] = f"{n}-{valor}" if isinstance(valor, str) else valor + n')
+    lineas.append("        return item")
+    lineas.append("")
+    lineas.append("    def confirmar(self, recurso: str, item: dict, pk=None):")
+    lineas.append('        """')
+    lineas.append("        Alta aceptada. Sin `pk` en la respuesta, el almacén vacío las")
+    lineas.append("        asigna seguidas desde PRIMERA_PK; con clave natural, el ID es")
+    lineas.append("        el propio campo del cuerpo.")
+    lineas.append('        """')
+    lineas.append("        clave = CLAVES.get(recurso)")
+    lineas.append("        if pk is None:")
+    lineas.append("            pk = item[clave] if clave else PRIMERA_PK + self.altas[recurso]")
+    lineas.append("        self.altas[recurso] += 1")
+    lineas.append("        self.vivos[recurso].append(pk)")
+    lineas.append("")
+    lineas.append("    def uno(self, recurso: str):")
+    lineas.append("        vivos = self.vivos[recurso]")
+    lineas.append("        return self.azar.choice(vivos) if vivos else PRIMERA_PK - 1   # → 404")
+    lineas.append("")
+    lineas.append("    def retirar(self, recurso: str):")
+    lineas.append("        vivos = self.vivos[recurso]")
+    lineas.append("        return vivos.pop() if vivos else PRIMERA_PK - 1")
+    lineas.append("")
+    lineas.append("    def peticion(self, route) -> tuple:")
+    lineas.append('        """(método, ruta, cuerpo JSON, elementos que crea) de una petición a `route`."""')
+    lineas.append("        metodo, ruta, recurso, operacion = route")
+    lineas.append("        cuerpo, items, ident = None, [], None")
+    lineas.append('        if "{" in ruta:')
+    lineas.append('            ident = self.retirar(recurso) if operacion == "eliminar" else self.uno(recurso)')
+    lineas.append('            ruta  = ruta[:ruta.index("{")] + str(ident)')
+    lineas.append('        if operacion == "obtenerVarios":')
+    lineas.append("            ids  = (self.uno(recurso) for _ in range(self.lote))")
+    lineas.append('            ruta = ruta + "?" + "&".join(f"ids={i}" for i in ids)')
+    lineas.append('        elif operacion == "crear":')
+    lineas.append("            items  = [self.cuerpo(recurso)]")
+    lineas.append("            cuerpo = items[0]")
+    lineas.append('        elif operacion == "crearLote":')
+    lineas.append("            items  = [self.cuerpo(recurso) for _ in range(self.lote)]")
+    lineas.append("            cuerpo = items")
+    lineas.append('        elif operacion == "actualizar":')
+    lineas.append("            cuerpo = self.cuerpo(recurso)")
+    lineas.append("            if recurso in CLAVES:          # la clave natural no cambia")
+    lineas.append("                cuerpo[CLAVES[recurso]] = ident")
+    lineas.append("        datos = b\"\" if cuerpo is None else json.dumps(cuerpo).encode()")
+    lineas.append("        return metodo, ruta, datos, items")
+    lineas.append("")
+    lineas.append("    def respuesta(self, route, estado: int, cuerpo: bytes, items: list):")
+    lineas.append('        """Registra las altas que el servidor aceptó."""')
+    lineas.append("        recurso, operacion = route[2], route[3]")
+    lineas.append('        if operacion == "crear" and estado == 201:')
+    lineas.append("            self.confirmar(recurso, items[0])")
+    lineas.append('        elif operacion == "crearLote" and estado == 207:')
+    lineas.append("            for item, resultado in zip(items, json.loads(cuerpo)):")
+    lineas.append('                if resultado["status"] == 201:')
+    lineas.append('                    self.confirmar(recurso, item, resultado["id"])')
+    lineas.append("")
+    lineas.append("")
+    lineas.append("async def pedir(reader, writer, metodo: str, ruta: str, cuerpo: bytes = b\"\") -> tuple:")
+    lineas.append('    """Una petición HTTP/1.1 keep-alive; lee la respuesta entera, troceada o no."""')
+    lineas.append("    cabeceras = (f\"{metodo} {ruta} HTTP/1.1\\r\\nHost: carga\\r\\n\"")
+    lineas.append("                 f\"Content-Type: application/json\\r\\nContent-Length: {len(cuerpo)}\\r\\n\\r\\n\")")
+    lineas.append("    writer.write(cabeceras.encode() + cuerpo)")
+    lineas.append("    await writer.drain()")
+    lineas.append("    linea = await reader.readline()")
+    lineas.append("    if not linea:")
+    lineas.append('        raise ConnectionError("el servidor cerró la conexión")')
+    lineas.append("    estado = int(linea.split()[1])")
+    lineas.append("    largo, troceado = 0, False")
+    lineas.append("    while (linea := await reader.readline()) not in (b\"\\r\\n\", b\"\"):")
+    lineas.append("        nombre, _, valor = linea.decode(\"latin-1\").partition(\":\")")
+    lineas.append("        nombre = nombre.strip().lower()")
+    lineas.append("        if nombre == \"content-length\":")
+    lineas.append("            largo = int(valor)")
+    lineas.append("        elif nombre == \"transfer-encoding\":")
+    lineas.append("            troceado = \"chunked\" in valor.lower()")
+    lineas.append("    if not troceado:")
+    lineas.append("        return estado, await reader.readexactly(largo)")
+    lineas.append("    trozos = []")
+    lineas.append("    while (tamano := int((await reader.readline()).split(b\";\")[0], 16)):")
+    lineas.append("        trozos.append((await reader.readexactly(tamano + 2))[:-2])")
+    lineas.append("    await reader.readline()                  # fin de los trozos")
+    lineas.append("    return estado, b\"\".join(trozos)")
+    lineas.append("")
+    lineas.append("")
+    return lineas
+
+def _ejecucion_carga(psm_model) -> list:
+    """Medición por route, informe y arranque de uvicorn."""
+    lineas = []
+    lineas.append("async def medir(host: str, puerto: int, route, datos: Datos,")
+    lineas.append("                peticiones: int, conexiones: int) -> dict:")
+    lineas.append('    """`peticiones` a `route` repartidas entre `conexiones` conexiones."""')
+    lineas.append("    latencias, estados = [], {}")
+    lineas.append("    pendientes = peticiones")
+    lineas.append("")
+    lineas.append("    async def conexion():")
+    lineas.append("        nonlocal pendientes")
+    lineas.append("        reader, writer = await asyncio.open_connection(host, puerto)")
+    lineas.append("        while pendientes > 0:")
+    lineas.append("            pendientes -= 1")
+    lineas.append("            metodo, ruta, cuerpo, items = datos.peticion(route)")
+    lineas.append("            t0 = time.perf_counter()")
+    lineas.append("            try:")
+    lineas.append("                estado, respuesta = await pedir(reader, writer, metodo, ruta, cuerpo)")
+    lineas.append("            except (ConnectionError, asyncio.IncompleteReadError):")
+    lineas.append('                estados["error"] = estados.get("error", 0) + 1')
+    lineas.append("                writer.close()")
+    lineas.append("                reader, writer = await asyncio.open_connection(host, puerto)")
+    lineas.append("                continue")
+    lineas.append("            latencias.append(time.perf_counter() - t0)")
+    lineas.append("            estados[estado] = estados.get(estado, 0) + 1")
+    lineas.append("            datos.respuesta(route, estado, respuesta, items)")
+    lineas.append("        writer.close()")
+    lineas.append("")
+    lineas.append("    t0 = time.perf_counter()")
+    lineas.append("    await asyncio.gather(*(conexion() for _ in range(max(1, min(conexiones, peticiones)))))")
+    lineas.append("    segundos = time.perf_counter() - t0")
+    lineas.append("")
+    lineas.append("    latencias.sort()")
+    lineas.append("    def pct(p):")
+    lineas.append("        if not latencias:")
+    lineas.append("            return None")
+    lineas.append("        return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000, 2)")
+    lineas.append("    return {")
+    lineas.append('        "metodo": route[0], "ruta": route[1], "peticiones": len(latencias),')
+    lineas.append('        "rps": round(len(latencias) / segundos, 1),')
+    lineas.append('        "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),')
+    lineas.append('        "estados": {str(k): v for k, v in sorted(estados.items(), key=str)},')
+    lineas.append("    }")
+    lineas.append("")
+    lineas.append("")
+    lineas.append("async def poblar(host: str, puerto: int, datos: Datos, poblacion: int):")
+    lineas.append('    """`poblacion` altas por recurso, por lotes si la API los admite."""')
+    lineas.append("    altas = {}")
+    lineas.append("    for route in ROUTES:")
+    lineas.append('        if route[3] == "crearLote" or (route[3] == "crear" and route[2] not in altas):')
+    lineas.append("            altas[route[2]] = route")
+    lineas.append("    reader, writer = await asyncio.open_connection(host, puerto)")
+    lineas.append("    for recurso, route in altas.items():")
+    lineas.append("        while datos.altas[recurso] < poblacion and datos.numeros[recurso] < 2 * poblacion:")
+    lineas.append("            metodo, ruta, cuerpo, items = datos.peticion(route)")
+    lineas.append("            estado, respuesta = await pedir(reader, writer, metodo, ruta, cuerpo)")
+    lineas.append("            datos.respuesta(route, estado, respuesta, items)")
+    lineas.append("    writer.close()")
+    lineas.append("")
+    lineas.append("")
+    lineas.append("async def probar(host: str, puerto: int, args) -> list:")
+    lineas.append("    datos = Datos(args.semilla, args.lote)")
+    lineas.append("    await poblar(host, puerto, datos, args.poblacion)")
+    lineas.append("    resultados = []")
+    lineas.append('    # Los DELETE al final, para no dejar sin datos a las demás routes')
+    lineas.append('    for route in sorted(ROUTES, key=lambda r: r[3] == "eliminar"):')
+    lineas.append('        if args.calentamiento and route[3] != "eliminar":')
+    lineas.append("            await medir(host, puerto, route, datos, args.calentamiento, args.conexiones)")
+    lineas.append("        resultados.append(await medir(host, puerto, route, datos,")
+    lineas.append("                                      args.peticiones, args.conexiones))")
+    lineas.append("        informar(resultados[-1])")
+    lineas.append("    return resultados")
+    lineas.append("")
+    lineas.append("")
+    lineas.append("def informar(r: dict = None):")
+    lineas.append('    """Una fila de la tabla (sin `r`, la cabecera)."""')
+    lineas.append("    if r is None:")
+    lineas.append("        print(f\"{'método':<7}{'ruta':<36}{'pet.':>7}{'rps':>10}\"")
+    lineas.append("              f\"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  estados\")")
+    lineas.append("        return")
+    lineas.append("    ms = lambda v: f\"{v:>9.2f}\" if v is not None else f\"{'-':>9}\"")
+    lineas.append("    estados = \" \".join(f\"{k}×{v}\" for k, v in r[\"estados\"].items())")
+    lineas.append("    print(f\"{r['metodo']:<7}{r['ruta']:<36}{r['peticiones']:>7}{r['rps']:>10.1f}\"")
+    lineas.append("          f\"{ms(r['p50_ms'])}{ms(r['p95_ms'])}{ms(r['p99_ms'])}  {estados}\")")
+    lineas.append("")
+    lineas.append("")
+    lineas.append("def puerto_libre() -> int:")
+    lineas.append("    with socket.socket() as s:")
+    lineas.append("        s.bind((HOST, 0))")
+    lineas.append("        return s.getsockname()[1]")
+    lineas.append("")
+    lineas.append("")
+    lineas.append("def levantar(puerto: int, directorio: str) -> subprocess.Popen:")
+    lineas.append('    """uvicorn main:app en `puerto`, con la base SQLite (si la hay) en `directorio`."""')
+    lineas.append("    servidor = subprocess.Popen(")
+    lineas.append('        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(puerto),')
+    lineas.append('         "--log-level", "warning", "--no-access-log"],')
+    lineas.append('        cwd=DIRECTORIO, env={**os.environ, VARIABLE_DB: os.path.join(directorio, "carga.db")},')
+    lineas.append("    )")
+    lineas.append("    limite = time.monotonic() + 30")
+    lineas.append("    while time.monotonic() < limite and servidor.poll() is None:")
+    lineas.append("        try:")
+    lineas.append("            socket.create_connection((HOST, puerto), timeout=0.2).close()")
+    lineas.append("            return servidor")
+    lineas.append("        except OSError:")
+    lineas.append("            time.sleep(0.05)")
+    lineas.append("    servidor.terminate()")
+    lineas.append('    raise RuntimeError(f"uvicorn no respondió en el puerto {puerto}")')
+    lineas.append("")
+    lineas.append("")
+    lineas.append('if __name__ == "__main__":')
+    lineas.append(f'    parser = argparse.ArgumentParser(description="Prueba de carga de {psm_model.name}")')
+    lineas.append(f'    parser.add_argument("--peticiones",    type=int, default={CARGA_PETICIONES}, help="medidas por route")')
+    lineas.append(f'    parser.add_argument("--conexiones",    type=int, default={CARGA_CONEXIONES}, help="simultáneas, keep-alive")')
+    lineas.append(f'    parser.add_argument("--poblacion",     type=int, default={CARGA_POBLACION}, help="altas por recurso antes de medir")')
+    lineas.append(f'    parser.add_argument("--calentamiento", type=int, default={CARGA_CALENTAMIENTO}, help="peticiones sin medir por route")')
+    lineas.append(f'    parser.add_argument("--lote",          type=int, default={CARGA_LOTE}, help="elementos por petición de lote")')
+    lineas.append('    parser.add_argument("--semilla",       type=int, default=0)')
+    lineas.append('    parser.add_argument("--url", help="app ya levantada (y vacía) en vez de lanzar uvicorn")')
+    lineas.append('    parser.add_argument("--json", metavar="RUTA", help="guardar los resultados como línea base")')
+    lineas.append("    args = parser.parse_args()")
+    lineas.append("")
+    lineas.append("    informar()")
+    lineas.append("    if args.url:")
+    lineas.append("        url = urlsplit(args.url)")
+    lineas.append("        resultados = asyncio.run(probar(url.hostname, url.port or 80, args))")
+    lineas.append("    else:")
+    lineas.append("        with tempfile.TemporaryDirectory() as tmp:")
+    lineas.append("            puerto   = puerto_libre()")
+    lineas.append("            servidor = levantar(puerto, tmp)")
+    lineas.append("            try:")
+    lineas.append("                resultados = asyncio.run(probar(HOST, puerto, args))")
+    lineas.append("            finally:")
+    lineas.append("                servidor.terminate()")
+    lineas.append("                servidor.wait()")
+    lineas.append("    if args.json:")
+    lineas.append('        with open(args.json, "w") as f:')
+    lineas.append(f'            json.dump({{"api": "{psm_model.name}", "peticiones": args.peticiones,')
+    lineas.append('                       "conexiones": args.conexiones, "routes": resultados}, f, indent=2)')
+    lineas.append("")
+    return lineas
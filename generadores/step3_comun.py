@@ -0,0 +1,264 @@
+"""
+PASO 3 — Consultas sobre el PSM compartidas por los generadores
+================================================================
+Opciones del PSM (plataforma, almacén, serialización, disposición…),
+qué recursos tienen lote, paginación, agregados, exportación o
+proyección, la descripción del almacén de cada schema y la escritura
+de archivos sin tocar los que no cambian.
+"""
+
+from modelos_memoria import PSMApi
+import os
+import re
+
+def _serializacion_rapida(psm_model) -> bool:
+    return (getattr(psm_model, "serialization", "") or "pydantic") == "fast"
+
+def _con_metricas(psm_model) -> bool:
+    return (getattr(psm_model, "metrics", "") or "none") == "prometheus"
+
+def _con_admision(psm_model) -> bool:
+    return any(getattr(r, "admission", None) for r in psm_model.routes)
+
+def _por_routers(psm_model) -> bool:
+    return (getattr(psm_model, "layout", "") or "single") == "routers"
+
+def _en_sqlite(psm_model) -> bool:
+    """`sqlite` y `shared` generan el mismo almacén SQLite."""
+    return (getattr(psm_model, "storage", "") or "memory") in ("sqlite", "shared")
+
+def _entre_procesos(psm_model) -> bool:
+    return (getattr(psm_model, "storage", "") or "memory") == "shared"
+
+def _routes_por_recurso(psm_model) -> dict:
+    """recurso → sus routes, en una sola pasada (evita filtrar una vez por schema)."""
+    agrupadas = {}
+    for route in psm_model.routes:
+        agrupadas.setdefault(_inferir_resource(route.path), []).append(route)
+    return agrupadas
+
+def _psm_recurso(psm_model, schema, routes: dict) -> PSMApi:
+    """El PSM reducido a un schema y sus routes, para generar su módulo."""
+    return PSMApi(
+        platform=psm_model.platform, name=psm_model.name,
+        storage=getattr(psm_model, "storage", "") or "memory",
+        serialization=getattr(psm_model, "serialization", "") or "pydantic",
+        schemas=[schema],
+        routes=routes.get(schema.name, []),
+    )
+
+def _schemas_recurso(psm_model) -> list:
+    """Schemas del PSM más sus sobres <R>Pagina, <R>Resultado, <R>Agregado y <R>Resumen<N>."""
+    nombres  = [s.name for s in psm_model.schemas]
+    nombres += [f"{r}Pagina" for r in _recursos_paginados(psm_model)]
+    nombres += [f"{r}Resultado" for r in _recursos_lote(psm_model)]
+    nombres += [f"{r}Agregado" for r in _recursos_agregados(psm_model)]
+    nombres += [_nombre_resumen(r, resumen) for r, resumen in _resumenes(psm_model)]
+    return nombres
+
+def escribir_si_cambia(ruta: str, texto: str) -> bool:
+    """
+    Escribe `texto` salvo que el archivo ya lo contenga: regenerar sin
+    cambios no toca el archivo (ni despierta a `uvicorn --reload`).
+    """
+    try:
+        with open(ruta) as f:
+            if f.read() == texto:
+                return False
+    except OSError:
+        pass
+    with open(ruta, "w") as f:
+        f.write(texto)
+    return True
+
+def modulos_recurso(dir_salida: str, recurso: str) -> list:
+    """Módulos propios de `recurso` con `layout : routers`."""
+    return [os.path.join(dir_salida, "esquemas", f"{recurso.lower()}.py"),
+            os.path.join(dir_salida, "routers", f"{recurso.lower()}.py")]
+
+def _ejemplo_valor(nombre: str, tipo: str) -> str:
+    """Genera un valor de ejemplo para el schema Pydantic."""
+    ejemplos = {
+        "nombre":    '"Laptop Pro"',
+        "email":     '"usuario@ejemplo.com"',
+        "precio":    "999.99",
+        "total":     "150.00",
+        "stock":     "42",
+        "edad":      "30",
+        "numero":    "1001",
+        "estado":    '"pendiente"',
+        "fecha":     '"2024-01-15"',
+        "disponible":"True",
+    }
+    if nombre in ejemplos:
+        return ejemplos[nombre]
+    if tipo == "str":      return f'"{nombre} ejemplo"'
+    if tipo == "int":      return "1"
+    if tipo == "float":    return "0.0"
+    if tipo == "bool":     return "True"
+    if tipo == "datetime": return '"2024-01-15T00:00:00"'
+    return '"ejemplo"'
+
+# Recursos cuyo {id} en la ruta es una clave natural del schema y no
+# la clave primaria del almacén: se resuelve con un índice dict → O(1)
+CLAVES_NATURALES = {
+    "Pedido": "numero",
+}
+
+def _tupla(nombres: list) -> str:
+    """("a", "b") — con la coma final si sólo hay uno."""
+    return "(" + ", ".join(f'"{n}"' for n in nombres) + ("," if len(nombres) == 1 else "") + ")"
+
+def _inferir_resource(path: str) -> str:
+    partes = path.strip('/"').split("/")
+    base   = partes[0].rstrip("s")
+    return base.capitalize()
+
+def _generar_nombre_funcion(method: str, path: str) -> str:
+    clean = re.sub(r'[{}"/]', '_', path).strip("_").replace("__", "_")
+    return f"{method}_{clean}"
+
+def _es_lote(route) -> bool:
+    """POST /recursos/bulk (body lista) o GET /recursos/bulk?ids= (query lista)."""
+    query = getattr(route, "query_param", None)
+    return bool(getattr(route.body, "list", False) or (query and query.list))
+
+def _recursos_lote(psm_model) -> list:
+    """Recursos con alguna operación de lote, en orden de aparición."""
+    lotes = []
+    for route in psm_model.routes:
+        resource = _inferir_resource(route.path)
+        if _es_lote(route) and resource not in lotes:
+            lotes.append(resource)
+    return lotes
+
+def _es_agregado(route) -> bool:
+    """GET /recursos/aggregate (respuesta List[<R>Agregado])."""
+    return route.response.name == f"{_inferir_resource(route.path)}Agregado"
+
+def _recursos_agregados(psm_model) -> list:
+    """Recursos con endpoint de agregados, en orden de aparición."""
+    agregados = []
+    for route in psm_model.routes:
+        resource = _inferir_resource(route.path)
+        if _es_agregado(route) and resource not in agregados:
+            agregados.append(resource)
+    return agregados
+
+def _es_exportacion(route) -> bool:
+    """GET /recursos/export (respuesta NDJSON en streaming)."""
+    return route.response.name == "NDJSON"
+
+def _recursos_exportados(psm_model) -> list:
+    """Recursos con exportación NDJSON, en orden de aparición."""
+    exportados = []
+    for route in psm_model.routes:
+        resource = _inferir_resource(route.path)
+        if _es_exportacion(route) and resource not in exportados:
+            exportados.append(resource)
+    return exportados
+
+def _es_proyectable(route, almacen) -> bool:
+    """GET que devuelve el recurso (uno, la lista o una página): admite `?fields=`."""
+    filtros = [i["campo"] for i in almacen.get("indices", []) if i["filtro"]]
+    return (route.method == "GET" and not getattr(route, "query_param", None)
+            and route.response.name == _inferir_resource(route.path)
+            and "fields" not in filtros)
+
+def _recursos_proyectados(psm_model) -> list:
+    """Recursos con algún GET proyectable, en orden de aparición."""
+    proyectados = []
+    for route in psm_model.routes:
+        resource = _inferir_resource(route.path)
+        if _es_proyectable(route, {}) and resource not in proyectados:
+            proyectados.append(resource)
+    return proyectados
+
+def _resumenes(psm_model) -> list:
+    """(recurso, resumen) de cada `resumen` de los schemas, en orden."""
+    return [(s.name, r) for s in psm_model.schemas for r in getattr(s, "resumenes", [])]
+
+def _nombre_resumen(resource: str, resumen) -> str:
+    """Pedido + porEstado → PedidoResumenPorEstado"""
+    return f"{resource}Resumen{resumen.name[0].upper()}{resumen.name[1:]}"
+
+def _resumen_de(route, almacen):
+    """El resumen que sirve GET /recursos/resumen/<nombre>, o None."""
+    if route.method != "GET" or "/resumen/" not in route.path:
+        return None
+    nombre = route.path.rsplit("/", 1)[1]
+    return next((r for r in almacen.get("resumenes", []) if r["nombre"] == nombre), None)
+
+def _recursos_paginados(psm_model) -> list:
+    """Recursos con algún listado paginado, en orden de aparición."""
+    paginados = []
+    for route in psm_model.routes:
+        resource = _inferir_resource(route.path)
+        if getattr(route, "pagination", None) and resource not in paginados:
+            paginados.append(resource)
+    return paginados
+
+def _clave_natural(schema):
+    """Campo del schema que identifica al recurso en la ruta, si lo hay."""
+    clave = CLAVES_NATURALES.get(schema.name)
+    if clave and any(f.name == clave for f in schema.fields):
+        return clave
+    return None
+
+def _tipo_clave(schema, clave: str) -> str:
+    return next(f.type for f in schema.fields if f.name == clave)
+
+def _describir_almacen(schema, paginados, lotes=()) -> dict:
+    """
+    Estructuras auxiliares del almacén de un recurso:
+      clave   → campo natural que resuelve el {id} de la ruta (o None)
+      orden   → mantener {db}_orden (claves ordenadas) para paginar; las
+                bajas se quedan en él hasta compactarlo
+      lote    → tiene operaciones de lote (SQL_<T>_VARIOS en SQLite)
+      campos  → columnas del schema, en orden
+      cache   → máximo de respuestas GET cacheadas (None = sin cache)
+      columnar → {"campos": [...], "grupos": [...]} de `columnar` (o None):
+                 columnas numéricas y campos Text por los que agrupar
+      resumenes → [{"nombre", "grupo", "medidas": [(nombre, campo), ...]}]
+                  de cada `resumen`; campo None = count
+      indices → índices hash {db}_por_<campo>; cada uno con
+                unico     valor → pk  (si no, valor → {pk, ...})
+                filtro    se expone como query param del listado
+                conflicto 409 si un alta/modificación duplica el valor
+    """
+    clave     = _clave_natural(schema)
+    indices   = []
+    declarados = schema.indexes.indexes if getattr(schema, "indexes", None) else []
+    for idx in declarados:
+        indices.append({
+            "campo":     idx.field,
+            "tipo":      _tipo_clave(schema, idx.field),
+            "unico":     bool(idx.unique) or idx.field == clave,
+            "filtro":    True,
+            "conflicto": bool(idx.unique),
+        })
+    if clave and all(i["campo"] != clave for i in indices):
+        indices.insert(0, {
+            "campo": clave, "tipo": _tipo_clave(schema, clave),
+            "unico": True, "filtro": False, "conflicto": False,
+        })
+    return {"clave": clave, "orden": schema.name in paginados,
+            "lote": schema.name in lotes, "indices": indices,
+            "campos": [f.name for f in schema.fields],
+            "cache": schema.cache.size if getattr(schema, "cache", None) else None,
+            "columnar": {"campos": list(schema.columnar.fields),
+                         "grupos": list(schema.columnar.groups)}
+                        if getattr(schema, "columnar", None) else None,
+            "resumenes": [{"nombre": r.name, "grupo": r.group or None,
+                           "medidas": [(m.name, m.campo if m.tipo == "sum" else None)
+                                       for m in r.medidas]}
+                          for r in getattr(schema, "resumenes", [])]}
+
+def _cabecera(titulo: str) -> list:
+    return [
+        "# " + "=" * 58,
+        f"# {titulo}",
+        "# Fuente: psm_fastapi.api  |  NO EDITAR",
+        "# " + "=" * 58,
+        "",
+    ]
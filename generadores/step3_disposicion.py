@@ -0,0 +1,194 @@
+"""
+PASO 3 — Disposición `routers`
+===============================
+Con `layout : routers` cada recurso va en su propio módulo:
+
+  salida/esquemas/<recurso>.py  →  sus schemas
+  salida/routers/<recurso>.py   →  su APIRouter, almacén y handlers
+  salida/comun.py               →  lo compartido (pool SQLite, cache, JSON)
+  salida/schemas.py             →  reexporta los schemas bajo demanda
+  salida/main.py                →  monta cada router con su primera petición
+
+Cada módulo importa sólo lo que usa su código (IMPORTACIONES).
+"""
+
+from step3_comun import (
+    _cabecera, _con_admision, _con_metricas, _en_sqlite, _psm_recurso,
+    _routes_por_recurso, _schemas_recurso, escribir_si_cambia,
+)
+from step3_middleware import _generar_admision, _generar_metricas
+from step3_modulo import _generar_modulo
+import ast
+import os
+
+# Nombres de comun.py que pueden usar los routers y main.py
+NOMBRES_COMUNES = (
+    "LOTE_MAX", "RespuestaJSON", "_indexar", "_desindexar", "_responder_lista",
+    "_CacheGet", "_Columnas", "_Resumen", "_proyectar", "_respuesta_proyectada",
+    "JSON_PROYECCION", "EXPORTAR_BLOQUE", "RespuestaNDJSON", "_exportar",
+    "_conexion", "_a_fila", "_a_modelo",
+)
+
+# Importaciones candidatas de los módulos de esta disposición: se emite
+# cada una sólo si el código generado usa alguno de sus nombres
+IMPORTACIONES = [
+    ("import {}",                         ("asyncio",)),
+    ("import {}",                         ("fcntl",)),
+    ("import {}",                         ("hashlib",)),
+    ("import {}",                         ("importlib",)),
+    ("import {}",                         ("mmap",)),
+    ("import {}",                         ("os",)),
+    ("import {}",                         ("queue",)),
+    ("import {}",                         ("re",)),
+    ("import {}",                         ("secrets",)),
+    ("import {}",                         ("sqlite3",)),
+    ("import {}",                         ("struct",)),
+    ("import {}",                         ("sys",)),
+    ("import {}",                         ("tempfile",)),
+    ("import {}",                         ("threading",)),
+    ("import {}",                         ("zlib",)),
+    ("from array import {}",              ("array",)),
+    ("from bisect import {}",             ("bisect_left", "bisect_right")),
+    ("from collections import {}",        ("OrderedDict",)),
+    ("from contextlib import {}",         ("contextmanager",)),
+    ("from datetime import {}",           ("datetime",)),
+    ("from functools import {}",          ("lru_cache",)),
+    ("from operator import {}",           ("attrgetter", "itemgetter")),
+    ("from time import {}",               ("perf_counter",)),
+    ("from fastapi import {}",            ("APIRouter", "FastAPI", "HTTPException", "Query",
+                                           "Request", "Response")),
+    ("from fastapi.concurrency import {}", ("run_in_threadpool",)),
+    ("from fastapi.responses import {}",  ("StreamingResponse",)),
+    ("from pydantic import {}",           ("TypeAdapter",)),
+    ("from pydantic_core import {}",      ("to_json", "to_jsonable_python")),
+    ("from itertools import {}",          ("count",)),
+    ("from typing import {}",             ("Any", "Dict", "List", "Literal", "Optional", "Set")),
+]
+
+def _importaciones(cuerpo: list, comun: bool = True) -> list:
+    """
+    Líneas de import para `cuerpo`, según los nombres que lee su código.
+    Se recorre el AST: lo que sólo aparece en cadenas, docstrings o
+    comentarios ("count", "FastAPI no revalida…") no cuenta como uso.
+    """
+    leidos = {n.id for n in ast.walk(ast.parse("\n".join(cuerpo)))
+              if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+    candidatas = IMPORTACIONES + ([("from comun import {}", NOMBRES_COMUNES)] if comun else [])
+
+    lineas = []
+    for plantilla, nombres in candidatas:
+        usados = [n for n in nombres if n in leidos]
+        if usados:
+            lineas.append(plantilla.format(", ".join(usados)))
+    return lineas
+
+def _compactar(lineas: list) -> list:
+    """Como mucho dos líneas en blanco seguidas, como en el resto del código generado."""
+    salida = []
+    for linea in lineas:
+        if linea == "" and salida[-2:] == ["", ""]:
+            continue
+        salida.append(linea)
+    return salida
+
+def _generar_routers(psm_model, ruta_main: str, recursos: set = None) -> list:
+    """
+    main.py + comun.py + routers/<recurso>.py; devuelve las rutas. Con
+    `recursos` sólo se regeneran los routers de esos recursos.
+    """
+    salida     = os.path.dirname(ruta_main)
+    directorio = os.path.join(salida, "routers")
+    os.makedirs(directorio, exist_ok=True)
+    rutas = [ruta_main, os.path.join(salida, "comun.py"), os.path.join(directorio, "__init__.py")]
+
+    cuerpo = _generar_modulo(psm_model, por_recurso=False)
+    escribir_si_cambia(rutas[1], "\n".join(_compactar(
+        _cabecera("CÓDIGO COMÚN A LOS ROUTERS — GENERADO AUTOMÁTICAMENTE")
+        + _importaciones(cuerpo, comun=False) + ["", ""] + cuerpo + [""])))
+    escribir_si_cambia(rutas[2], "# Un APIRouter por recurso — GENERADO AUTOMÁTICAMENTE\n")
+
+    routes = _routes_por_recurso(psm_model)
+    for schema in psm_model.schemas:
+        modulo  = schema.name.lower()
+        rutas.append(os.path.join(directorio, f"{modulo}.py"))
+        if recursos is not None and schema.name not in recursos:
+            continue
+        parcial = _psm_recurso(psm_model, schema, routes)
+        cuerpo  = ["router = APIRouter()", ""]
+        cuerpo += _generar_modulo(parcial, compartido=False, destino="router")
+        lineas  = _cabecera(f"ROUTER {schema.name.upper()} — GENERADO AUTOMÁTICAMENTE") + _importaciones(cuerpo)
+        lineas.append(f"from esquemas.{modulo} import {', '.join(_schemas_recurso(parcial))}")
+        lineas += ["", ""] + cuerpo
+        escribir_si_cambia(rutas[-1], "\n".join(_compactar(lineas)))
+
+    escribir_si_cambia(ruta_main, "\n".join(_main_routers(psm_model)))
+    return rutas
+
+def _main_routers(psm_model) -> list:
+    """main.py de la disposición `routers`: monta los routers, por defecto bajo demanda."""
+    prefijo = psm_model.name.upper()
+    sqlite  = _en_sqlite(psm_model)
+
+    cuerpo = []
+    cuerpo.append(f'app = FastAPI(title="{psm_model.name}", version="1.0.0")')
+    cuerpo.append("")
+    cuerpo.append("# Primer segmento de la ruta → módulo de su router")
+    cuerpo.append("ROUTERS = {")
+    routes = _routes_por_recurso(psm_model)
+    for schema in psm_model.schemas:
+        rutas_recurso = routes.get(schema.name)
+        if rutas_recurso:
+            segmento = rutas_recurso[0].path.strip("/").split("/")[0]
+            cuerpo.append(f'    "{segmento}": "routers.{schema.name.lower()}",')
+    cuerpo.append("}")
+    cuerpo.append("")
+    cuerpo.append("# Con carga perezosa (por defecto) cada router, con sus schemas y su")
+    cuerpo.append("# almacén, se importa con la primera petición a su prefijo: el")
+    cuerpo.append("# arranque de cada worker no crece con el número de recursos.")
+    cuerpo.append(f"# {prefijo}_LAZY_ROUTERS=0 los monta todos al arrancar.")
+    cuerpo.append(f'CARGA_PEREZOSA = os.environ.get("{prefijo}_LAZY_ROUTERS", "1") != "0"')
+    cuerpo.append("")
+    cuerpo.append("_montados = set()")
+    cuerpo.append("")
+    cuerpo.append("def montar(segmento: str):")
+    cuerpo.append("    if segmento not in _montados:")
+    cuerpo.append("        app.include_router(importlib.import_module(ROUTERS[segmento]).router)")
+    cuerpo.append("        _montados.add(segmento)")
+    cuerpo.append("")
+    cuerpo.append("def montar_todos():")
+    cuerpo.append("    for segmento in ROUTERS:")
+    cuerpo.append("        montar(segmento)")
+    cuerpo.append("")
+    cuerpo.append("class MiddlewareCargaPerezosa:")
+    cuerpo.append('    """Monta el router de la ruta pedida; /openapi.json necesita todos."""')
+    cuerpo.append("    def __init__(self, app):")
+    cuerpo.append("        self.app = app")
+    cuerpo.append("")
+    cuerpo.append("    async def __call__(self, scope, receive, send):")
+    cuerpo.append('        if scope["type"] == "http":')
+    cuerpo.append('            segmento = scope["path"].split("/", 2)[1]')
+    cuerpo.append("            if segmento in ROUTERS:")
+    cuerpo.append("                montar(segmento)")
+    cuerpo.append('            elif scope["path"] == app.openapi_url:')
+    cuerpo.append("                montar_todos()")
+    cuerpo.append("        await self.app(scope, receive, send)")
+    cuerpo.append("")
+    cuerpo.append("if CARGA_PEREZOSA:")
+    cuerpo.append("    app.add_middleware(MiddlewareCargaPerezosa)")
+    cuerpo.append("else:")
+    cuerpo.append("    montar_todos()")
+    if _con_admision(psm_model):
+        cuerpo += _generar_admision(psm_model)
+    if _con_metricas(psm_model):
+        modulos = {s.name: f"routers.{s.name.lower()}" for s in psm_model.schemas}
+        cuerpo += _generar_metricas(psm_model, sqlite, modulos)
+
+    lineas = _cabecera("APLICACIÓN FASTAPI — GENERADA AUTOMÁTICAMENTE")
+    lineas[-1:-1] = [
+        "# Un router por recurso en routers/; aquí sólo se montan.",
+        "# Para ejecutar:",
+        "#   pip install fastapi uvicorn",
+        "#   uvicorn main:app --reload",
+        "# " + "=" * 58,
+    ]
+    return lineas + _importaciones(cuerpo) + ["", ""] + cuerpo + [""]
@@ -0,0 +1,230 @@
+"""
+PASO 3 — Middlewares ASGI de la app generada
+=============================================
+Con `metrics : prometheus` main.py incluye un middleware ASGI que mide
+cada ruta del PSM y las expone en GET /metrics (formato de texto de
+Prometheus).
+
+Las routes con `admission : concurrency N queue M` pasan por otro
+middleware, antes del routing: como mucho N peticiones en curso y M
+esperando turno por worker; con la ruta saturada responde 503 con
+Retry-After al momento y cuenta el rechazo, sin ocupar un hilo ni el
+almacén, así una ráfaga de escrituras no dispara la latencia de las
+lecturas.
+"""
+
+from step3_comun import _con_admision, _generar_nombre_funcion
+import re
+
+# Límites (segundos) de las cubetas del histograma de latencia
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Segundos que el 503 de una ruta saturada pide esperar (Retry-After)
+RETRY_AFTER = 1
+
+def _patron_ruta(path: str) -> str:
+    """/pedidos/{pedido_id} → /pedidos/[^/]+ (para re.fullmatch)"""
+    return "/".join("[^/]+" if re.fullmatch(r"\{\w+\}", p) else re.escape(p)
+                    for p in path.split("/"))
+
+def _generar_admision(psm_model) -> list:
+    """
+    Middleware ASGI de control de admisión con los límites `admission`
+    de cada route. Decide antes del routing, con el método y la ruta,
+    así una petición rechazada no llega a FastAPI.
+    """
+    metodos = {}
+    # Rutas literales antes que las de {param}, como en el registro de routes
+    for route in sorted(psm_model.routes, key=lambda r: bool(r.path_param)):
+        admission = getattr(route, "admission", None)
+        if admission:
+            metodos.setdefault(route.method, []).append((route, admission))
+
+    lineas = []
+    lineas.append("")
+    lineas.append("")
+    lineas.append("# Control de admisión: cada ruta limitada atiende `concurrencia`")
+    lineas.append("# peticiones a la vez y deja esperar `cola`; las demás reciben 503 con")
+    lineas.append("# Retry-After sin llegar al handler. Corre en el event loop: los")
+    lineas.append("# contadores no necesitan lock. Con varios workers, límites por proceso.")
+    lineas.append(f"RETRY_AFTER = {RETRY_AFTER}   # segundos")
+    lineas.append('_CUERPO_SATURADA = b\'{"detail":"Ruta saturada, reintente tras Retry-After"}\'')
+    lineas.append("_SATURADA = (")
+    lineas.append('    {"type": "http.response.start", "status": 503, "headers": [')
+    lineas.append('        (b"content-type", b"application/json"),')
+    lineas.append('        (b"content-length", str(len(_CUERPO_SATURADA)).encode()),')
+    lineas.append('        (b"retry-after", str(RETRY_AFTER).encode()),')
+    lineas.append("    ]},")
+    lineas.append('    {"type": "http.response.body", "body": _CUERPO_SATURADA},')
+    lineas.append(")")
+    lineas.append("")
+    lineas.append("class _Admision:")
+    lineas.append("    def __init__(self, ruta: str, patron: str, concurrencia: int, cola: int):")
+    lineas.append("        self.ruta       = ruta               # handler, como en las métricas")
+    lineas.append("        self.patron     = re.compile(patron)")
+    lineas.append("        self.turnos     = asyncio.Semaphore(concurrencia)")
+    lineas.append("        self.plazas     = concurrencia + cola")
+    lineas.append("        self.dentro     = 0                  # en curso + esperando turno")
+    lineas.append("        self.rechazadas = 0")
+    lineas.append("")
+    lineas.append("ADMISION = {")
+    for metodo, routes in metodos.items():
+        lineas.append(f'    "{metodo}": [')
+        for route, admission in routes:
+            func_name = _generar_nombre_funcion(route.method.lower(), route.path)
+            lineas.append(f'        _Admision("{func_name}", r"{_patron_ruta(route.path)}", '
+                          f"{admission.concurrency}, {admission.queue}),")
+        lineas.append("    ],")
+    lineas.append("}")
+    lineas.append("_ADMISIONES = [a for limitadas in ADMISION.values() for a in limitadas]")
+    lineas.append("")
+    lineas.append("class MiddlewareAdmision:")
+    lineas.append("    def __init__(self, app):")
+    lineas.append("        self.app = app")
+    lineas.append("")
+    lineas.append("    async def __call__(self, scope, receive, send):")
+    lineas.append('        if scope["type"] != "http":')
+    lineas.append("            return await self.app(scope, receive, send)")
+    lineas.append('        admision = next((a for a in ADMISION.get(scope["method"], ())')
+    lineas.append('                         if a.patron.fullmatch(scope["path"])), None)')
+    lineas.append("        if admision is None:")
+    lineas.append("            return await self.app(scope, receive, send)")
+    lineas.append("        if admision.dentro >= admision.plazas:")
+    lineas.append("            admision.rechazadas += 1")
+    lineas.append("            for mensaje in _SATURADA:")
+    lineas.append("                await send(mensaje)")
+    lineas.append("            return")
+    lineas.append("        admision.dentro += 1")
+    lineas.append("        try:")
+    lineas.append("            async with admision.turnos:")
+    lineas.append("                await self.app(scope, receive, send)")
+    lineas.append("        finally:")
+    lineas.append("            admision.dentro -= 1")
+    lineas.append("")
+    lineas.append("app.add_middleware(MiddlewareAdmision)")
+    return lineas
+
+def _generar_metricas(psm_model, sqlite: bool, modulos: dict = None) -> list:
+    """
+    Middleware ASGI + GET /metrics. Las etiquetas de cada ruta se fijan
+    aquí desde el PSM (nombre del handler → route, method, path): en cada
+    petición el middleware sólo busca el handler que resolvió el router.
+    Con `modulos` (disposición routers) los almacenes en memoria se leen
+    de routers/<recurso>.py, si ya se montó.
+    """
+    lineas = []
+    lineas.append("")
+    lineas.append("")
+    lineas.append("# Métricas Prometheus: latencia por ruta, peticiones por código de")
+    lineas.append("# estado y elementos en cada almacén, en GET /metrics.")
+    lineas.append("# El middleware corre en el event loop, igual que /metrics: los")
+    lineas.append("# contadores no necesitan lock. Con varios workers cada proceso")
+    lineas.append("# expone los suyos.")
+    limites = ", ".join(str(l) for l in LIMITES_LATENCIA)
+    lineas.append(f"LIMITES_LATENCIA = ({limites})")
+    lineas.append('_LE = [*map(str, LIMITES_LATENCIA), "+Inf"]')
+    lineas.append("")
+    lineas.append("ETIQUETAS_RUTA = {")
+    for route in psm_model.routes:
+        func_name = _generar_nombre_funcion(route.method.lower(), route.path)
+        lineas.append(f'    "{func_name}": \'route="{func_name}",method="{route.method}",'
+                      f'path="{route.path}"\',')
+    lineas.append("}")
+    lineas.append("ETIQUETAS_OTRAS = 'route=\"otras\"'   # 404, /docs, /metrics…")
+    lineas.append("")
+    lineas.append("_latencias  = {e: [0] * len(_LE) for e in [*ETIQUETAS_RUTA.values(), ETIQUETAS_OTRAS]}")
+    lineas.append("_sumas      = dict.fromkeys(_latencias, 0.0)")
+    lineas.append("_peticiones = {}   # (etiquetas, status) → total")
+    lineas.append("")
+    lineas.append("class MiddlewareMetricas:")
+    lineas.append("    def __init__(self, app):")
+    lineas.append("        self.app = app")
+    lineas.append("")
+    lineas.append("    async def __call__(self, scope, receive, send):")
+    lineas.append('        if scope["type"] != "http":')
+    lineas.append("            return await self.app(scope, receive, send)")
+    lineas.append("        estado = [500]")
+    lineas.append("")
+    lineas.append("        async def enviar(mensaje):")
+    lineas.append('            if mensaje["type"] == "http.response.start":')
+    lineas.append('                estado[0] = mensaje["status"]')
+    lineas.append("            await send(mensaje)")
+    lineas.append("")
+    lineas.append("        inicio = perf_counter()")
+    lineas.append("        try:")
+    lineas.append("            await self.app(scope, receive, enviar)")
+    lineas.append("        finally:")
+    lineas.append("            duracion  = perf_counter() - inicio")
+    lineas.append("            # El router deja en el scope el handler que resolvió")
+    lineas.append('            handler   = getattr(scope.get("endpoint"), "__name__", None)')
+    lineas.append("            etiquetas = ETIQUETAS_RUTA.get(handler, ETIQUETAS_OTRAS)")
+    lineas.append("            _latencias[etiquetas][bisect_left(LIMITES_LATENCIA, duracion)] += 1")
+    lineas.append("            _sumas[etiquetas] += duracion")
+    lineas.append("            clave = (etiquetas, estado[0])")
+    lineas.append("            _peticiones[clave] = _peticiones.get(clave, 0) + 1")
+    lineas.append("")
+    lineas.append("app.add_middleware(MiddlewareMetricas)")
+    lineas.append("")
+    if modulos and not sqlite:
+        lineas.append("def _tamano(modulo: str, almacen: str) -> int:")
+        lineas.append('    """Elementos del almacén de un router; 0 si aún no se montó."""')
+        lineas.append("    cargado = sys.modules.get(modulo)")
+        lineas.append("    return len(getattr(cargado, almacen)) if cargado else 0")
+        lineas.append("")
+    lineas.append("def _tamanos_almacenes() -> dict:")
+    if sqlite:
+        lineas.append("    with _conexion() as con:")
+        lineas.append("        return {")
+        for schema in psm_model.schemas:
+            tabla = f"{schema.name.lower()}s"
+            lineas.append(f'            "{schema.name}": '
+                          f'con.execute("SELECT COUNT(*) FROM {tabla}").fetchone()[0],')
+        lineas.append("        }")
+    else:
+        lineas.append("    return {")
+        for schema in psm_model.schemas:
+            db_name = f"{schema.name.lower()}s_db"
+            if modulos:
+                lineas.append(f'        "{schema.name}": _tamano("{modulos[schema.name]}", "{db_name}"),')
+            else:
+                lineas.append(f'        "{schema.name}": len({db_name}),')
+        lineas.append("    }")
+    lineas.append("")
+    lineas.append('@app.get("/metrics", include_in_schema=False)')
+    lineas.append("async def metricas():")
+    lineas.append('    """Métricas en formato de texto de Prometheus"""')
+    if sqlite:
+        lineas.append("    tamanos = await run_in_threadpool(_tamanos_almacenes)")
+    else:
+        lineas.append("    tamanos = _tamanos_almacenes()")
+    lineas.append("    lineas  = [")
+    lineas.append('        "# HELP http_requests_total Peticiones HTTP por ruta y código de estado.",')
+    lineas.append('        "# TYPE http_requests_total counter",')
+    lineas.append("    ]")
+    lineas.append("    for (etiquetas, estado), total in _peticiones.items():")
+    lineas.append("        lineas.append(f'http_requests_total{{{etiquetas},status=\"{estado}\"}} {total}')")
+    lineas.append('    lineas.append("# HELP http_request_duration_seconds Latencia de cada ruta.")')
+    lineas.append('    lineas.append("# TYPE http_request_duration_seconds histogram")')
+    lineas.append("    for etiquetas, cubetas in _latencias.items():")
+    lineas.append("        acumulado = 0")
+    lineas.append("        for le, n in zip(_LE, cubetas):")
+    lineas.append("            acumulado += n")
+    lineas.append("            lineas.append(f'http_request_duration_seconds_bucket{{{etiquetas},le=\"{le}\"}} {acumulado}')")
+    lineas.append("        lineas.append(f'http_request_duration_seconds_sum{{{etiquetas}}} {_sumas[etiquetas]}')")
+    lineas.append("        lineas.append(f'http_request_duration_seconds_count{{{etiquetas}}} {acumulado}')")
+    lineas.append('    lineas.append("# HELP app_store_items Elementos en cada almacén.")')
+    lineas.append('    lineas.append("# TYPE app_store_items gauge")')
+    lineas.append("    for recurso, total in tamanos.items():")
+    lineas.append("        lineas.append(f'app_store_items{{resource=\"{recurso}\"}} {total}')")
+    if _con_admision(psm_model):
+        lineas.append('    lineas.append("# HELP http_admission_rejected_total Peticiones rechazadas con 503 por ruta saturada.")')
+        lineas.append('    lineas.append("# TYPE http_admission_rejected_total counter")')
+        lineas.append("    for admision in _ADMISIONES:")
+        lineas.append("        lineas.append(f'http_admission_rejected_total{{{ETIQUETAS_RUTA[admision.ruta]}}} {admision.rechazadas}')")
+        lineas.append('    lineas.append("# HELP http_admission_inside Peticiones en curso o esperando turno en cada ruta limitada.")')
+        lineas.append('    lineas.append("# TYPE http_admission_inside gauge")')
+        lineas.append("    for admision in _ADMISIONES:")
+        lineas.append("        lineas.append(f'http_admission_inside{{{ETIQUETAS_RUTA[admision.ruta]}}} {admision.dentro}')")
+    lineas.append('    return Response("\\n".join(lineas) + "\\n",')
+    lineas.append('                    media_type="text/plain; version=0.0.4; charset=utf-8")')
+    return lineas
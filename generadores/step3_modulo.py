@@ -0,0 +1,562 @@
+"""
+PASO 3 — Cuerpo de main.py (o de comun.py y cada router)
+==========================================================
+Todo lo que sigue a las importaciones: constantes, serialización JSON,
+cache de GET con ETag, proyección `?fields=`, exportación NDJSON, el
+almacén (step3_almacen_memoria / step3_almacen_sqlite), los middlewares
+(step3_middleware) y un handler por route del PSM.
+"""
+
+from step3_comun import (
+    _con_admision, _con_metricas, _describir_almacen, _en_sqlite, _entre_procesos,
+    _es_agregado, _es_exportacion, _es_lote, _es_proyectable, _generar_nombre_funcion,
+    _inferir_resource, _recursos_exportados, _recursos_lote, _recursos_paginados,
+    _recursos_proyectados, _serializacion_rapida,
+)
+from step3_almacen_memoria import _generar_almacen_memoria, _generar_cuerpo
+from step3_almacen_sqlite import (
+    _generar_almacen_sqlite, _generar_cuerpo_sqlite, _modelos_sqlite,
+)
+from step3_middleware import _generar_admision, _generar_metricas
+import re
+
+# Elementos máximos por petición de lote (POST /bulk y GET /bulk?ids=)
+LOTE_MAX = 1000
+
+# Exportación NDJSON (GET /recursos/export): elementos por trozo enviado
+# y nivel de gzip cuando el cliente lo acepta
+EXPORTAR_BLOQUE = 1000
+GZIP_NIVEL      = 6
+
+def _generar_modulo(psm_model, compartido: bool = True, por_recurso: bool = True,
+                    destino: str = "app") -> list:
+    """
+    Todo lo que sigue a las importaciones de main.py. Con la disposición
+    `routers` se llama por separado para comun.py (sólo `compartido`) y
+    para cada router (sólo `por_recurso`, sobre _psm_recurso y con
+    decoradores `@router.`).
+    """
+    paginados = _recursos_paginados(psm_model)
+    lotes     = _recursos_lote(psm_model)
+    modelos   = {s.name for s in psm_model.schemas}   # con TypeAdapter JSON_<SCHEMA>
+
+    asincrono = psm_model.platform == "fastapi-async"
+    almacenes = {s.name: _describir_almacen(s, paginados, lotes) for s in psm_model.schemas}
+    cacheados = [r for r, a in almacenes.items() if a["cache"]]
+    sqlite    = _en_sqlite(psm_model)
+    procesos  = _entre_procesos(psm_model)
+    rapido    = _serializacion_rapida(psm_model)
+    metricas  = _con_metricas(psm_model)
+
+    lineas = []
+    if lotes and compartido:
+        lineas.append(f"LOTE_MAX = {LOTE_MAX}   # elementos por petición de lote")
+        lineas.append("")
+    if _recursos_exportados(psm_model) and compartido:
+        lineas += _generar_exportacion()
+    if rapido and compartido:
+        lineas.append("class RespuestaJSON(Response):")
+        lineas.append('    """')
+        lineas.append("    JSON con pydantic-core. Los handlers la devuelven directamente, así")
+        lineas.append("    FastAPI no revalida contra response_model objetos que ya se")
+        lineas.append("    validaron al entrar al almacén. Con `adaptador` se serializa con")
+        lineas.append("    el esquema ya compilado; sin él, infiriendo tipos (dicts).")
+        lineas.append('    """')
+        lineas.append('    media_type = "application/json"')
+        lineas.append("")
+        lineas.append("    def __init__(self, content, adaptador: TypeAdapter = None, **kwargs):")
+        lineas.append("        self.adaptador = adaptador")
+        lineas.append("        super().__init__(content, **kwargs)")
+        lineas.append("")
+        lineas.append("    def render(self, content) -> bytes:")
+        lineas.append("        if self.adaptador is not None:")
+        lineas.append("            return self.adaptador.dump_json(content)")
+        lineas.append("        return to_json(content)")
+        lineas.append("")
+    if rapido and por_recurso:
+        for schema in psm_model.schemas:
+            const = schema.name.upper()
+            lineas.append(f"JSON_{const} = TypeAdapter({schema.name})")
+            lineas.append(f"JSON_{const}_LISTA = TypeAdapter(List[{schema.name}])")
+        lineas.append("")
+        lineas.append("")
+
+    if sqlite:
+        lineas += _generar_almacen_sqlite(psm_model, almacenes, asincrono, rapido,
+                                          compartido, por_recurso)
+    else:
+        lineas += _generar_almacen_memoria(psm_model, almacenes, paginados, asincrono,
+                                           compartido, por_recurso)
+    if cacheados:
+        lineas += _generar_cache_get(almacenes, asincrono and sqlite, compartido, por_recurso,
+                                     procesos)
+    proyectados = _recursos_proyectados(psm_model)
+    if proyectados and compartido:
+        lineas += _generar_proyeccion(bool(cacheados), sqlite)
+    if proyectados and por_recurso:
+        lineas.append("")
+        lineas.append("# Campos que admite `?fields=` en los GET de cada recurso")
+        for schema in psm_model.schemas:
+            if schema.name in proyectados:
+                lineas.append(f'CAMPOS_{schema.name.upper()} = '
+                              f'"{_patron_campos([f.name for f in schema.fields])}"')
+    # Admisión antes que métricas: el middleware de métricas queda por
+    # fuera y también cuenta los 503 de las rutas saturadas
+    if _con_admision(psm_model) and compartido and por_recurso:
+        lineas += _generar_admision(psm_model)
+    if metricas and compartido and por_recurso:
+        lineas += _generar_metricas(psm_model, sqlite)
+
+    if not por_recurso:
+        return lineas
+
+    lineas.append("")
+    lineas.append("")
+
+    # Generar cada route. Las de lote, agregados y exportación van
+    # primero: GET /recursos/bulk, /recursos/aggregate y /recursos/export
+    # deben registrarse antes que GET /recursos/{id}, que también los
+    # capturaría.
+    for route in sorted(psm_model.routes,
+                        key=lambda r: not (_es_lote(r) or _es_agregado(r) or _es_exportacion(r))):
+        method   = route.method.lower()
+        path     = route.path
+        summary  = route.summary
+        status   = route.status
+        response = route.response
+
+        # Tipo de respuesta
+        if response.list and route.pagination:
+            resp_type = f"{response.name}Pagina"
+        elif response.list:
+            resp_type = f"List[{response.name}]"
+        elif response.name == "dict":
+            resp_type = "dict"
+        else:
+            resp_type = response.name
+
+        resource   = _inferir_resource(path)
+        func_name  = _generar_nombre_funcion(method, path)
+        almacen    = almacenes.get(resource, {})
+        exportacion = _es_exportacion(route)
+        # La exportación no pasa por la cache: se genera según se envía
+        cache      = f"{resource.lower()}s_cache" if almacen.get("cache") and not exportacion else None
+
+        # Respuestas cacheadas: se serializan una vez con su TypeAdapter
+        if cache and method == "get":
+            lineas.append(f"_respuesta_{func_name} = TypeAdapter({resp_type})")
+            lineas.append("")
+
+        # Decorador
+        if exportacion:
+            lineas.append(f'@{destino}.{method}("{path}", response_class=RespuestaNDJSON)')
+        elif status != 200:
+            lineas.append(f'@{destino}.{method}("{path}", response_model={resp_type}, status_code={status})')
+        else:
+            lineas.append(f'@{destino}.{method}("{path}", response_model={resp_type})')
+
+        # Firma de la función
+        args       = ["request: Request"] if (cache and method == "get") or exportacion else []
+
+        if route.path_param:
+            args.append(f"{route.path_param.name}: {route.path_param.type}")
+        query = getattr(route, "query_param", None)
+        if query and query.list:
+            args.append(f"{query.name}: List[{query.type}] = Query(...)")
+        elif query:
+            args.append(f"{query.name}: {query.type}")
+        if route.body and getattr(route.body, "list", False):
+            args.append(f"data: List[{route.body.type}]")
+        elif route.body:
+            args.append(f"data: {route.body.type}")
+        if route.pagination:
+            pag = route.pagination
+            args.append(f"limit: int = Query({pag.limit}, ge=1, le={pag.max})")
+            args.append("cursor: Optional[int] = None")
+        if _es_agregado(route):
+            columnar = almacen["columnar"]
+            campos   = ", ".join(f'"{c}"' for c in columnar["campos"])
+            args.append(f'field: Literal[{campos}] = "{columnar["campos"][0]}"')
+            if columnar["grupos"]:
+                grupos = ", ".join(f'"{g}"' for g in columnar["grupos"])
+                args.append(f"group_by: Optional[Literal[{grupos}]] = None")
+        elif method == "get" and not route.path_param and not query and not exportacion:
+            for idx in almacen.get("indices", []):
+                if idx["filtro"]:
+                    args.append(f"{idx['campo']}: Optional[{idx['tipo']}] = None")
+        proyectable = _es_proyectable(route, almacen)
+        if proyectable:
+            args.append(f"fields: Optional[str] = Query(None, pattern=CAMPOS_{resource.upper()})")
+
+        prefijo = "async def" if asincrono else "def"
+        lineas.append(f'{prefijo} {func_name}({", ".join(args)}):')
+        lineas.append(f'    """{summary}"""')
+
+        # Cuerpo stub con lógica simulada
+        if sqlite:
+            cuerpo = _generar_cuerpo_sqlite(method, resource, route, almacen)
+        else:
+            db_name = f"{resource.lower()}s_db"
+            cuerpo  = _generar_cuerpo(method, resource, db_name, route, almacen,
+                                      asincrono and not (cache and method == "get"))
+        if proyectable:
+            # Con la cache, consulta() devuelve la proyección y la serializa _CacheGet
+            envoltura = "_proyectar" if cache else "_respuesta_proyectada"
+            if sqlite:
+                const  = f"{resource.lower()}s".upper()
+                cuerpo = _con_proyeccion(cuerpo, envoltura, _modelos_sqlite(resource),
+                                         f"{const}_COLUMNAS")
+            else:
+                cuerpo = _con_proyeccion(cuerpo, envoltura)
+        if rapido and not (cache and method == "get") and not exportacion:
+            cuerpo = _respuesta_directa(cuerpo, status, _adaptador_json(resp_type, modelos))
+        if cache and method != "get":
+            # Toda escritura que llega a responder invalida las lecturas cacheadas
+            cuerpo = [l for linea in cuerpo for l in (
+                [f"    {cache}.invalidar()", linea] if linea.startswith("    return ") else [linea]
+            )]
+        if cache and method == "get":
+            espera = "await " if asincrono and sqlite else ""
+            estado = f", {status}" if status != 200 else ""
+            adaptador = f"_respuesta_{func_name}"
+            if proyectable:
+                adaptador = f"{adaptador} if fields is None else JSON_PROYECCION"
+            cuerpo = (["    def consulta():"]
+                      + ["    " + l for l in cuerpo]
+                      + [f"    return {espera}{cache}.responder(request, consulta, "
+                         f"{adaptador}{estado})"])
+        elif sqlite and asincrono and not exportacion:
+            # sqlite3 bloquea: la consulta entera va al threadpool
+            cuerpo = (["    def consulta():"]
+                      + ["    " + l for l in cuerpo]
+                      + ["    return await run_in_threadpool(consulta)"])
+        lineas += cuerpo
+
+        lineas.append("")
+        lineas.append("")
+
+    return lineas
+
+
+def _adaptador_json(resp_type: str, schemas: set):
+    """
+    JSON_<SCHEMA>[_LISTA] si la respuesta es uno de `schemas` (los del
+    PSM) o una lista de ellos; si no (sobres, dicts), None.
+    """
+    if resp_type in schemas:
+        return f"JSON_{resp_type.upper()}"
+    if resp_type.startswith("List[") and resp_type[5:-1] in schemas:
+        return f"JSON_{resp_type[5:-1].upper()}_LISTA"
+    return None
+
+def _respuesta_directa(cuerpo: list, status: int, adaptador: str = None) -> list:
+    """
+    `return valor` → `return RespuestaJSON(valor)`, también los `return {`
+    de varias líneas. Los `return await ...` y `return _respuesta_proyectada(...)`
+    ya devuelven una Response.
+    """
+    extra   = f", {adaptador}" if adaptador else ""
+    extra  += f", status_code={status}" if status != 200 else ""
+    salida  = []
+    abierto = None
+    for linea in cuerpo:
+        sangria = linea[:len(linea) - len(linea.lstrip())]
+        expr    = linea.strip()
+        if abierto is not None and linea == f"{abierto}}}":
+            salida.append(f"{abierto}}}{extra})")
+            abierto = None
+        elif expr == "return {":
+            salida.append(f"{sangria}return RespuestaJSON({{")
+            abierto = sangria
+        elif expr.startswith("return ") and not expr.startswith(("return await ",
+                                                                  "return _respuesta_proyectada(")):
+            salida.append(f"{sangria}return RespuestaJSON({expr[len('return '):]}{extra})")
+        else:
+            salida.append(linea)
+    return salida
+
+def _con_proyeccion(cuerpo: list, envoltura: str, filas: dict = None,
+                    columnas: str = None) -> list:
+    """
+    GET con `?fields=`: delante de cada `return valor` del cuerpo, si llegó
+    `fields` se devuelve `envoltura(fields, valor)`; las páginas (`return {`
+    de varias líneas) se repiten con sus elementos proyectados y los
+    listados async se proyectan antes de _responder_lista. Con SQLite
+    (`filas` de _modelos_sqlite y `columnas`) cada valor que construye
+    modelos se cambia por las filas de las que salen.
+    """
+    extra = f", {columnas}" if columnas else ""
+    filas = filas or {}
+
+    def proyectada(expr: str) -> str:
+        return filas.get(expr, expr)
+
+    def entrada(linea: str) -> str:
+        """`"clave": valor,` de una página, con el valor proyectado."""
+        clave, valor = linea.split(": ", 1)
+        return f"{clave}: {proyectada(valor.removesuffix(','))},"
+
+    def proyectar(sangria: str, valor: str) -> list:
+        return [f"{sangria}if fields is not None:",
+                f"{sangria}    return {envoltura}(fields, {valor}{extra})"]
+
+    salida = []
+    bloque = None
+    for linea in cuerpo:
+        sangria = linea[:len(linea) - len(linea.lstrip())]
+        expr    = linea.strip()
+        lista   = re.fullmatch(r"return await _responder_lista\(\w+, (\w+)\)", expr)
+        if bloque is not None:
+            bloque.append(linea)
+            if linea == f"{abierto}}}":
+                salida += [f"{abierto}if fields is not None:",
+                           f"{abierto}    return {envoltura}(fields, {{"]
+                salida += ["    " + entrada(l) for l in bloque[1:-1]]
+                salida += [f"{abierto}    }}{extra})"] + bloque
+                bloque = None
+        elif expr == "return {":
+            bloque, abierto = [linea], sangria
+        elif lista:
+            salida += proyectar(sangria, lista.group(1)) + [linea]
+        elif expr.startswith("return "):
+            salida += proyectar(sangria, proyectada(expr[len("return "):])) + [linea]
+        else:
+            salida.append(linea)
+    return salida
+
+def _generar_proyeccion(cacheados: bool, sqlite: bool) -> list:
+    """Helpers de `?fields=`: un attrgetter/itemgetter por combinación de campos."""
+    columnas = ", columnas: tuple" if sqlite else ""
+    pasar    = ", columnas" if sqlite else ""
+    getter   = "itemgetter" if sqlite else "attrgetter"
+    lineas = []
+    lineas.append("")
+    lineas.append("")
+    lineas.append("# Proyección `?fields=a,b` de los GET de cada recurso. Cada combinación")
+    lineas.append(f"# pedida prepara una vez un {getter} con sus campos, que los lee")
+    lineas.append("# en C por elemento. El patrón de la query (CAMPOS_<RECURSO>) ya")
+    lineas.append("# limita los nombres a campos del schema.")
+    lineas.append("@lru_cache(maxsize=256)")
+    lineas.append(f"def _proyeccion(fields: str{columnas}):")
+    lineas.append('    campos  = tuple(dict.fromkeys(fields.split(",")))')
+    if sqlite:
+        lineas.append("    # Filas (pk, columnas...): sin construir el modelo de cada una")
+        lineas.append("    valores = itemgetter(*(columnas.index(c) + 1 for c in campos))")
+    else:
+        lineas.append("    valores = attrgetter(*campos)")
+    lineas.append("    if len(campos) == 1:   # con un solo campo devuelve el valor, no una tupla")
+    lineas.append("        campo = campos[0]")
+    lineas.append("        return lambda x: {campo: valores(x)}")
+    lineas.append("    return lambda x: dict(zip(campos, valores(x)))")
+    lineas.append("")
+    lineas.append(f"def _proyectar(fields: str, datos{columnas}):")
+    lineas.append('    """Un elemento, una lista o una página {items, next_cursor} con sólo `fields`."""')
+    lineas.append(f"    proyeccion = _proyeccion(fields{pasar})")
+    lineas.append("    if isinstance(datos, dict):")
+    lineas.append('        return {**datos, "items": list(map(proyeccion, datos["items"]))}')
+    lineas.append("    if isinstance(datos, list):")
+    lineas.append("        return list(map(proyeccion, datos))")
+    lineas.append("    return proyeccion(datos)")
+    lineas.append("")
+    lineas.append(f"def _respuesta_proyectada(fields: str, datos{columnas}) -> Response:")
+    lineas.append(f"    return Response(to_json(_proyectar(fields, datos{pasar})), "
+                  f'media_type="application/json")')
+    if cacheados:
+        lineas.append("")
+        lineas.append("JSON_PROYECCION = TypeAdapter(Any)   # _CacheGet: la proyección ya son dicts")
+    return lineas
+
+def _generar_exportacion() -> list:
+    """Respuesta NDJSON en streaming de GET /recursos/export, con gzip negociado."""
+    lineas = []
+    bloque, nivel = f"EXPORTAR_BLOQUE = {EXPORTAR_BLOQUE}", f"GZIP_NIVEL      = {GZIP_NIVEL}"
+    ancho = max(len(bloque), len(nivel))
+    lineas.append(f"{bloque:<{ancho}}   # elementos por trozo de NDJSON")
+    lineas.append(f"{nivel:<{ancho}}   # 1 rápido … 9 compacto")
+    lineas.append("")
+    lineas.append("class RespuestaNDJSON(StreamingResponse):")
+    lineas.append('    media_type = "application/x-ndjson"')
+    lineas.append("")
+    lineas.append("def _acepta_gzip(request: Request) -> bool:")
+    lineas.append('    """Accept-Encoding incluye gzip (o *) con q > 0."""')
+    lineas.append('    for opcion in request.headers.get("accept-encoding", "").split(","):')
+    lineas.append('        nombre, _, q = opcion.replace(" ", "").lower().partition(";q=")')
+    lineas.append('        if nombre in ("gzip", "*"):')
+    lineas.append("            try:")
+    lineas.append('                return float(q or "1") > 0')
+    lineas.append("            except ValueError:")
+    lineas.append("                return False")
+    lineas.append("    return False")
+    lineas.append("")
+    lineas.append("def _gzip(trozos):")
+    lineas.append('    """Comprime cada trozo según llega; Z_SYNC_FLUSH lo deja listo para enviarse."""')
+    lineas.append("    compresor = zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 31)   # 31 → formato gzip")
+    lineas.append("    for trozo in trozos:")
+    lineas.append("        yield compresor.compress(trozo) + compresor.flush(zlib.Z_SYNC_FLUSH)")
+    lineas.append("    yield compresor.flush()")
+    lineas.append("")
+    lineas.append("def _exportar(request: Request, trozos) -> RespuestaNDJSON:")
+    lineas.append('    """')
+    lineas.append("    Envía `trozos` (bytes NDJSON) según se generan. Son generadores")
+    lineas.append("    síncronos: Starlette pide cada uno en el threadpool, así la lectura")
+    lineas.append("    del almacén y la compresión no bloquean el event loop.")
+    lineas.append('    """')
+    lineas.append('    cabeceras = {"Vary": "Accept-Encoding"}')
+    lineas.append("    if _acepta_gzip(request):")
+    lineas.append('        cabeceras["Content-Encoding"] = "gzip"')
+    lineas.append("        trozos = _gzip(trozos)")
+    lineas.append("    return RespuestaNDJSON(trozos, headers=cabeceras)")
+    lineas.append("")
+    lineas.append("")
+    return lineas
+
+def _generar_cache_get(almacenes, en_threadpool: bool,
+                       compartido: bool = True, por_recurso: bool = True,
+                       entre_procesos: bool = False) -> list:
+    """
+    Cache LRU de respuestas GET ya serializadas, una por recurso con
+    `cache : N`. El ETag es la versión del recurso: cada escritura la
+    incrementa y vacía la cache, e If-None-Match con el ETag vigente
+    responde 304 sin enviar el cuerpo. El 304 (también con `*`) sólo se
+    da si la respuesta existe: se busca antes en la cache o se calcula,
+    así un recurso inexistente sigue respondiendo 404.
+
+    Con `entre_procesos` la versión vive en _generaciones, compartida por
+    los workers, y las entradas se indexan por versión: una escritura en
+    otro worker deja obsoleto lo cacheado aquí sin necesidad de avisarle.
+    """
+    responder  = "async def responder" if en_threadpool else "def responder"
+    calcular   = "await run_in_threadpool(consulta)" if en_threadpool else "consulta()"
+    cacheados  = [resource for resource, almacen in almacenes.items() if almacen["cache"]]
+    instancias = [
+        f'{resource.lower()}s_cache = _CacheGet({almacenes[resource]["cache"]}, "{resource}")'
+        if entre_procesos else
+        f"{resource.lower()}s_cache = _CacheGet({almacenes[resource]['cache']})"
+        for resource in cacheados
+    ]
+    if not compartido:
+        return ["", ""] + (instancias if por_recurso else [])
+
+    lineas = []
+    lineas.append("")
+    lineas.append("")
+    lineas.append("# Cache de respuestas GET con ETag (recursos con `cache : N`)")
+    if entre_procesos:
+        lineas += _generar_generaciones(cacheados)
+        lineas.append("")
+        lineas.append("class _CacheGet:")
+        lineas.append("    def __init__(self, maximo: int, recurso: str):")
+        lineas.append("        self.maximo   = maximo")
+        lineas.append("        self.slot     = _generaciones.slot(recurso)")
+        lineas.append("        self.entradas = OrderedDict()   # (versión, ruta, query) → JSON")
+        lineas.append("        self.lock     = threading.Lock()")
+        lineas.append("")
+        lineas.append("    @property")
+        lineas.append("    def version(self) -> int:")
+        lineas.append("        return _generaciones.leer(self.slot)")
+        lineas.append("")
+        lineas.append("    def invalidar(self):")
+        lineas.append("        _generaciones.incrementar(self.slot)")
+        lineas.append("        with self.lock:")
+        lineas.append("            self.entradas.clear()")
+        lineas.append("")
+    else:
+        lineas.append("# Con varios procesos cada uno tiene su propia cache y versión.")
+        lineas.append("ARRANQUE = secrets.token_hex(4)   # un ETag no sobrevive a un reinicio")
+        lineas.append("")
+        lineas.append("class _CacheGet:")
+        lineas.append("    def __init__(self, maximo: int):")
+        lineas.append("        self.maximo   = maximo")
+        lineas.append("        self.version  = 0")
+        lineas.append("        self.entradas = OrderedDict()   # (ruta, query) → JSON")
+        lineas.append("        self.lock     = threading.Lock()")
+        lineas.append("")
+        lineas.append("    def invalidar(self):")
+        lineas.append("        with self.lock:")
+        lineas.append("            self.version += 1")
+        lineas.append("            self.entradas.clear()")
+        lineas.append("")
+    lineas.append("    @staticmethod")
+    lineas.append("    def _coincide(cabecera: str, etag: str) -> bool:")
+    lineas.append('        candidatos = {e.strip().removeprefix("W/") for e in cabecera.split(",")}')
+    lineas.append('        return etag in candidatos or "*" in candidatos')
+    lineas.append("")
+    lineas.append(f"    {responder}(self, request: Request, consulta, adaptador: TypeAdapter,")
+    lineas.append(f"    {' ' * len(responder)} estado: int = 200) -> Response:")
+    lineas.append("        version = self.version")
+    lineas.append('        etag    = f\'"{ARRANQUE}-{version}"\'')
+    if entre_procesos:
+        lineas.append("        clave = (version, request.url.path, request.url.query)")
+    else:
+        lineas.append("        clave = (request.url.path, request.url.query)")
+    lineas.append("        with self.lock:")
+    lineas.append("            cuerpo = self.entradas.get(clave)")
+    lineas.append("            if cuerpo is not None:")
+    lineas.append("                self.entradas.move_to_end(clave)")
+    lineas.append("        if cuerpo is None:")
+    lineas.append(f"            cuerpo = adaptador.dump_json(adaptador.validate_python({calcular}))")
+    lineas.append("            with self.lock:")
+    lineas.append("                # Si hubo una escritura mientras se calculaba, no se guarda")
+    lineas.append("                if version == self.version:")
+    lineas.append("                    self.entradas[clave] = cuerpo")
+    lineas.append("                    if len(self.entradas) > self.maximo:")
+    lineas.append("                        self.entradas.popitem(last=False)")
+    lineas.append("        # Aquí la consulta no falló: hay representación a la que comparar")
+    lineas.append('        if self._coincide(request.headers.get("if-none-match", ""), etag):')
+    lineas.append('            return Response(status_code=304, headers={"ETag": etag})')
+    lineas.append('        return Response(cuerpo, status_code=estado, media_type="application/json",')
+    lineas.append('                        headers={"ETag": etag})')
+    if por_recurso:
+        lineas.append("")
+        lineas += instancias
+    return lineas
+
+def _generar_generaciones(cacheados: list) -> list:
+    """Contadores de versión por recurso en un fichero mapeado en memoria."""
+    tupla = ", ".join(f'"{r}"' for r in cacheados) + ("," if len(cacheados) == 1 else "")
+    lineas = []
+    lineas.append("# La versión de cada recurso es un contador de 8 bytes en un fichero")
+    lineas.append("# mapeado junto a la base, común a todos los workers: leerla no sale")
+    lineas.append("# del proceso e incrementarla toma un flock exclusivo.")
+    lineas.append(f"RECURSOS_CACHEADOS = ({tupla})")
+    lineas.append("")
+    lineas.append("class _Generaciones:")
+    lineas.append("    def __init__(self, ruta: str, recursos: tuple):")
+    lineas.append("        self.recursos = recursos")
+    lineas.append("        self.lock     = threading.Lock()   # flock no excluye hilos del mismo fd")
+    lineas.append("        self.fd       = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o600)")
+    lineas.append("        tamano = 8 * (len(recursos) + 1)   # [0] identifica la base, [i] versiones")
+    lineas.append("        with self._exclusivo():")
+    lineas.append("            if os.fstat(self.fd).st_size < tamano:")
+    lineas.append("                os.ftruncate(self.fd, tamano)")
+    lineas.append("            self.mapa = mmap.mmap(self.fd, tamano)")
+    lineas.append("            if not self.leer(0):")
+    lineas.append('                struct.pack_into("<Q", self.mapa, 0, secrets.randbits(63) | 1)')
+    lineas.append("")
+    lineas.append("    @contextmanager")
+    lineas.append("    def _exclusivo(self):")
+    lineas.append("        with self.lock:")
+    lineas.append("            fcntl.flock(self.fd, fcntl.LOCK_EX)")
+    lineas.append("            try:")
+    lineas.append("                yield")
+    lineas.append("            finally:")
+    lineas.append("                fcntl.flock(self.fd, fcntl.LOCK_UN)")
+    lineas.append("")
+    lineas.append("    def slot(self, recurso: str) -> int:")
+    lineas.append("        return self.recursos.index(recurso) + 1")
+    lineas.append("")
+    lineas.append("    def leer(self, slot: int) -> int:")
+    lineas.append('        return struct.unpack_from("<Q", self.mapa, 8 * slot)[0]')
+    lineas.append("")
+    lineas.append("    def incrementar(self, slot: int):")
+    lineas.append("        with self._exclusivo():")
+    lineas.append('            struct.pack_into("<Q", self.mapa, 8 * slot, self.leer(slot) + 1)')
+    lineas.append("")
+    lineas.append('_generaciones = _Generaciones(DB_PATH + ".gen", RECURSOS_CACHEADOS)')
+    lineas.append('ARRANQUE = f"{_generaciones.leer(0):x}"   # el mismo en todos los workers')
+    return lineas
+
+def _patron_campos(campos: list) -> str:
+    """^(a|b)(,(a|b))*$ — lista de campos separados por comas."""
+    opciones = "|".join(campos)
+    return f"^({opciones})(,({opciones}))*$"
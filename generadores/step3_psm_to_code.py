@@ -1,23 +1,160 @@
 """
 TRANSFORMACIÓN 3 — M2T: PSM FastAPI → Código ejecutable
 =========================================================
-Lee psm_fastapi.api y genera DOS archivos Python reales:
+Lee psm_fastapi.api y genera TRES archivos Python reales:
 
   salida/schemas.py  →  modelos Pydantic (validación automática)
   salida/main.py     →  aplicación FastAPI con todos los endpoints
+  salida/carga.py    →  prueba de carga asyncio de todas las routes
 
 El código generado es 100% ejecutable:
     pip install fastapi uvicorn
     uvicorn salida.main:app --reload
+
+Con `serialization : fast` en el PSM los schemas son dataclasses
+pydantic con slots y tipos estrictos, y los handlers responden JSON
+serializado por pydantic-core sin revalidar contra response_model.
+
+Con `layout : routers` cada recurso va en su propio módulo (esquemas/ y
+routers/) y main.py monta cada router en su primera petición.
+
+Con `storage : shared` todos los workers de un host (`uvicorn --workers N`)
+comparten una base SQLite y la versión de cada cache GET.
+
+Los recursos con `columnar { total, numero by estado }` guardan esos
+campos Number, además, en columnas array('d') densas (una fila por
+elemento, los campos de agrupación codificados como enteros) y exponen
+GET /<recursos>/aggregate: count, sum, min, max y mean de una columna,
+en total o por grupo, calculados con NumPy sobre las columnas sin
+copiarlas (o en Python si NumPy no está instalado). Con SQLite los
+calcula la propia base con GROUP BY.
+
+Cada `resumen` de un recurso (contadores y sumas, por grupo o en total)
+se mantiene en las escrituras —un _Resumen en memoria, una tabla con
+triggers en SQLite— y GET /<recursos>/resumen/<nombre> lo lee sin
+recorrer los datos.
+
+Los GET que devuelven el recurso aceptan `?fields=a,b`, validado contra
+los campos del schema: cada combinación pedida prepara una vez su
+attrgetter (itemgetter sobre las filas en SQLite) y la respuesta sólo
+lleva esos campos.
+
+Con la operación `exportar`, GET /<recursos>/export envía la colección
+entera como NDJSON (un objeto por línea) en trozos de EXPORTAR_BLOQUE
+elementos, leídos del almacén según se envían —en SQLite, con fetchmany
+sobre un único cursor— y comprimidos con gzip cuando el cliente lo
+acepta: ni la respuesta completa ni la colección serializada llegan a
+estar en memoria.
+
+Con `metrics : prometheus` main.py expone GET /metrics, y las routes con
+`admission : concurrency N queue M` responden 503 con Retry-After en
+cuanto se saturan, sin llegar al handler.
+
+carga.py levanta main.py con uvicorn, lo puebla con los mismos valores
+de ejemplo que los schemas y mide, route a route, rps y latencias
+p50/p95/p99 con un cliente HTTP/1.1 sobre asyncio, sin dependencias.
+
+Además de este módulo (schemas.py y el esqueleto de main.py):
+
+  step3_comun            →  consultas sobre el PSM y escritura de archivos
+  step3_modulo           →  cuerpo de main.py: cache, proyección, exportación
+  step3_almacen_memoria  →  almacén en memoria y handlers sobre él
+  step3_almacen_sqlite   →  almacén SQLite (`sqlite`, `shared`) y sus handlers
+  step3_middleware       →  métricas Prometheus y control de admisión
+  step3_disposicion      →  `layout : routers`: comun.py, routers/ y main.py
+  step3_carga            →  carga.py (etapa propia en `--incremental`)
 """
 
-from textx import metamodel_from_file
+from lectura_rapida import leer_psm
+from step3_comun import (
+    _con_admision, _con_metricas, _describir_almacen, _ejemplo_valor, _en_sqlite,
+    _entre_procesos, _nombre_resumen, _por_routers, _psm_recurso, _recursos_agregados,
+    _recursos_exportados, _recursos_lote, _recursos_paginados, _recursos_proyectados,
+    _resumenes, _routes_por_recurso, _schemas_recurso, _serializacion_rapida,
+    escribir_si_cambia,
+)
+from step3_modulo import _generar_modulo
+from step3_disposicion import _generar_routers
+from step3_carga import generar_carga
 import os
-import re
+
+# Módulos del generador: cambiar cualquiera invalida las etapas del paso 3
+FUENTES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{modulo}.py")
+    for modulo in ("step3_psm_to_code", "step3_comun", "step3_modulo",
+                   "step3_almacen_memoria", "step3_almacen_sqlite",
+                   "step3_middleware", "step3_disposicion")
+]
 
 # ── Generador de schemas.py ───────────────────────────────────
 
-def generar_schemas(psm_model, ruta_salida: str):
+# Serialización `fast`: tipos estrictos (sin coerción "12" → 12). datetime
+# sigue en modo laxo porque en JSON llega como texto ISO 8601.
+TIPOS_ESTRICTOS = {
+    "str":   "StrictStr",
+    "int":   "StrictInt",
+    "float": "StrictFloat",
+    "bool":  "StrictBool",
+}
+
+def generar_schemas(psm_model, ruta_salida: str, recursos: set = None) -> list:
+    """
+    Escribe schemas.py (y con `layout : routers`, esquemas/); devuelve las
+    rutas. Con `recursos` y `layout : routers` sólo se regeneran los
+    módulos de esos recursos; schemas.py se escribe entero en ambos casos.
+    """
+    if not _por_routers(psm_model):
+        escribir_si_cambia(ruta_salida, "\n".join(_lineas_schemas(psm_model)))
+        print(f"  ✅ schemas.py generado → {os.path.basename(ruta_salida)}")
+        return [ruta_salida]
+
+    directorio = os.path.join(os.path.dirname(ruta_salida), "esquemas")
+    os.makedirs(directorio, exist_ok=True)
+    rutas    = [ruta_salida, os.path.join(directorio, "__init__.py")]
+    routes   = _routes_por_recurso(psm_model)
+    exportar = {}
+    for schema in psm_model.schemas:
+        modulo = schema.name.lower()
+        parcial = _psm_recurso(psm_model, schema, routes)
+        rutas.append(os.path.join(directorio, f"{modulo}.py"))
+        if recursos is None or schema.name in recursos:
+            escribir_si_cambia(rutas[-1], "\n".join(_lineas_schemas(parcial)))
+        for nombre in _schemas_recurso(parcial):
+            exportar[nombre] = f"esquemas.{modulo}"
+
+    escribir_si_cambia(rutas[1], "# Un módulo de schemas por recurso — GENERADO AUTOMÁTICAMENTE\n")
+
+    lineas = []
+    lineas.append("# " + "=" * 58)
+    lineas.append("# SCHEMAS PYDANTIC — GENERADOS AUTOMÁTICAMENTE")
+    lineas.append("# Fuente: psm_fastapi.api  |  NO EDITAR")
+    lineas.append("# " + "=" * 58)
+    lineas.append("# Cada recurso tiene su módulo en esquemas/. Aquí sólo se")
+    lineas.append("# reexportan: un módulo se importa (y sus modelos se construyen)")
+    lineas.append("# la primera vez que se pide uno de sus schemas.")
+    lineas.append("")
+    lineas.append("import importlib")
+    lineas.append("")
+    lineas.append("_MODULOS = {")
+    for nombre, modulo in exportar.items():
+        lineas.append(f'    "{nombre}": "{modulo}",')
+    lineas.append("}")
+    lineas.append("__all__ = list(_MODULOS)")
+    lineas.append("")
+    lineas.append("")
+    lineas.append("def __getattr__(nombre: str):")
+    lineas.append("    if nombre not in _MODULOS:")
+    lineas.append('        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")')
+    lineas.append("    return getattr(importlib.import_module(_MODULOS[nombre]), nombre)")
+    lineas.append("")
+    escribir_si_cambia(ruta_salida, "\n".join(lineas))
+
+    print(f"  ✅ schemas.py generado → {os.path.basename(ruta_salida)} "
+          f"+ esquemas/ ({len(psm_model.schemas)} módulos)")
+    return rutas
+
+
+def _lineas_schemas(psm_model) -> list:
     necesita_datetime = any(
         f.type == "datetime"
         for schema in psm_model.schemas
@@ -30,13 +167,34 @@ def generar_schemas(psm_model, ruta_salida: str):
     lineas.append("# Fuente: psm_fastapi.api  |  NO EDITAR")
     lineas.append("# " + "=" * 58)
     lineas.append("")
-    lineas.append("from pydantic import BaseModel")
+    paginados = _recursos_paginados(psm_model)
+    lotes     = _recursos_lote(psm_model)
+    agregados = _recursos_agregados(psm_model)
+    rapido    = _serializacion_rapida(psm_model)
+
+    if rapido:
+        estrictos = sorted({
+            TIPOS_ESTRICTOS[f.type]
+            for schema in psm_model.schemas for f in schema.fields
+            if f.type in TIPOS_ESTRICTOS
+        })
+        lineas.append(f"from pydantic import {', '.join(['ConfigDict'] + estrictos)}")
+        lineas.append("from pydantic.dataclasses import dataclass")
+    else:
+        lineas.append("from pydantic import BaseModel")
     if necesita_datetime:
         lineas.append("from datetime import datetime")
+    if paginados or lotes:
+        lineas.append("from typing import List, Optional")
+    elif agregados:
+        lineas.append("from typing import Optional")
     lineas.append("")
     lineas.append("")
 
     for schema in psm_model.schemas:
+        if rapido:
+            lineas += _schema_dataclass(schema)
+            continue
         lineas.append(f"class {schema.name}(BaseModel):")
         for field in schema.fields:
             padding = max(1, 14 - len(field.name))
@@ -53,41 +211,129 @@ def generar_schemas(psm_model, ruta_salida: str):
         lineas.append("")
         lineas.append("")
 
-    with open(ruta_salida, "w") as f:
-        f.write("\n".join(lineas))
-
-    print(f"  ✅ schemas.py generado → {os.path.basename(ruta_salida)}")
-
-
-def _ejemplo_valor(nombre: str, tipo: str) -> str:
-    """Genera un valor de ejemplo para el schema Pydantic."""
-    ejemplos = {
-        "nombre":    '"Laptop Pro"',
-        "email":     '"usuario@ejemplo.com"',
-        "precio":    "999.99",
-        "total":     "150.00",
-        "stock":     "42",
-        "edad":      "30",
-        "numero":    "1001",
-        "estado":    '"pendiente"',
-        "fecha":     '"2024-01-15"',
-        "disponible":"True",
-    }
-    if nombre in ejemplos:
-        return ejemplos[nombre]
-    if tipo == "str":      return f'"{nombre} ejemplo"'
-    if tipo == "int":      return "1"
-    if tipo == "float":    return "0.0"
-    if tipo == "bool":     return "True"
-    if tipo == "datetime": return '"2024-01-15T00:00:00"'
-    return '"ejemplo"'
+    # Sobres de página para los listados paginados por cursor
+    base = "" if rapido else "(BaseModel)"
+    for resource in paginados:
+        if rapido:
+            lineas.append("@dataclass(slots=True)")
+        lineas.append(f"class {resource}Pagina{base}:")
+        lineas.append(f"    items         : List[{resource}]")
+        lineas.append(f"    next_cursor   : Optional[int] = None")
+        lineas.append("")
+        lineas.append("")
+
+    # Resultado por elemento de las operaciones de lote
+    for resource in lotes:
+        if rapido:
+            lineas.append("@dataclass(slots=True)")
+        lineas.append(f"class {resource}Resultado{base}:")
+        lineas.append(f"    status        : int")
+        lineas.append(f"    id            : Optional[int] = None")
+        lineas.append(f"    item          : Optional[{resource}] = None")
+        lineas.append(f"    detail        : Optional[str] = None")
+        lineas.append("")
+        lineas.append("")
+
+    # Agregados de una columna numérica, en total (group None) o por grupo
+    for resource in agregados:
+        if rapido:
+            lineas.append("@dataclass(slots=True)")
+        lineas.append(f"class {resource}Agregado{base}:")
+        lineas.append(f"    group         : Optional[str]")
+        lineas.append(f"    count         : int")
+        lineas.append(f"    sum           : float")
+        lineas.append(f"    min           : Optional[float]")
+        lineas.append(f"    max           : Optional[float]")
+        lineas.append(f"    mean          : Optional[float]")
+        lineas.append("")
+        lineas.append("")
+
+    # Filas de cada resumen: el valor del grupo (si agrupa) y sus medidas
+    tipos = {s.name: {f.name: f.type for f in s.fields} for s in psm_model.schemas}
+    for resource, resumen in _resumenes(psm_model):
+        if rapido:
+            lineas.append("@dataclass(slots=True)")
+        lineas.append(f"class {_nombre_resumen(resource, resumen)}{base}:")
+        if resumen.group:
+            lineas.append(f"    group         : {tipos[resource][resumen.group]}")
+        for medida in resumen.medidas:
+            padding = max(1, 14 - len(medida.name))
+            lineas.append(f"    {medida.name}{' ' * padding}: {'float' if medida.tipo == 'sum' else 'int'}")
+        lineas.append("")
+        lineas.append("")
+
+    return lineas
+
+
+def _schema_dataclass(schema) -> list:
+    """Schema como dataclass pydantic con slots: sin __dict__ por objeto."""
+    lineas = []
+    lineas.append("@dataclass(slots=True, config=ConfigDict(json_schema_extra={")
+    lineas.append('    "example": {')
+    for field in schema.fields:
+        lineas.append(f'        "{field.name}": {_ejemplo_valor(field.name, field.type)},')
+    lineas.append("    }")
+    lineas.append("}))")
+    lineas.append(f"class {schema.name}:")
+    for field in schema.fields:
+        padding = max(1, 14 - len(field.name))
+        tipo    = TIPOS_ESTRICTOS.get(field.type, field.type)
+        lineas.append(f"    {field.name}{' ' * padding}: {tipo}")
+    lineas.append("")
+    lineas.append("")
+    return lineas
 
 
 # ── Generador de main.py ──────────────────────────────────────
 
-def generar_main(psm_model, ruta_salida: str):
+def generar_main(psm_model, ruta_salida: str, recursos: set = None) -> list:
+    """
+    Escribe main.py (y con `layout : routers`, sus módulos); devuelve las
+    rutas. Con `recursos` y `layout : routers` sólo se regeneran los
+    routers de esos recursos.
+    """
+    if _por_routers(psm_model):
+        rutas = _generar_routers(psm_model, ruta_salida, recursos)
+        print(f"  ✅ main.py    generado → {os.path.basename(ruta_salida)} "
+              f"+ comun.py + routers/ ({len(psm_model.schemas)} routers)")
+        return rutas
+
     # Recolectar schemas usados en responses
+    paginados      = _recursos_paginados(psm_model)
+    lotes          = _recursos_lote(psm_model)
     schemas_usados = {s.name for s in psm_model.schemas}
+    schemas_usados |= {f"{r}Pagina" for r in paginados}
+    schemas_usados |= {f"{r}Resultado" for r in lotes}
+    schemas_usados |= {f"{r}Agregado" for r in _recursos_agregados(psm_model)}
+    schemas_usados |= {_nombre_resumen(r, resumen) for r, resumen in _resumenes(psm_model)}
+
+    asincrono = psm_model.platform == "fastapi-async"
+    almacenes = {s.name: _describir_almacen(s, paginados, lotes) for s in psm_model.schemas}
+    indices   = [i for a in almacenes.values() for i in a["indices"]]
+    multiples = any(not i["unico"] for i in indices)
+    opcional  = bool(paginados) or any(i["filtro"] for i in indices)
+    consultas = paginados or any(getattr(r, "query_param", None) for r in psm_model.routes)
+    cacheados = [r for r, a in almacenes.items() if a["cache"]]
+    columnas  = [a["columnar"] for a in almacenes.values() if a["columnar"]]
+    resumenes = _resumenes(psm_model)
+    proyectados = _recursos_proyectados(psm_model)
+    exportados  = _recursos_exportados(psm_model)
+
+    sqlite    = _en_sqlite(psm_model)
+    procesos  = _entre_procesos(psm_model)
+    rapido    = _serializacion_rapida(psm_model)
+    metricas  = _con_metricas(psm_model)
+    admision  = _con_admision(psm_model)
+
+    tipos = ["List"] if sqlite else ["Dict", "List"]
+    if proyectados and cacheados:
+        tipos.insert(0, "Any")
+    if columnas:
+        tipos.append("Literal")
+    if opcional or proyectados or any(c["grupos"] for c in columnas):
+        tipos.append("Optional")
+    if multiples and not sqlite:
+        tipos.append("Set")
 
     lineas = []
     lineas.append("# " + "=" * 58)
@@ -99,117 +345,78 @@ def generar_main(psm_model, ruta_salida: str):
     lineas.append("#   uvicorn main:app --reload")
     lineas.append("# " + "=" * 58)
     lineas.append("")
-    lineas.append("from fastapi import FastAPI, HTTPException")
-    lineas.append("from typing import List")
+    if admision:
+        lineas.append("import asyncio")
+    if procesos:
+        lineas.append("import fcntl")
+        lineas.append("import hashlib")
+    if procesos and cacheados:
+        lineas.append("import mmap")
+    if sqlite:
+        lineas.append("import os")
+        lineas.append("import queue")
+    if admision:
+        lineas.append("import re")
+    if sqlite:
+        lineas.append("import sqlite3")
+    if cacheados:
+        lineas.append("import secrets")
+    if procesos and cacheados:
+        lineas.append("import struct")
+    if procesos:
+        lineas.append("import tempfile")
+    if cacheados or (not sqlite and (columnas or resumenes or not asincrono)):
+        lineas.append("import threading")
+    if exportados:
+        lineas.append("import zlib")
+    if columnas and not sqlite:
+        lineas.append("from array import array")
+    if cacheados:
+        lineas.append("from collections import OrderedDict")
+    if sqlite:
+        lineas.append("from contextlib import contextmanager")
+    # Tipo de los índices en memoria y de los filtros ?campo= en cualquier almacén
+    if any(i["tipo"] == "datetime" and (i["filtro"] or not sqlite) for i in indices):
+        lineas.append("from datetime import datetime")
+    if proyectados:
+        lineas.append("from functools import lru_cache")
+        lineas.append(f"from operator import {'itemgetter' if sqlite else 'attrgetter'}")
+    bisectas = (["bisect_left"] if metricas else []) + (["bisect_right"] if paginados and not sqlite else [])
+    if bisectas:
+        lineas.append(f"from bisect import {', '.join(bisectas)}")
+    if metricas:
+        lineas.append("from time import perf_counter")
+    if consultas or proyectados:
+        lineas.append("from fastapi import FastAPI, HTTPException, Query")
+    else:
+        lineas.append("from fastapi import FastAPI, HTTPException")
+    peticion = ["Request"] if cacheados or exportados else []
+    if cacheados or (asincrono and not sqlite) or rapido or metricas or proyectados:
+        peticion.append("Response")
+    if peticion:
+        lineas.append(f"from fastapi import {', '.join(peticion)}")
+    if exportados:
+        lineas.append("from fastapi.responses import StreamingResponse")
+    if asincrono or (metricas and sqlite):
+        lineas.append("from fastapi.concurrency import run_in_threadpool")
+    if (asincrono and not sqlite) or cacheados or rapido:
+        lineas.append("from pydantic import TypeAdapter")
+    if rapido or proyectados or exportados:
+        lineas.append("from pydantic_core import to_json"
+                      + (", to_jsonable_python" if rapido and sqlite else ""))
+    if not sqlite:
+        lineas.append("from itertools import count")
+    lineas.append(f"from typing import {', '.join(tipos)}")
     lineas.append(f"from schemas import {', '.join(sorted(schemas_usados))}")
     lineas.append("")
     lineas.append(f'app = FastAPI(title="{psm_model.name}", version="1.0.0")')
     lineas.append("")
-    lineas.append("# Base de datos simulada en memoria")
+    lineas += _generar_modulo(psm_model)
 
-    for schema in psm_model.schemas:
-        lineas.append(f"{schema.name.lower()}s_db: List[{schema.name}] = []")
-
-    lineas.append("")
-    lineas.append("")
-
-    # Generar cada route
-    for route in psm_model.routes:
-        method   = route.method.lower()
-        path     = route.path
-        summary  = route.summary
-        status   = route.status
-        response = route.response
-
-        # Tipo de respuesta
-        if response.list:
-            resp_type = f"List[{response.name}]"
-        elif response.name == "dict":
-            resp_type = "dict"
-        else:
-            resp_type = response.name
-
-        # Decorador
-        if status != 200:
-            lineas.append(f'@app.{method}("{path}", response_model={resp_type}, status_code={status})')
-        else:
-            lineas.append(f'@app.{method}("{path}", response_model={resp_type})')
-
-        # Firma de la función
-        resource   = _inferir_resource(path)
-        func_name  = _generar_nombre_funcion(method, path)
-        args       = []
-
-        if route.path_param:
-            args.append(f"{route.path_param.name}: {route.path_param.type}")
-        if route.body:
-            args.append(f"data: {route.body.type}")
-
-        lineas.append(f'def {func_name}({", ".join(args)}):')
-        lineas.append(f'    """{summary}"""')
-
-        # Cuerpo stub con lógica simulada
-        db_name = f"{resource.lower()}s_db"
-        lineas += _generar_cuerpo(method, resource, db_name, route)
-
-        lineas.append("")
-        lineas.append("")
-
-    with open(ruta_salida, "w") as f:
-        f.write("\n".join(lineas))
+    escribir_si_cambia(ruta_salida, "\n".join(lineas))
 
     print(f"  ✅ main.py    generado → {os.path.basename(ruta_salida)}")
-
-
-def _inferir_resource(path: str) -> str:
-    partes = path.strip('/"').split("/")
-    base   = partes[0].rstrip("s")
-    return base.capitalize()
-
-def _generar_nombre_funcion(method: str, path: str) -> str:
-    clean = re.sub(r'[{}"/]', '_', path).strip("_").replace("__", "_")
-    return f"{method}_{clean}"
-
-def _generar_cuerpo(method: str, resource: str, db_name: str, route) -> list:
-    """Genera un cuerpo stub realista para cada tipo de endpoint."""
-    nombre_id = route.path_param.name if route.path_param else None
-
-    if method == "get" and not nombre_id:
-        return [f"    return {db_name}"]
-
-    if method == "get" and nombre_id:
-        return [
-            f"    item = next((x for x in {db_name} if x.numero == {nombre_id}), None)"
-            if resource == "Pedido" else
-            f"    item = next((i, x) for i, x in enumerate({db_name}) if i == {nombre_id})",
-            f"    if not item:",
-            f'        raise HTTPException(status_code=404, detail="{resource} no encontrado")',
-            f"    return item",
-        ]
-
-    if method == "post":
-        return [
-            f"    {db_name}.append(data)",
-            f"    return data",
-        ]
-
-    if method == "put":
-        return [
-            f"    if {nombre_id} >= len({db_name}):",
-            f'        raise HTTPException(status_code=404, detail="{resource} no encontrado")',
-            f"    {db_name}[{nombre_id}] = data",
-            f"    return data",
-        ]
-
-    if method == "delete":
-        return [
-            f"    if {nombre_id} >= len({db_name}):",
-            f'        raise HTTPException(status_code=404, detail="{resource} no encontrado")',
-            f"    {db_name}.pop({nombre_id})",
-            f'    return {{"message": "{resource} eliminado correctamente"}}',
-        ]
-
-    return ["    pass"]
+    return [ruta_salida]
 
 
 # ── Main ──────────────────────────────────────────────────────
@@ -220,10 +427,8 @@ if __name__ == "__main__":
     salida  = os.path.join(base, "..", "salida")
     os.makedirs(salida, exist_ok=True)
 
-    mm  = metamodel_from_file(os.path.join(modelos, "psm_grammar.tx"))
-
     print("⚙️  Leyendo PSM FastAPI...")
-    psm = mm.model_from_file(os.path.join(modelos, "psm_fastapi.api"))
+    psm = leer_psm(os.path.join(modelos, "psm_grammar.tx"), os.path.join(modelos, "psm_fastapi.api"))
     print(f"   {len(psm.schemas)} schemas, {len(psm.routes)} routes")
 
     print("\n📝 M2T: PSM → schemas.py")
@@ -231,3 +436,6 @@ if __name__ == "__main__":
 
     print("\n📝 M2T: PSM → main.py")
     generar_main(psm, os.path.join(salida, "main.py"))
+
+    print("\n📝 M2T: PSM → carga.py")
+    generar_carga(psm, os.path.join(salida, "carga.py"))
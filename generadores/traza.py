@@ -0,0 +1,166 @@
+"""
+TRAZA — Instrumentación por etapa del pipeline
+===============================================
+Cada etapa se envuelve en un span que registra tiempo de pared y de
+CPU y cuánto sube el máximo de RSS del proceso (rss_kb, de getrusage:
+casi gratis, pero sólo cuenta lo que supera el pico anterior). Los
+spans se anidan: una etapa del pipeline (paso1.generar_pim…)
+contiene sus sub-etapas (gramatica.req, parse.req, m2m.pim,
+escritura.pim…).
+
+Perfiles opcionales, uno por etapa de primer nivel:
+  cprofile     →  <dir_perfiles>/<etapa>.prof    (pstats / snakeviz)
+  tracemalloc  →  <dir_perfiles>/<etapa>.txt     (líneas que más asignan)
+                  y asignado_kb / pico_kb en cada span
+
+La traza completa se vuelca como JSON:
+
+  {
+    "total_ms": 812.4,
+    "perfil": null,
+    "conteos": {"recursos": 4, "endpoints": 17, ...},
+    "etapas": [
+      {"nombre": "paso1.generar_pim", "padre": null, "nivel": 0,
+       "wall_ms": 301.2, "cpu_ms": 298.0, "rss_kb": 5120.0, "cache": "miss"},
+      {"nombre": "parse.req", "padre": "paso1.generar_pim", "nivel": 1, ...},
+      ...
+    ]
+  }
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:     # Windows: sin getrusage, los spans no llevan rss_kb
+    resource = None
+
+PERFILES = ("cprofile", "tracemalloc")
+
+# Líneas por etapa en los volcados de tracemalloc
+TOP_TRACEMALLOC = 25
+
+
+def _rss_max_kb() -> float:
+    """Máximo de RSS del proceso hasta ahora, en KB (macOS lo da en bytes)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+class Traza:
+    """Spans anidados con tiempos, conteos y perfiles opcionales."""
+
+    def __init__(self, perfil: str = None, dir_perfiles: str = None):
+        if perfil is not None and perfil not in PERFILES:
+            raise ValueError(f"Perfil desconocido: {perfil} (opciones: {PERFILES})")
+        self.perfil       = perfil
+        self.dir_perfiles = dir_perfiles
+        self.etapas       = []
+        self.conteos      = {}
+        self._pila        = []
+        self._inicio      = time.perf_counter()
+        self._tracemalloc = perfil == "tracemalloc" and not tracemalloc.is_tracing()
+        if self._tracemalloc:
+            tracemalloc.start()
+        if perfil and dir_perfiles:
+            os.makedirs(dir_perfiles, exist_ok=True)
+
+    def contar(self, **conteos):
+        """Registra tamaños del modelo (recursos, endpoints, schemas, routes…)."""
+        self.conteos.update(conteos)
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        padre    = self._pila[-1] if self._pila else None
+        registro = {
+            "nombre": nombre,
+            "padre":  padre["nombre"] if padre else None,
+            "nivel":  len(self._pila),
+        }
+        self.etapas.append(registro)
+
+        memoria = tracemalloc.is_tracing() and self.perfil == "tracemalloc"
+        if memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+            if padre is not None:
+                # reset_peak borra el pico del padre: se le guarda antes
+                padre["_pico"] = max(padre.get("_pico", 0), pico)
+            tracemalloc.reset_peak()
+            registro["_antes"] = actual
+            if padre is None:
+                registro["_foto"] = tracemalloc.take_snapshot()
+
+        # cProfile no admite perfiladores anidados: sólo primer nivel
+        perfilador = cProfile.Profile() if self.perfil == "cprofile" and padre is None else None
+
+        self._pila.append(registro)
+        t0, c0 = time.perf_counter(), time.process_time()
+        r0 = _rss_max_kb() if resource else None
+        if perfilador:
+            perfilador.enable()
+        try:
+            yield registro
+        finally:
+            if perfilador:
+                perfilador.disable()
+            registro["wall_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            registro["cpu_ms"]  = round((time.process_time() - c0) * 1000, 3)
+            if r0 is not None:
+                registro["rss_kb"] = round(_rss_max_kb() - r0, 1)
+            self._pila.pop()
+
+            if memoria:
+                actual, pico = tracemalloc.get_traced_memory()
+                pico = max(pico, registro.pop("_pico", 0))
+                registro["asignado_kb"] = round((actual - registro.pop("_antes")) / 1024, 1)
+                registro["pico_kb"]     = round(pico / 1024, 1)
+                if padre is not None:
+                    padre["_pico"] = max(padre.get("_pico", 0), pico)
+                foto = registro.pop("_foto", None)
+                if foto is not None and self.dir_perfiles:
+                    self._volcar_tracemalloc(nombre, foto)
+            if perfilador and self.dir_perfiles:
+                perfilador.dump_stats(os.path.join(self.dir_perfiles, f"{nombre}.prof"))
+
+    def _volcar_tracemalloc(self, nombre: str, antes):
+        diferencias = tracemalloc.take_snapshot().compare_to(antes, "lineno")
+        with open(os.path.join(self.dir_perfiles, f"{nombre}.txt"), "w") as f:
+            for estadistica in diferencias[:TOP_TRACEMALLOC]:
+                f.write(f"{estadistica}\n")
+
+    def como_dict(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self._inicio) * 1000, 3),
+            "perfil":   self.perfil,
+            "conteos":  self.conteos,
+            "etapas":   self.etapas,
+        }
+
+    def cerrar(self):
+        if self._tracemalloc:
+            tracemalloc.stop()
+            self._tracemalloc = False
+
+    def guardar(self, ruta: str):
+        with open(ruta, "w") as f:
+            json.dump(self.como_dict(), f, indent=2, ensure_ascii=False)
+
+    def resumen(self) -> list:
+        """Líneas de texto con el árbol de etapas para la consola."""
+        lineas = []
+        for e in self.etapas:
+            nombre = "  " * e["nivel"] + e["nombre"]
+            extra  = f"  {e['cache']}" if "cache" in e else ""
+            if "pico_kb" in e:
+                extra += f"  pico {e['pico_kb']:.0f} KB"
+            elif e.get("rss_kb"):
+                extra += f"  rss +{e['rss_kb']:.0f} KB"
+            lineas.append(f"   {nombre:<30}{e.get('wall_ms', 0):>10.1f} ms"
+                          f"{e.get('cpu_ms', 0):>10.1f} ms cpu{extra}")
+        return lineas
@@ -0,0 +1,256 @@
+"""
+VIGILANCIA — Regeneración incremental por recurso (--watch)
+============================================================
+Observa requirements.req y, en cada cambio, compara el modelo nuevo con
+el anterior recurso a recurso:
+
+  requirements.req ──► bloques `resource X { … }` ──► huella por bloque
+                                                           │
+      añadidos / cambiados  ──► parse + M2M (PIM, PSM)  ◄──┤  sólo esos
+      sin cambios           ──► fragmentos de la ronda anterior
+      eliminados            ──► se descartan
+
+Sólo se parsean los bloques nuevos o modificados, juntos en una
+especificación mínima `api X { … }`. pim.api y psm_fastapi.api se
+recomponen con las secciones ya serializadas de cada recurso. El código
+se regenera desde el PSM recompuesto: con `layout : routers` sólo los
+módulos de los recursos tocados, y en ambas disposiciones cada archivo
+se escribe sólo si cambió, así `uvicorn --reload` no reinicia por
+archivos idénticos.
+
+Si el texto no se puede trocear (otra forma, nombres repetidos…) la
+ronda parsea el archivo entero; los errores de textX llegan con la
+posición real en requirements.req.
+"""
+
+import dataclasses
+import hashlib
+import os
+import re
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from io import StringIO
+from types import SimpleNamespace
+
+import step1_req_to_pim  as paso1
+import step2_pim_to_psm  as paso2
+import step3_psm_to_code as paso3
+from metamodelos import cargar_metamodelo
+from modelos_memoria import PIMApi
+
+CABECERA = re.compile(r"\s*api\s+(\w+)\s*\{")
+RECURSO  = re.compile(r"\bresource\s+(\w+)\s*\{")
+LLAVE    = re.compile(r"[{}]")
+
+# Segundos entre comprobaciones de requirements.req
+INTERVALO = 0.3
+
+
+@dataclass
+class Fragmento:
+    """Lo que aporta un recurso a los modelos y a los .api."""
+    huella:    str
+    pim:       PIMApi      # sólo este recurso
+    psm:       object      # PSMApi, sólo este recurso
+    secciones: tuple       # líneas de modelClass, endpoints, schema y routes
+
+
+def trocear(texto: str):
+    """
+    (nombre de la API, [(recurso, bloque), ...]), o None si el texto no
+    tiene la forma `api X { resource … }` con nombres distintos.
+    """
+    cabecera = CABECERA.match(texto)
+    if not cabecera:
+        return None
+    bloques, pos = [], cabecera.end()
+    while (recurso := RECURSO.search(texto, pos)) is not None:
+        if texto[pos:recurso.start()].strip():
+            return None
+        profundidad = 1
+        for llave in LLAVE.finditer(texto, recurso.end()):
+            profundidad += 1 if llave.group() == "{" else -1
+            if not profundidad:
+                break
+        if profundidad:
+            return None
+        pos = llave.end()
+        bloques.append((recurso.group(1), texto[recurso.start():pos]))
+    nombres = [nombre for nombre, _ in bloques]
+    if texto[pos:].strip() != "}" or not bloques or len(set(nombres)) < len(nombres):
+        return None
+    return cabecera.group(1), bloques
+
+
+class Vigilante:
+    """Fragmentos por recurso de la última ronda y rutas que regenera."""
+
+    def __init__(self, ruta_req: str, dir_modelos: str, dir_salida: str,
+                 plataforma: str = "fastapi", almacenamiento: str = "memory",
+                 serializacion: str = "pydantic", metricas: str = "none",
+                 disposicion: str = "single", admision: str = "none"):
+        gramaticas = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modelos")
+        self.mm_req       = cargar_metamodelo(os.path.join(gramaticas, "req_grammar.tx"))
+        self.opciones     = (plataforma, almacenamiento, serializacion, metricas, disposicion,
+                             admision)
+        self.ruta_req     = ruta_req
+        self.dir_salida   = dir_salida
+        self.ruta_pim     = os.path.join(dir_modelos, "pim.api")
+        self.ruta_psm     = os.path.join(dir_modelos, "psm_fastapi.api")
+        self.ruta_schemas = os.path.join(dir_salida, "schemas.py")
+        self.ruta_main    = os.path.join(dir_salida, "main.py")
+        self.ruta_carga   = os.path.join(dir_salida, "carga.py")
+        self.api          = None
+        self.fragmentos   = {}
+        os.makedirs(dir_modelos, exist_ok=True)
+        os.makedirs(dir_salida,  exist_ok=True)
+
+    def _fragmento(self, api: str, resource, huella: str) -> Fragmento:
+        pim = paso1.construir_pim(SimpleNamespace(name=api, resources=[resource]))
+        psm = paso2.construir_psm(pim, *self.opciones)
+        clase, schema = [], []
+        paso1.generate_model_class(clase, pim)
+        paso2.generate_schemas(psm, schema)
+        secciones = (
+            clase, [l for ep in pim.endpoints for l in paso1.serializar_endpoint(ep)],
+            schema, [l for r in psm.routes for l in paso2.serializar_route(r)],
+        )
+        return Fragmento(huella, pim, psm, secciones)
+
+    def _marcas(self) -> dict:
+        """mtime de cada archivo que puede escribir una ronda."""
+        rutas   = [self.ruta_pim, self.ruta_psm]
+        modulos = {os.path.dirname(r) for r in paso3.modulos_recurso(self.dir_salida, "_")}
+        for carpeta in [self.dir_salida, *sorted(modulos)]:
+            if os.path.isdir(carpeta):
+                rutas += [e.path for e in os.scandir(carpeta) if e.is_file()]
+        return {r: os.stat(r).st_mtime_ns for r in rutas if os.path.exists(r)}
+
+    def _parsear(self, api: str, bloques: list) -> list:
+        """Recursos textX de `bloques`, parseados como una especificación mínima."""
+        from textx import TextXError
+        try:
+            parcial = self.mm_req.model_from_str(
+                f"api {api} {{\n" + "\n".join(b for _, b in bloques) + "\n}")
+        except TextXError:
+            self.mm_req.model_from_file(self.ruta_req)   # el error con su posición real
+            raise
+        return parcial.resources
+
+    def actualizar(self) -> dict:
+        """
+        Una ronda: regenera lo que cambió desde la anterior. Devuelve
+        {"inicial", "añadidos", "cambiados", "eliminados", "escritos", "ms"}.
+        """
+        t0    = time.perf_counter()
+        antes = self._marcas()
+        with open(self.ruta_req) as f:
+            texto = f.read()
+
+        troceado = trocear(texto)
+        if troceado is None:
+            # Forma inesperada: parseo completo y todos los recursos se
+            # rehacen (huella vacía: la próxima ronda los vuelve a parsear)
+            req      = self.mm_req.model_from_str(texto)
+            api      = req.name
+            bloques  = [(r.name, "") for r in req.resources]
+            if len({n for n, _ in bloques}) < len(bloques):
+                raise ValueError(f"Recursos repetidos en {os.path.basename(self.ruta_req)}")
+            previos  = self.fragmentos if api == self.api else {}
+            recursos = req.resources
+            nuevos   = bloques
+        else:
+            api, bloques = troceado
+            previos  = self.fragmentos if api == self.api else {}
+            huellas  = {n: hashlib.sha1(b.encode()).hexdigest() for n, b in bloques}
+            nuevos   = [(n, b) for n, b in bloques
+                        if n not in previos or previos[n].huella != huellas[n]]
+            recursos = self._parsear(api, nuevos) if nuevos else []
+
+        with redirect_stdout(StringIO()):
+            fragmentos = {n: f for n, f in previos.items() if n in dict(bloques)}
+            for (nombre, bloque), resource in zip(nuevos, recursos):
+                huella = hashlib.sha1(bloque.encode()).hexdigest()
+                fragmentos[nombre] = self._fragmento(api, resource, huella)
+
+            anadidos   = [n for n, _ in nuevos if n not in previos]
+            cambiados  = [n for n, _ in nuevos if n in previos
+                          and previos[n].secciones != fragmentos[n].secciones]
+            eliminados = [n for n in previos if n not in fragmentos]
+            inicial    = self.api is None
+            completo   = troceado is None or api != self.api
+            self.api, self.fragmentos = api, fragmentos
+
+            orden = [fragmentos[n] for n, _ in bloques]
+            pim   = PIMApi(name=api,
+                           modelClasses=[c for f in orden for c in f.pim.modelClasses],
+                           endpoints=[e for f in orden for e in f.pim.endpoints])
+            psm   = dataclasses.replace(orden[0].psm,
+                                        schemas=[s for f in orden for s in f.psm.schemas],
+                                        routes=[r for f in orden for r in f.psm.routes])
+            secciones = [[l for f in orden for l in f.secciones[i]] for i in range(4)]
+            paso3.escribir_si_cambia(self.ruta_pim, "\n".join(
+                paso1.cabecera_pim(pim) + secciones[0] + secciones[1] + ["}"]))
+            paso3.escribir_si_cambia(self.ruta_psm, "\n".join(
+                paso2.cabecera_psm(psm) + secciones[2] + secciones[3] + ["}"]))
+
+            tocados = None if completo else set(anadidos + cambiados)
+            rutas   = [self.ruta_pim, self.ruta_psm]
+            rutas  += paso3.generar_schemas(psm, self.ruta_schemas, tocados)
+            rutas  += paso3.generar_main(psm, self.ruta_main, tocados)
+            rutas  += paso3.generar_carga(psm, self.ruta_carga)
+
+        for nombre in eliminados:
+            for ruta in paso3.modulos_recurso(self.dir_salida, nombre):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+
+        despues = self._marcas()
+        return {
+            "inicial":    inicial,
+            "añadidos":   anadidos,
+            "cambiados":  cambiados,
+            "eliminados": eliminados,
+            "escritos":   [os.path.relpath(r, os.path.dirname(self.dir_salida))
+                           for r in dict.fromkeys(rutas) if despues.get(r) != antes.get(r)]
+                          + [os.path.relpath(r, os.path.dirname(self.dir_salida))
+                             for r in antes if r not in despues],
+            "ms":         round((time.perf_counter() - t0) * 1000, 1),
+        }
+
+
+def _describir(resumen: dict) -> str:
+    cambios = [f"{signo}{', '.join(resumen[clave])}"
+               for signo, clave in (("+", "añadidos"), ("~", "cambiados"), ("-", "eliminados"))
+               if resumen[clave]]
+    if resumen["inicial"]:
+        cambios = [f"{len(resumen['añadidos'])} recursos"]
+    escritos = ", ".join(resumen["escritos"]) or "ningún archivo cambió"
+    return (f"   🔄 {' '.join(cambios) or 'sin cambios en los recursos'}"
+            f"  →  {escritos}  ({resumen['ms']:.0f} ms)")
+
+
+def vigilar(ruta_req: str, dir_modelos: str, dir_salida: str,
+            intervalo: float = INTERVALO, **opciones):
+    """Regenera en cada cambio de `ruta_req` hasta Ctrl+C."""
+    from textx import TextXError     # como en metamodelos: sólo si se vigila
+    vigilante = Vigilante(ruta_req, dir_modelos, dir_salida, **opciones)
+    print(f"👀 Vigilando {os.path.relpath(ruta_req)} (Ctrl+C para salir)")
+    firma = None
+    try:
+        while True:
+            try:
+                estado = os.stat(ruta_req)
+                actual = (estado.st_mtime_ns, estado.st_size)
+            except FileNotFoundError:
+                actual = firma           # el editor lo está reemplazando
+            if actual != firma:
+                firma = actual
+                try:
+                    print(_describir(vigilante.actualizar()))
+                except (TextXError, ValueError) as error:
+                    print(f"   ❌ {error}")
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\n👋 Vigilancia terminada")
@@ -13,90 +13,336 @@ PIPELINE COMPLETO — MDSE API REST con TextX
   psm_fastapi.api
        │
        ├──[M2T]──► salida/schemas.py   (modelos Pydantic)
-       └──[M2T]──► salida/main.py      (app FastAPI ejecutable)
+       ├──[M2T]──► salida/main.py      (app FastAPI ejecutable)
+       └──[M2T]──► salida/carga.py     (prueba de carga de cada route)
 
 Uso:
     python pipeline.py
+    python pipeline.py --incremental   # omite etapas sin cambios
+    python pipeline.py --in-memory     # M2M objeto → objeto, sin .api
+    python pipeline.py --in-memory --emit-intermediates
+    python pipeline.py --serialization fast   # dataclasses con slots + JSON directo
+    python pipeline.py --metrics prometheus   # middleware de latencia + GET /metrics
+    python pipeline.py --layout routers       # un APIRouter por recurso, carga perezosa
+    python pipeline.py --admission writes     # 503 + Retry-After con las escrituras saturadas
+    python pipeline.py --trace traza.json [--profile cprofile|tracemalloc]
+    python pipeline.py --watch                # regenera por recurso en cada cambio del .req
 
 Para ejecutar la API generada:
     pip install fastapi uvicorn
     cd salida
     uvicorn main:app --reload
     # Abrir http://localhost:8000/docs
+
+Para medir cada route (levanta su propio uvicorn):
+    python salida/carga.py --json base.json
 """
 
+import argparse
 import sys
 import os
 
 base = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.join(base, "generadores"))
 
-from textx import metamodel_from_file, metamodel_from_str
 import step1_req_to_pim  as paso1
 import step2_pim_to_psm  as paso2
 import step3_psm_to_code as paso3
+import step3_carga       as paso3_carga
+import lectura_rapida     as lectura
+import modelos_memoria
+from cache import CacheEtapas
+from metamodelos import cargar_metamodelo
+from traza import PERFILES, Traza
+
+
+def _etapa(cache, informe, traza, nombre, entradas, salidas, accion, opciones=None):
+    """
+    Ejecuta `accion` salvo que la cache indique que la etapa está al día.
+    Si `accion` devuelve las rutas que escribió (layout routers: routers/,
+    esquemas/, comun.py…), quedan registradas como salidas junto a `salidas`.
+    """
+    with traza.etapa(nombre) as registro:
+        if cache is not None and cache.vigente(nombre, entradas, salidas, opciones):
+            informe["hits"].append(nombre)
+            registro["cache"] = "hit"
+            print(f"   ⏭️  {nombre}: sin cambios (cache)")
+            return
+        escritas = accion() or []
+        informe["misses"].append(nombre)
+        if cache is not None:
+            registro["cache"] = "miss"
+            cache.registrar(nombre, entradas, list(dict.fromkeys(salidas + escritas)), opciones)
+    informe["tiempos"][nombre] = registro["wall_ms"]
+
+
+def _perezoso(fn):
+    """Envuelve `fn` para que se ejecute como mucho una vez."""
+    memo = []
+    def wrapper():
+        if not memo:
+            memo.append(fn())
+        return memo[0]
+    return wrapper
+
+
+def run(incremental: bool = False, en_memoria: bool = False,
+        emitir_intermedios: bool = False, ruta_req: str = None,
+        dir_modelos: str = None, dir_salida: str = None,
+        plataforma: str = "fastapi", almacenamiento: str = "memory",
+        serializacion: str = "pydantic", metricas: str = "none",
+        disposicion: str = "single", traza: str = None,
+        perfil: str = None, dir_perfiles: str = None, admision: str = "none"):
+    """
+    incremental        → omite las etapas cuyas entradas no cambiaron
+    en_memoria         → PIM y PSM pasan de paso a paso como objetos,
+                         sin escribir ni reparsear los .api
+    emitir_intermedios → en modo en_memoria, escribe igualmente los .api
+    ruta_req           → requisitos de entrada (def: modelos/requirements.req)
+    dir_modelos        → dónde van pim.api, psm_fastapi.api y la cache
+    dir_salida         → dónde van schemas.py, main.py y carga.py (def: salida/)
+    plataforma         → destino del PSM: fastapi | fastapi-async
+    almacenamiento     → persistencia del código generado: memory | sqlite | shared
+    serializacion      → schemas y respuestas: pydantic | fast
+    metricas           → observabilidad de la app generada: none | prometheus
+    disposicion        → single (main.py + schemas.py) | routers (un módulo por recurso)
+    admision           → límites de concurrencia y cola por ruta: none | writes
+    traza              → ruta del JSON con tiempos, memoria y conteos por etapa
+    perfil             → cprofile | tracemalloc: un volcado por etapa
+    dir_perfiles       → dónde van los volcados (def: <dir_modelos>/perfiles)
+
+    Devuelve {"hits": [...], "misses": [...], "tiempos": {...}} con las
+    etapas omitidas por la cache, las que se ejecutaron y el tiempo de
+    pared (ms) de cada una.
+    """
+    gramaticas = os.path.join(base, "modelos")
+    modelos    = dir_modelos or gramaticas
+    salida     = dir_salida  or os.path.join(base, "salida")
+    os.makedirs(modelos, exist_ok=True)
+    os.makedirs(salida,  exist_ok=True)
+
+    ruta_req     = ruta_req or os.path.join(gramaticas, "requirements.req")
+    ruta_pim     = os.path.join(modelos, "pim.api")
+    ruta_psm     = os.path.join(modelos, "psm_fastapi.api")
+    ruta_schemas = os.path.join(salida, "schemas.py")
+    ruta_main    = os.path.join(salida, "main.py")
+    ruta_carga   = os.path.join(salida, "carga.py")
 
+    gram_req = os.path.join(gramaticas, "req_grammar.tx")
+    gram_pim = os.path.join(gramaticas, "pim_grammar.tx")
+    gram_psm = os.path.join(gramaticas, "psm_grammar.tx")
 
-def run():
-    modelos = os.path.join(base, "modelos")
-    salida  = os.path.join(base, "salida")
-    os.makedirs(salida, exist_ok=True)
+    informe = {"hits": [], "misses": [], "tiempos": {}}
+    cache   = None
+    medidor = Traza(perfil, dir_perfiles or os.path.join(modelos, "perfiles"))
+    if incremental:
+        cache = CacheEtapas(os.path.join(modelos, ".mdse_cache.json"))
 
     print("=" * 60)
     print("  PIPELINE MDSE — API REST TiendaOnline")
     print("=" * 60)
 
     # ── PASO 1: Requisitos → PIM ──────────────────────────────
-    print("\n📋 PASO 1 — Leyendo Requisitos")
-    mm_req = metamodel_from_file(os.path.join(modelos, "req_grammar.tx"))
-    req    = mm_req.model_from_file(os.path.join(modelos, "requirements.req"))
-    print(f"   API '{req.name}': {len(req.resources)} recursos")
-    for r in req.resources:
-        ops = [op.name for op in r.operations]
-        print(f"   • {r.name}: {ops}")
+    @_perezoso
+    def leer_req():
+        print("\n📋 PASO 1 — Leyendo Requisitos")
+        with medidor.etapa("gramatica.req"):
+            mm_req = cargar_metamodelo(gram_req)
+        with medidor.etapa("parse.req"):
+            req = mm_req.model_from_file(ruta_req)
+        medidor.contar(recursos=len(req.resources))
+        print(f"   API '{req.name}': {len(req.resources)} recursos")
+        for r in req.resources:
+            ops = [op.name for op in r.operations]
+            print(f"   • {r.name}: {ops}")
+        return req
 
-    print("\n🔁 M2M: Requisitos → PIM")
-    paso1.generar_pim(req, os.path.join(modelos, "pim.api"))
+    @_perezoso
+    def construir_pim():
+        req = leer_req()
+        print("\n🔁 M2M: Requisitos → PIM (en memoria)")
+        with medidor.etapa("m2m.pim"):
+            return paso1.construir_pim(req)
+
+    def paso_1():
+        if en_memoria:
+            pim = construir_pim()
+        else:
+            req = leer_req()
+            print("\n🔁 M2M: Requisitos → PIM")
+            with medidor.etapa("m2m.pim"):
+                pim = paso1.construir_pim(req)
+        with medidor.etapa("escritura.pim"):
+            paso1.escribir_pim(pim, ruta_pim)
+
+    entradas_1 = [ruta_req, gram_req, paso1.__file__, modelos_memoria.__file__]
+    if not en_memoria or emitir_intermedios:
+        _etapa(cache, informe, medidor, "paso1.generar_pim", entradas_1, [ruta_pim], paso_1)
 
     # ── PASO 2: PIM → PSM ─────────────────────────────────────
-    print("\n📐 PASO 2 — Leyendo PIM")
-    mm_pim = metamodel_from_file(os.path.join(modelos, "pim_grammar.tx"))
-    pim    = mm_pim.model_from_file(os.path.join(modelos, "pim.api"))
-    print(f"   {len(pim.endpoints)} endpoints en el PIM")
-    print(f"   {len(pim.modelClasses)} modelClasses en el PIM")
+    @_perezoso
+    def construir_psm():
+        pim = construir_pim()
+        medidor.contar(endpoints=len(pim.endpoints), modelClasses=len(pim.modelClasses))
+        print(f"   {len(pim.endpoints)} endpoints en el PIM")
+        print(f"   {len(pim.modelClasses)} modelClasses en el PIM")
+        print("\n🔁 M2M: PIM → PSM FastAPI (en memoria)")
+        with medidor.etapa("m2m.psm"):
+            return paso2.construir_psm(pim, plataforma, almacenamiento, serializacion,
+                                       metricas, disposicion, admision)
+
+    def paso_2():
+        if en_memoria:
+            psm = construir_psm()
+        else:
+            print("\n📐 PASO 2 — Leyendo PIM")
+            with medidor.etapa("parse.pim"):
+                pim = lectura.leer_pim(gram_pim, ruta_pim)
+            medidor.contar(endpoints=len(pim.endpoints), modelClasses=len(pim.modelClasses))
+            print(f"   {len(pim.endpoints)} endpoints en el PIM")
+            print(f"   {len(pim.modelClasses)} modelClasses en el PIM")
 
-    print("\n🔁 M2M: PIM → PSM FastAPI")
-    paso2.generar_psm(pim, os.path.join(modelos, "psm_fastapi.api"))
+            print("\n🔁 M2M: PIM → PSM FastAPI")
+            with medidor.etapa("m2m.psm"):
+                psm = paso2.construir_psm(pim, plataforma, almacenamiento, serializacion,
+                                          metricas, disposicion, admision)
+        with medidor.etapa("escritura.psm"):
+            paso2.escribir_psm(psm, ruta_psm)
+
+    if en_memoria:
+        entradas_2 = entradas_1 + [paso2.__file__]
+    else:
+        entradas_2 = [ruta_pim, gram_pim, lectura.__file__, paso2.__file__,
+                      modelos_memoria.__file__]
+    opciones_2 = {
+        k: v for k, v in (("plataforma", plataforma), ("almacenamiento", almacenamiento),
+                          ("serializacion", serializacion), ("metricas", metricas),
+                          ("disposicion", disposicion), ("admision", admision))
+        if v not in ("fastapi", "memory", "pydantic", "none", "single")
+    } or None
+    if not en_memoria or emitir_intermedios:
+        _etapa(cache, informe, medidor, "paso2.generar_psm", entradas_2, [ruta_psm], paso_2, opciones_2)
 
     # ── PASO 3: PSM → Código ──────────────────────────────────
-    print("\n⚙️  PASO 3 — Generando código FastAPI")
-    mm_psm = metamodel_from_file(os.path.join(modelos, "psm_grammar.tx"))
-    psm    = mm_psm.model_from_file(os.path.join(modelos, "psm_fastapi.api"))
-    print(f"   {len(psm.schemas)} schemas, {len(psm.routes)} routes")
+    # El PSM se obtiene una sola vez, y sólo si alguna salida lo necesita
+    @_perezoso
+    def leer_psm():
+        if en_memoria:
+            psm = construir_psm()
+            print("\n⚙️  PASO 3 — Generando código FastAPI")
+        else:
+            print("\n⚙️  PASO 3 — Generando código FastAPI")
+            with medidor.etapa("parse.psm"):
+                psm = lectura.leer_psm(gram_psm, ruta_psm)
+        medidor.contar(schemas=len(psm.schemas), routes=len(psm.routes))
+        print(f"   {len(psm.schemas)} schemas, {len(psm.routes)} routes")
+        return psm
+
+    def paso_3_schemas():
+        psm = leer_psm()
+        print("\n📝 M2T: PSM → schemas.py")
+        with medidor.etapa("m2t.schemas"):
+            return paso3.generar_schemas(psm, ruta_schemas)
 
-    print("\n📝 M2T: PSM → schemas.py")
-    paso3.generar_schemas(psm, os.path.join(salida, "schemas.py"))
+    def paso_3_main():
+        psm = leer_psm()
+        print("\n📝 M2T: PSM → main.py")
+        with medidor.etapa("m2t.main"):
+            return paso3.generar_main(psm, ruta_main)
 
-    print("\n📝 M2T: PSM → main.py")
-    paso3.generar_main(psm, os.path.join(salida, "main.py"))
+    def paso_3_carga():
+        psm = leer_psm()
+        print("\n📝 M2T: PSM → carga.py")
+        with medidor.etapa("m2t.carga"):
+            return paso3_carga.generar_carga(psm, ruta_carga)
+
+    # carga.py sólo depende del PSM y de su propio generador
+    entradas_psm   = entradas_2 if en_memoria else [ruta_psm, gram_psm, lectura.__file__]
+    entradas_3     = entradas_psm + paso3.FUENTES
+    entradas_carga = entradas_psm + paso3_carga.FUENTES
+    # En modo texto la plataforma ya está dentro de psm_fastapi.api
+    opciones_3 = opciones_2 if en_memoria else None
+    _etapa(cache, informe, medidor, "paso3.generar_schemas", entradas_3, [ruta_schemas], paso_3_schemas, opciones_3)
+    _etapa(cache, informe, medidor, "paso3.generar_main",    entradas_3, [ruta_main],    paso_3_main,    opciones_3)
+    _etapa(cache, informe, medidor, "paso3.generar_carga",   entradas_carga, [ruta_carga], paso_3_carga, opciones_3)
+    medidor.cerrar()
+
+    if cache is not None:
+        cache.guardar()
+        print("\n🗃️  Cache incremental")
+        print(f"   hits   : {informe['hits'] or '-'}")
+        print(f"   misses : {informe['misses'] or '-'}")
+
+    if traza or perfil:
+        print("\n⏱️  Tiempos por etapa")
+        for linea in medidor.resumen():
+            print(linea)
+        if traza:
+            medidor.guardar(traza)
+            print(f"   Traza → {os.path.relpath(traza)}")
+        if perfil:
+            print(f"   Perfiles ({perfil}) → {os.path.relpath(medidor.dir_perfiles)}/")
 
     # ── Resumen ───────────────────────────────────────────────
     print("\n" + "=" * 60)
     print("  ✅ PIPELINE COMPLETADO")
     print("=" * 60)
-    print(f"\n  Modelos intermedios  →  modelos/")
+    print(f"\n  Modelos intermedios  →  {os.path.relpath(modelos, base)}/")
     print(f"    • requirements.req    (entrada — escrito por el analista)")
     print(f"    • pim.api             (M2M — endpoints HTTP abstractos)")
     print(f"    • psm_fastapi.api     (M2M — tipos Python/Pydantic concretos)")
-    print(f"\n  Código generado      →  salida/")
+    print(f"\n  Código generado      →  {os.path.relpath(salida, base)}/")
     print(f"    • schemas.py          (modelos Pydantic)")
     print(f"    • main.py             (app FastAPI ejecutable)")
+    print(f"    • carga.py            (prueba de carga de cada route)")
     print(f"\n  Para ejecutar la API:")
     print(f"    pip install fastapi uvicorn")
-    print(f"    cd salida && uvicorn main:app --reload")
+    print(f"    cd {os.path.relpath(salida, base)} && uvicorn main:app --reload")
     print(f"    → http://localhost:8000/docs")
     print()
 
+    return informe
+
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Pipeline MDSE: requirements.req → FastAPI")
+    parser.add_argument("--incremental", action="store_true",
+                        help="omitir las etapas cuyas entradas no cambiaron")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="transformar PIM y PSM objeto → objeto, sin reparsear los .api")
+    parser.add_argument("--emit-intermediates", action="store_true",
+                        help="con --in-memory, escribir igualmente pim.api y psm_fastapi.api")
+    parser.add_argument("--platform", default="fastapi", choices=paso2.PLATAFORMAS,
+                        help="destino del PSM (def: fastapi; fastapi-async genera handlers async)")
+    parser.add_argument("--storage", default="memory", choices=paso2.ALMACENAMIENTOS,
+                        help="persistencia de la app generada (def: memory; shared = común a los workers)")
+    parser.add_argument("--serialization", default="pydantic", choices=paso2.SERIALIZACIONES,
+                        help="schemas y respuestas (def: pydantic; fast = slots + JSON directo)")
+    parser.add_argument("--metrics", default="none", choices=paso2.METRICAS,
+                        help="instrumentar la app generada (def: none; prometheus = GET /metrics)")
+    parser.add_argument("--layout", default="single", choices=paso2.DISPOSICIONES,
+                        help="single = main.py + schemas.py; routers = un módulo por recurso")
+    parser.add_argument("--admission", default="none", choices=paso2.ADMISIONES,
+                        help="límites por ruta (def: none; writes = concurrencia y cola en POST/PUT/DELETE)")
+    parser.add_argument("--trace", metavar="RUTA",
+                        help="escribir un JSON con tiempo, CPU, memoria y conteos por etapa")
+    parser.add_argument("--profile", choices=PERFILES,
+                        help="volcar un perfil por etapa (cprofile → .prof, tracemalloc → .txt)")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="dónde escribir los perfiles (def: modelos/perfiles)")
+    parser.add_argument("--watch", action="store_true",
+                        help="vigilar requirements.req y regenerar sólo los recursos que cambien")
+    args = parser.parse_args()
+    if args.watch:
+        from vigilancia import vigilar    # carga textX: sólo con --watch
+        vigilar(os.path.join(base, "modelos", "requirements.req"),
+                os.path.join(base, "modelos"), os.path.join(base, "salida"),
+                plataforma=args.platform, almacenamiento=args.storage,
+                serializacion=args.serialization, metricas=args.metrics,
+                disposicion=args.layout, admision=args.admission)
+    else:
+        run(incremental=args.incremental, en_memoria=args.in_memory,
+            emitir_intermedios=args.emit_intermediates, plataforma=args.platform,
+            almacenamiento=args.storage, serializacion=args.serialization,
+            metricas=args.metrics, disposicion=args.layout, traza=args.trace,
+            perfil=args.profile, dir_perfiles=args.profile_dir, admision=args.admission)
@@ -0,0 +1,318 @@
+# ==========================================================
+# PRUEBA DE CARGA — GENERADA AUTOMÁTICAMENTE
+# Fuente: psm_fastapi.api  |  NO EDITAR
+# ==========================================================
+"""
+Prueba de carga de TiendaOnline: una medición por cada route del PSM.
+
+Levanta main.py con uvicorn en un puerto libre (almacén vacío), crea
+--poblacion elementos de cada recurso y lanza, route a route,
+--peticiones peticiones repartidas entre --conexiones conexiones
+keep-alive. Informa, por route, peticiones por segundo, latencias
+p50/p95/p99 y los códigos de estado recibidos.
+
+Los cuerpos usan los mismos valores de ejemplo que los schemas; los
+campos únicos y las claves naturales se numeran por elemento. Los
+DELETE van al final y borran elementos creados por la propia prueba.
+
+Uso:
+    pip install fastapi uvicorn
+    python carga.py [--peticiones N] [--conexiones C] [--json base.json]
+    python carga.py --url http://127.0.0.1:8000   # app ya levantada, vacía
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+DIRECTORIO  = os.path.dirname(os.path.abspath(__file__))
+VARIABLE_DB = "TIENDAONLINE_DB"   # base SQLite de la app levantada
+PRIMERA_PK  = 0   # count() desde 0
+HOST        = "127.0.0.1"
+
+# Cuerpo de ejemplo de cada recurso (los valores de los schemas)
+EJEMPLOS = {
+    "Producto": {"nombre": "Laptop Pro", "precio": 999.99, "stock": 42, "disponible": True},
+    "Cliente": {"nombre": "Laptop Pro", "email": "usuario@ejemplo.com", "edad": 30},
+    "Pedido": {"numero": 1001, "total": 150.00, "estado": "pendiente", "fecha": "2024-01-15"},
+    "Factura": {"id": 0.0, "cliente": "cliente ejemplo", "producto": "producto ejemplo", "cantidad": 0.0, "Pedido": 0.0, "fecha": "2024-01-15", "total": 150.00},
+}
+
+# Campos que no pueden repetirse entre elementos: se numeran
+UNICOS = {
+    "Cliente": ("email",),
+    "Pedido": ("numero",),
+}
+
+# Recursos cuyo {id} en la ruta es una clave natural del cuerpo
+CLAVES = {
+    "Pedido": "numero",
+}
+
+# (método, ruta, recurso, operación) de cada route, en el orden del PSM
+ROUTES = [
+    ("GET", "/productos", "Producto", "consultar"),
+    ("GET", "/productos/{producto_id}", "Producto", "obtener"),
+    ("POST", "/productos", "Producto", "crear"),
+    ("PUT", "/productos/{producto_id}", "Producto", "actualizar"),
+    ("DELETE", "/productos/{producto_id}", "Producto", "eliminar"),
+    ("POST", "/productos/bulk", "Producto", "crearLote"),
+    ("GET", "/productos/bulk", "Producto", "obtenerVarios"),
+    ("GET", "/productos/export", "Producto", "exportar"),
+    ("GET", "/clientes", "Cliente", "consultar"),
+    ("GET", "/clientes/{cliente_id}", "Cliente", "obtener"),
+    ("POST", "/clientes", "Cliente", "crear"),
+    ("DELETE", "/clientes/{cliente_id}", "Cliente", "eliminar"),
+    ("GET", "/pedidos", "Pedido", "consultar"),
+    ("GET", "/pedidos/{pedido_id}", "Pedido", "obtener"),
+    ("POST", "/pedidos", "Pedido", "crear"),
+    ("GET", "/facturas", "Factura", "consultar"),
+    ("GET", "/facturas/{factura_id}", "Factura", "obtener"),
+    ("POST", "/facturas", "Factura", "crear"),
+]
+
+
+class Datos:
+    """Numera los cuerpos de cada recurso y recuerda los IDs que existen."""
+
+    def __init__(self, semilla: int, lote: int):
+        self.azar    = random.Random(semilla)
+        self.lote    = lote
+        self.numeros = dict.fromkeys(EJEMPLOS, 0)   # siguiente cuerpo
+        self.altas   = dict.fromkeys(EJEMPLOS, 0)   # altas aceptadas
+        self.vivos   = {r: [] for r in EJEMPLOS}
+
+    def cuerpo(self, recurso: str) -> dict:
+        n = self.numeros[recurso]
+        self.numeros[recurso] += 1
+        item = dict(EJEMPLOS[recurso])
+        for campo in UNICOS.get(recurso, ()):
+            valor = item[campo]
+            item[campo] = f"{n}-{valor}" if isinstance(valor, str) else valor + n
+        return item
+
+    def confirmar(self, recurso: str, item: dict, pk=None):
+        """
+        Alta aceptada. Sin `pk` en la respuesta, el almacén vacío las
+        asigna seguidas desde PRIMERA_PK; con clave natural, el ID es
+        el propio campo del cuerpo.
+        """
+        clave = CLAVES.get(recurso)
+        if pk is None:
+            pk = item[clave] if clave else PRIMERA_PK + self.altas[recurso]
+        self.altas[recurso] += 1
+        self.vivos[recurso].append(pk)
+
+    def uno(self, recurso: str):
+        vivos = self.vivos[recurso]
+        return self.azar.choice(vivos) if vivos else PRIMERA_PK - 1   # → 404
+
+    def retirar(self, recurso: str):
+        vivos = self.vivos[recurso]
+        return vivos.pop() if vivos else PRIMERA_PK - 1
+
+    def peticion(self, route) -> tuple:
+        """(método, ruta, cuerpo JSON, elementos que crea) de una petición a `route`."""
+        metodo, ruta, recurso, operacion = route
+        cuerpo, items, ident = None, [], None
+        if "{" in ruta:
+            ident = self.retirar(recurso) if operacion == "eliminar" else self.uno(recurso)
+            ruta  = ruta[:ruta.index("{")] + str(ident)
+        if operacion == "obtenerVarios":
+            ids  = (self.uno(recurso) for _ in range(self.lote))
+            ruta = ruta + "?" + "&".join(f"ids={i}" for i in ids)
+        elif operacion == "crear":
+            items  = [self.cuerpo(recurso)]
+            cuerpo = items[0]
+        elif operacion == "crearLote":
+            items  = [self.cuerpo(recurso) for _ in range(self.lote)]
+            cuerpo = items
+        elif operacion == "actualizar":
+            cuerpo = self.cuerpo(recurso)
+            if recurso in CLAVES:          # la clave natural no cambia
+                cuerpo[CLAVES[recurso]] = ident
+        datos = b"" if cuerpo is None else json.dumps(cuerpo).encode()
+        return metodo, ruta, datos, items
+
+    def respuesta(self, route, estado: int, cuerpo: bytes, items: list):
+        """Registra las altas que el servidor aceptó."""
+        recurso, operacion = route[2], route[3]
+        if operacion == "crear" and estado == 201:
+            self.confirmar(recurso, items[0])
+        elif operacion == "crearLote" and estado == 207:
+            for item, resultado in zip(items, json.loads(cuerpo)):
+                if resultado["status"] == 201:
+                    self.confirmar(recurso, item, resultado["id"])
+
+
+async def pedir(reader, writer, metodo: str, ruta: str, cuerpo: bytes = b"") -> tuple:
+    """Una petición HTTP/1.1 keep-alive; lee la respuesta entera, troceada o no."""
+    cabeceras = (f"{metodo} {ruta} HTTP/1.1\r\nHost: carga\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n")
+    writer.write(cabeceras.encode() + cuerpo)
+    await writer.drain()
+    linea = await reader.readline()
+    if not linea:
+        raise ConnectionError("el servidor cerró la conexión")
+    estado = int(linea.split()[1])
+    largo, troceado = 0, False
+    while (linea := await reader.readline()) not in (b"\r\n", b""):
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        nombre = nombre.strip().lower()
+        if nombre == "content-length":
+            largo = int(valor)
+        elif nombre == "transfer-encoding":
+            troceado = "chunked" in valor.lower()
+    if not troceado:
+        return estado, await reader.readexactly(largo)
+    trozos = []
+    while (tamano := int((await reader.readline()).split(b";")[0], 16)):
+        trozos.append((await reader.readexactly(tamano + 2))[:-2])
+    await reader.readline()                  # fin de los trozos
+    return estado, b"".join(trozos)
+
+
+async def medir(host: str, puerto: int, route, datos: Datos,
+                peticiones: int, conexiones: int) -> dict:
+    """`peticiones` a `route` repartidas entre `conexiones` conexiones."""
+    latencias, estados = [], {}
+    pendientes = peticiones
+
+    async def conexion():
+        nonlocal pendientes
+        reader, writer = await asyncio.open_connection(host, puerto)
+        while pendientes > 0:
+            pendientes -= 1
+            metodo, ruta, cuerpo, items = datos.peticion(route)
+            t0 = time.perf_counter()
+            try:
+                estado, respuesta = await pedir(reader, writer, metodo, ruta, cuerpo)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                estados["error"] = estados.get("error", 0) + 1
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, puerto)
+                continue
+            latencias.append(time.perf_counter() - t0)
+            estados[estado] = estados.get(estado, 0) + 1
+            datos.respuesta(route, estado, respuesta, items)
+        writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(conexion() for _ in range(max(1, min(conexiones, peticiones)))))
+    segundos = time.perf_counter() - t0
+
+    latencias.sort()
+    def pct(p):
+        if not latencias:
+            return None
+        return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000, 2)
+    return {
+        "metodo": route[0], "ruta": route[1], "peticiones": len(latencias),
+        "rps": round(len(latencias) / segundos, 1),
+        "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+        "estados": {str(k): v for k, v in sorted(estados.items(), key=str)},
+    }
+
+
+async def poblar(host: str, puerto: int, datos: Datos, poblacion: int):
+    """`poblacion` altas por recurso, por lotes si la API los admite."""
+    altas = {}
+    for route in ROUTES:
+        if route[3] == "crearLote" or (route[3] == "crear" and route[2] not in altas):
+            altas[route[2]] = route
+    reader, writer = await asyncio.open_connection(host, puerto)
+    for recurso, route in altas.items():
+        while datos.altas[recurso] < poblacion and datos.numeros[recurso] < 2 * poblacion:
+            metodo, ruta, cuerpo, items = datos.peticion(route)
+            estado, respuesta = await pedir(reader, writer, metodo, ruta, cuerpo)
+            datos.respuesta(route, estado, respuesta, items)
+    writer.close()
+
+
+async def probar(host: str, puerto: int, args) -> list:
+    datos = Datos(args.semilla, args.lote)
+    await poblar(host, puerto, datos, args.poblacion)
+    resultados = []
+    # Los DELETE al final, para no dejar sin datos a las demás routes
+    for route in sorted(ROUTES, key=lambda r: r[3] == "eliminar"):
+        if args.calentamiento and route[3] != "eliminar":
+            await medir(host, puerto, route, datos, args.calentamiento, args.conexiones)
+        resultados.append(await medir(host, puerto, route, datos,
+                                      args.peticiones, args.conexiones))
+        informar(resultados[-1])
+    return resultados
+
+
+def informar(r: dict = None):
+    """Una fila de la tabla (sin `r`, la cabecera)."""
+    if r is None:
+        print(f"{'método':<7}{'ruta':<36}{'pet.':>7}{'rps':>10}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  estados")
+        return
+    ms = lambda v: f"{v:>9.2f}" if v is not None else f"{'-':>9}"
+    estados = " ".join(f"{k}×{v}" for k, v in r["estados"].items())
+    print(f"{r['metodo']:<7}{r['ruta']:<36}{r['peticiones']:>7}{r['rps']:>10.1f}"
+          f"{ms(r['p50_ms'])}{ms(r['p95_ms'])}{ms(r['p99_ms'])}  {estados}")
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def levantar(puerto: int, directorio: str) -> subprocess.Popen:
+    """uvicorn main:app en `puerto`, con la base SQLite (si la hay) en `directorio`."""
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(puerto),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=DIRECTORIO, env={**os.environ, VARIABLE_DB: os.path.join(directorio, "carga.db")},
+    )
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite and servidor.poll() is None:
+        try:
+            socket.create_connection((HOST, puerto), timeout=0.2).close()
+            return servidor
+        except OSError:
+            time.sleep(0.05)
+    servidor.terminate()
+    raise RuntimeError(f"uvicorn no respondió en el puerto {puerto}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de TiendaOnline")
+    parser.add_argument("--peticiones",    type=int, default=1000, help="medidas por route")
+    parser.add_argument("--conexiones",    type=int, default=16, help="simultáneas, keep-alive")
+    parser.add_argument("--poblacion",     type=int, default=100, help="altas por recurso antes de medir")
+    parser.add_argument("--calentamiento", type=int, default=20, help="peticiones sin medir por route")
+    parser.add_argument("--lote",          type=int, default=10, help="elementos por petición de lote")
+    parser.add_argument("--semilla",       type=int, default=0)
+    parser.add_argument("--url", help="app ya levantada (y vacía) en vez de lanzar uvicorn")
+    parser.add_argument("--json", metavar="RUTA", help="guardar los resultados como línea base")
+    args = parser.parse_args()
+
+    informar()
+    if args.url:
+        url = urlsplit(args.url)
+        resultados = asyncio.run(probar(url.hostname, url.port or 80, args))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            puerto   = puerto_libre()
+            servidor = levantar(puerto, tmp)
+            try:
+                resultados = asyncio.run(probar(HOST, puerto, args))
+            finally:
+                servidor.terminate()
+                servidor.wait()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"api": "TiendaOnline", "peticiones": args.peticiones,
+                       "conexiones": args.conexiones, "routes": resultados}, f, indent=2)
@@ -7,130 +7,420 @@
 #   uvicorn main:app --reload
 # ==========================================================
 
-from fastapi import FastAPI, HTTPException
-from typing import List
-from schemas import Cliente, Factura, Pedido, Producto
+import secrets
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from operator import attrgetter
+from bisect import bisect_right
+from fastapi import FastAPI, HTTPException, Query
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from itertools import count
+from typing import Any, Dict, List, Optional, Set
+from schemas import Cliente, Factura, Pedido, Producto, ProductoPagina, ProductoResultado
 
 app = FastAPI(title="TiendaOnline", version="1.0.0")
 
-# Base de datos simulada en memoria
-productos_db: List[Producto] = []
-clientes_db: List[Cliente] = []
-pedidos_db: List[Pedido] = []
-facturas_db: List[Factura] = []
-
-
-@app.get("/productos", response_model=List[Producto])
-def get_productos():
+LOTE_MAX = 1000   # elementos por petición de lote
+
+EXPORTAR_BLOQUE = 1000   # elementos por trozo de NDJSON
+GZIP_NIVEL      = 6      # 1 rápido … 9 compacto
+
+class RespuestaNDJSON(StreamingResponse):
+    media_type = "application/x-ndjson"
+
+def _acepta_gzip(request: Request) -> bool:
+    """Accept-Encoding incluye gzip (o *) con q > 0."""
+    for opcion in request.headers.get("accept-encoding", "").split(","):
+        nombre, _, q = opcion.replace(" ", "").lower().partition(";q=")
+        if nombre in ("gzip", "*"):
+            try:
+                return float(q or "1") > 0
+            except ValueError:
+                return False
+    return False
+
+def _gzip(trozos):
+    """Comprime cada trozo según llega; Z_SYNC_FLUSH lo deja listo para enviarse."""
+    compresor = zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 31)   # 31 → formato gzip
+    for trozo in trozos:
+        yield compresor.compress(trozo) + compresor.flush(zlib.Z_SYNC_FLUSH)
+    yield compresor.flush()
+
+def _exportar(request: Request, trozos) -> RespuestaNDJSON:
+    """
+    Envía `trozos` (bytes NDJSON) según se generan. Son generadores
+    síncronos: Starlette pide cada uno en el threadpool, así la lectura
+    del almacén y la compresión no bloquean el event loop.
+    """
+    cabeceras = {"Vary": "Accept-Encoding"}
+    if _acepta_gzip(request):
+        cabeceras["Content-Encoding"] = "gzip"
+        trozos = _gzip(trozos)
+    return RespuestaNDJSON(trozos, headers=cabeceras)
+
+
+# Base de datos simulada en memoria: clave primaria → objeto
+# Las claves salen de un contador monotónico y no se reutilizan
+# al eliminar, así los IDs siguen siendo estables.
+#
+# Handlers síncronos: corren en el threadpool, así que cada alta,
+# modificación o baja (clave, índices y orden) se hace con el lock
+# de su recurso; las lecturas no lo toman.
+productos_db: Dict[int, Producto] = {}
+productos_db_ids = count()
+productos_db_lock = threading.Lock()
+productos_db_orden: List[int] = []   # claves ordenadas → cursor
+productos_db_bajas = 0               # claves de _orden ya eliminadas
+clientes_db: Dict[int, Cliente] = {}
+clientes_db_ids = count()
+clientes_db_lock = threading.Lock()
+clientes_db_por_email: Dict[str, int] = {}
+pedidos_db: Dict[int, Pedido] = {}
+pedidos_db_ids = count()
+pedidos_db_lock = threading.Lock()
+pedidos_db_por_numero: Dict[float, int] = {}
+pedidos_db_por_estado: Dict[str, Set[int]] = {}
+facturas_db: Dict[int, Factura] = {}
+facturas_db_ids = count()
+facturas_db_lock = threading.Lock()
+
+
+# Índices secundarios no únicos: valor → conjunto de claves
+def _indexar(indice: dict, valor, pk: int):
+    indice.setdefault(valor, set()).add(pk)
+
+def _desindexar(indice: dict, valor, pk: int):
+    claves = indice.get(valor)
+    if claves is not None:
+        claves.discard(pk)
+        if not claves:
+            del indice[valor]
+
+
+# Cache de respuestas GET con ETag (recursos con `cache : N`)
+# Con varios procesos cada uno tiene su propia cache y versión.
+ARRANQUE = secrets.token_hex(4)   # un ETag no sobrevive a un reinicio
+
+class _CacheGet:
+    def __init__(self, maximo: int):
+        self.maximo   = maximo
+        self.version  = 0
+        self.entradas = OrderedDict()   # (ruta, query) → JSON
+        self.lock     = threading.Lock()
+
+    def invalidar(self):
+        with self.lock:
+            self.version += 1
+            self.entradas.clear()
+
+    @staticmethod
+    def _coincide(cabecera: str, etag: str) -> bool:
+        candidatos = {e.strip().removeprefix("W/") for e in cabecera.split(",")}
+        return etag in candidatos or "*" in candidatos
+
+    def responder(self, request: Request, consulta, adaptador: TypeAdapter,
+                  estado: int = 200) -> Response:
+        version = self.version
+        etag    = f'"{ARRANQUE}-{version}"'
+        clave = (request.url.path, request.url.query)
+        with self.lock:
+            cuerpo = self.entradas.get(clave)
+            if cuerpo is not None:
+                self.entradas.move_to_end(clave)
+        if cuerpo is None:
+            cuerpo = adaptador.dump_json(adaptador.validate_python(consulta()))
+            with self.lock:
+                # Si hubo una escritura mientras se calculaba, no se guarda
+                if version == self.version:
+                    self.entradas[clave] = cuerpo
+                    if len(self.entradas) > self.maximo:
+                        self.entradas.popitem(last=False)
+        # Aquí la consulta no falló: hay representación a la que comparar
+        if self._coincide(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(cuerpo, status_code=estado, media_type="application/json",
+                        headers={"ETag": etag})
+
+productos_cache = _CacheGet(256)
+
+
+# Proyección `?fields=a,b` de los GET de cada recurso. Cada combinación
+# pedida prepara una vez un attrgetter con sus campos, que los lee
+# en C por elemento. El patrón de la query (CAMPOS_<RECURSO>) ya
+# limita los nombres a campos del schema.
+@lru_cache(maxsize=256)
+def _proyeccion(fields: str):
+    campos  = tuple(dict.fromkeys(fields.split(",")))
+    valores = attrgetter(*campos)
+    if len(campos) == 1:   # con un solo campo devuelve el valor, no una tupla
+        campo = campos[0]
+        return lambda x: {campo: valores(x)}
+    return lambda x: dict(zip(campos, valores(x)))
+
+def _proyectar(fields: str, datos):
+    """Un elemento, una lista o una página {items, next_cursor} con sólo `fields`."""
+    proyeccion = _proyeccion(fields)
+    if isinstance(datos, dict):
+        return {**datos, "items": list(map(proyeccion, datos["items"]))}
+    if isinstance(datos, list):
+        return list(map(proyeccion, datos))
+    return proyeccion(datos)
+
+def _respuesta_proyectada(fields: str, datos) -> Response:
+    return Response(to_json(_proyectar(fields, datos)), media_type="application/json")
+
+JSON_PROYECCION = TypeAdapter(Any)   # _CacheGet: la proyección ya son dicts
+
+# Campos que admite `?fields=` en los GET de cada recurso
+CAMPOS_PRODUCTO = "^(nombre|precio|stock|disponible)(,(nombre|precio|stock|disponible))*$"
+CAMPOS_CLIENTE = "^(nombre|email|edad)(,(nombre|email|edad))*$"
+CAMPOS_PEDIDO = "^(numero|total|estado|fecha)(,(numero|total|estado|fecha))*$"
+CAMPOS_FACTURA = "^(id|cliente|producto|cantidad|Pedido|fecha|total)(,(id|cliente|producto|cantidad|Pedido|fecha|total))*$"
+
+
+@app.post("/productos/bulk", response_model=List[ProductoResultado], status_code=207)
+def post_productos_bulk(data: List[Producto]):
+    """Crear varios productos en un lote"""
+    if len(data) > LOTE_MAX:
+        raise HTTPException(status_code=413, detail=f"Máximo {LOTE_MAX} elementos por lote")
+    resultados = []
+    with productos_db_lock:
+        for item in data:
+            pk = next(productos_db_ids)
+            productos_db[pk] = item
+            productos_db_orden.append(pk)
+            resultados.append({"status": 201, "id": pk, "item": item})
+    productos_cache.invalidar()
+    return resultados
+
+
+_respuesta_get_productos_bulk = TypeAdapter(List[ProductoResultado])
+
+@app.get("/productos/bulk", response_model=List[ProductoResultado], status_code=207)
+def get_productos_bulk(request: Request, ids: List[int] = Query(...)):
+    """Obtener varios productos por ID"""
+    def consulta():
+        if len(ids) > LOTE_MAX:
+            raise HTTPException(status_code=413, detail=f"Máximo {LOTE_MAX} elementos por lote")
+        resultados = []
+        for i in ids:
+            item = productos_db.get(i)
+            if item is None:
+                resultados.append({"status": 404, "id": i, "detail": "Producto no encontrado"})
+            else:
+                resultados.append({"status": 200, "id": i, "item": item})
+        return resultados
+    return productos_cache.responder(request, consulta, _respuesta_get_productos_bulk, 207)
+
+
+@app.get("/productos/export", response_class=RespuestaNDJSON)
+def get_productos_export(request: Request):
+    """Exportar todos los productos (NDJSON)"""
+    def trozos():
+        claves = list(productos_db)
+        for inicio in range(0, len(claves), EXPORTAR_BLOQUE):
+            items = map(productos_db.get, claves[inicio:inicio + EXPORTAR_BLOQUE])
+            yield b"".join(to_json(item) + b"\n" for item in items if item is not None)
+    return _exportar(request, trozos())
+
+
+_respuesta_get_productos = TypeAdapter(ProductoPagina)
+
+@app.get("/productos", response_model=ProductoPagina)
+def get_productos(request: Request, limit: int = Query(50, ge=1, le=500), cursor: Optional[int] = None, fields: Optional[str] = Query(None, pattern=CAMPOS_PRODUCTO)):
     """Listar todos los productos"""
-    return productos_db
-
+    def consulta():
+        orden = productos_db_orden
+        i = bisect_right(orden, cursor) if cursor is not None else 0
+        items = []
+        while len(items) < limit and i < len(orden):
+            claves = orden[i:i + limit - len(items)]
+            i += len(claves)
+            items += [item for item in map(productos_db.get, claves) if item is not None]
+        ultimo = orden[i - 1] if items else None
+        while i < len(orden) and orden[i] not in productos_db:
+            i += 1
+        if fields is not None:
+            return _proyectar(fields, {
+                "items": items,
+                "next_cursor": ultimo if i < len(orden) else None,
+            })
+        return {
+            "items": items,
+            "next_cursor": ultimo if i < len(orden) else None,
+        }
+    return productos_cache.responder(request, consulta, _respuesta_get_productos if fields is None else JSON_PROYECCION)
+
+
+_respuesta_get_productos_producto_id = TypeAdapter(Producto)
 
 @app.get("/productos/{producto_id}", response_model=Producto)
-def get_productos_producto_id(producto_id: int):
+def get_productos_producto_id(request: Request, producto_id: int, fields: Optional[str] = Query(None, pattern=CAMPOS_PRODUCTO)):
     """Obtener un producto por ID"""
-    item = next((i, x) for i, x in enumerate(productos_db) if i == producto_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return item
+    def consulta():
+        item = productos_db.get(producto_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        if fields is not None:
+            return _proyectar(fields, item)
+        return item
+    return productos_cache.responder(request, consulta, _respuesta_get_productos_producto_id if fields is None else JSON_PROYECCION)
 
 
 @app.post("/productos", response_model=Producto, status_code=201)
 def post_productos(data: Producto):
     """Crear un nuevo producto"""
-    productos_db.append(data)
+    with productos_db_lock:
+        pk = next(productos_db_ids)
+        productos_db[pk] = data
+        productos_db_orden.append(pk)
+    productos_cache.invalidar()
     return data
 
 
 @app.put("/productos/{producto_id}", response_model=Producto)
 def put_productos_producto_id(producto_id: int, data: Producto):
     """Actualizar un producto existente"""
-    if producto_id >= len(productos_db):
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    productos_db[producto_id] = data
+    with productos_db_lock:
+        if producto_id not in productos_db:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        productos_db[producto_id] = data
+    productos_cache.invalidar()
     return data
 
 
 @app.delete("/productos/{producto_id}", response_model=dict)
 def delete_productos_producto_id(producto_id: int):
     """Eliminar un producto"""
-    if producto_id >= len(productos_db):
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    productos_db.pop(producto_id)
+    global productos_db_orden, productos_db_bajas
+    with productos_db_lock:
+        item = productos_db.pop(producto_id, None)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        productos_db_bajas += 1
+        if 2 * productos_db_bajas > len(productos_db_orden):
+            productos_db_orden = [k for k in productos_db_orden if k in productos_db]
+            productos_db_bajas = 0
+    productos_cache.invalidar()
     return {"message": "Producto eliminado correctamente"}
 
 
 @app.get("/clientes", response_model=List[Cliente])
-def get_clientes():
+def get_clientes(email: Optional[str] = None, fields: Optional[str] = Query(None, pattern=CAMPOS_CLIENTE)):
     """Listar todos los clientes"""
-    return clientes_db
+    conjuntos = []
+    if email is not None:
+        conjuntos.append({clientes_db_por_email[email]} if email in clientes_db_por_email else set())
+    if conjuntos:
+        if fields is not None:
+            return _respuesta_proyectada(fields, [clientes_db[k] for k in sorted(set.intersection(*conjuntos))])
+        return [clientes_db[k] for k in sorted(set.intersection(*conjuntos))]
+    if fields is not None:
+        return _respuesta_proyectada(fields, list(clientes_db.values()))
+    return list(clientes_db.values())
 
 
 @app.get("/clientes/{cliente_id}", response_model=Cliente)
-def get_clientes_cliente_id(cliente_id: int):
+def get_clientes_cliente_id(cliente_id: int, fields: Optional[str] = Query(None, pattern=CAMPOS_CLIENTE)):
     """Obtener un cliente por ID"""
-    item = next((i, x) for i, x in enumerate(clientes_db) if i == cliente_id)
-    if not item:
+    item = clientes_db.get(cliente_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    if fields is not None:
+        return _respuesta_proyectada(fields, item)
     return item
 
 
 @app.post("/clientes", response_model=Cliente, status_code=201)
 def post_clientes(data: Cliente):
     """Crear un nuevo cliente"""
-    clientes_db.append(data)
+    with clientes_db_lock:
+        if data.email in clientes_db_por_email:
+            raise HTTPException(status_code=409, detail="Cliente con email duplicado")
+        pk = next(clientes_db_ids)
+        clientes_db[pk] = data
+        clientes_db_por_email[data.email] = pk
     return data
 
 
 @app.delete("/clientes/{cliente_id}", response_model=dict)
 def delete_clientes_cliente_id(cliente_id: int):
     """Eliminar un cliente"""
-    if cliente_id >= len(clientes_db):
-        raise HTTPException(status_code=404, detail="Cliente no encontrado")
-    clientes_db.pop(cliente_id)
+    with clientes_db_lock:
+        item = clientes_db.pop(cliente_id, None)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        del clientes_db_por_email[item.email]
     return {"message": "Cliente eliminado correctamente"}
 
 
 @app.get("/pedidos", response_model=List[Pedido])
-def get_pedidos():
+def get_pedidos(estado: Optional[str] = None, fields: Optional[str] = Query(None, pattern=CAMPOS_PEDIDO)):
     """Listar todos los pedidos"""
-    return pedidos_db
+    conjuntos = []
+    if estado is not None:
+        conjuntos.append(pedidos_db_por_estado.get(estado, set()))
+    if conjuntos:
+        if fields is not None:
+            return _respuesta_proyectada(fields, [pedidos_db[k] for k in sorted(set.intersection(*conjuntos))])
+        return [pedidos_db[k] for k in sorted(set.intersection(*conjuntos))]
+    if fields is not None:
+        return _respuesta_proyectada(fields, list(pedidos_db.values()))
+    return list(pedidos_db.values())
 
 
 @app.get("/pedidos/{pedido_id}", response_model=Pedido)
-def get_pedidos_pedido_id(pedido_id: int):
+def get_pedidos_pedido_id(pedido_id: int, fields: Optional[str] = Query(None, pattern=CAMPOS_PEDIDO)):
     """Obtener un pedido por ID"""
-    item = next((x for x in pedidos_db if x.numero == pedido_id), None)
-    if not item:
+    pk = pedidos_db_por_numero.get(pedido_id)
+    item = pedidos_db.get(pk)
+    if item is None:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
+    if fields is not None:
+        return _respuesta_proyectada(fields, item)
     return item
 
 
 @app.post("/pedidos", response_model=Pedido, status_code=201)
 def post_pedidos(data: Pedido):
     """Crear un nuevo pedido"""
-    pedidos_db.append(data)
+    with pedidos_db_lock:
+        pk = next(pedidos_db_ids)
+        pedidos_db[pk] = data
+        pedidos_db_por_numero[data.numero] = pk
+        _indexar(pedidos_db_por_estado, data.estado, pk)
     return data
 
 
 @app.get("/facturas", response_model=List[Factura])
-def get_facturas():
+def get_facturas(fields: Optional[str] = Query(None, pattern=CAMPOS_FACTURA)):
     """Listar todos los facturas"""
-    return facturas_db
+    if fields is not None:
+        return _respuesta_proyectada(fields, list(facturas_db.values()))
+    return list(facturas_db.values())
 
 
 @app.get("/facturas/{factura_id}", response_model=Factura)
-def get_facturas_factura_id(factura_id: int):
+def get_facturas_factura_id(factura_id: int, fields: Optional[str] = Query(None, pattern=CAMPOS_FACTURA)):
     """Obtener un factura por ID"""
-    item = next((i, x) for i, x in enumerate(facturas_db) if i == factura_id)
-    if not item:
+    item = facturas_db.get(factura_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Factura no encontrado")
+    if fields is not None:
+        return _respuesta_proyectada(fields, item)
     return item
 
 
 @app.post("/facturas", response_model=Factura, status_code=201)
 def post_facturas(data: Factura):
     """Crear un nuevo factura"""
-    facturas_db.append(data)
+    with facturas_db_lock:
+        pk = next(facturas_db_ids)
+        facturas_db[pk] = data
     return data
 
@@ -5,6 +5,7 @@
 
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 
 class Producto(BaseModel):
@@ -78,3 +79,15 @@ class Factura(BaseModel):
             }
         }
 
+
+class ProductoPagina(BaseModel):
+    items         : List[Producto]
+    next_cursor   : Optional[int] = None
+
+
+class ProductoResultado(BaseModel):
+    status        : int
+    id            : Optional[int] = None
+    item          : Optional[Producto] = None
+    detail        : Optional[str] = None
+
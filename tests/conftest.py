@@ -0,0 +1,56 @@
+"""
+Utilidades comunes de las pruebas: generan la app de una especificación
+pequeña en un directorio temporal y la importan sin mezclarla con la de
+otra variante.
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pipeline
+
+MODULOS_APP = ("main", "schemas", "comun", "esquemas", "routers", "carga")
+
+
+def olvidar_app():
+    """Quita de sys.modules los módulos de la última app importada."""
+    for modulo in list(sys.modules):
+        if modulo.split(".")[0] in MODULOS_APP:
+            del sys.modules[modulo]
+
+
+def generar(espec: str, destino, **opciones):
+    """Ejecuta el pipeline en memoria sobre `espec` con salida en `destino`."""
+    ruta_req = os.path.join(destino, "espec.req")
+    with open(ruta_req, "w") as f:
+        f.write(espec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.run(ruta_req=ruta_req, en_memoria=True, dir_modelos=str(destino),
+                     dir_salida=str(destino), **opciones)
+
+
+@pytest.fixture
+def app_generada(tmp_path, monkeypatch):
+    """
+    Devuelve una función que genera la especificación con las opciones
+    dadas e importa su main.py; la base de datos (<API>_DB) queda dentro
+    de tmp_path. El directorio sigue en sys.path durante la prueba porque
+    los routers se cargan en la primera petición.
+    """
+    def cargar(espec: str, variable_db: str, **opciones):
+        generar(espec, tmp_path, **opciones)
+        olvidar_app()
+        monkeypatch.setenv(variable_db, str(tmp_path / "app.db"))
+        monkeypatch.syspath_prepend(str(tmp_path))
+        return importlib.import_module("main")
+
+    yield cargar
+    olvidar_app()
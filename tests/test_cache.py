@@ -0,0 +1,46 @@
+"""Cache de GET con ETag: If-None-Match sólo da 304 si el recurso existe."""
+
+import asyncio
+
+import httpx
+import pytest
+
+ESPEC = """
+api Cacheada {
+    resource Producto {
+        operations: listar, obtener, crear, actualizar, crearLote
+        fields {
+            nombre : Text
+            precio : Number
+        }
+        cache: 16
+    }
+}
+"""
+
+
+@pytest.mark.parametrize("almacenamiento", ("memory", "sqlite", "shared"))
+@pytest.mark.parametrize("plataforma", ("fastapi", "fastapi-async"))
+def test_if_none_match_no_oculta_un_404(app_generada, almacenamiento, plataforma):
+    main = app_generada(ESPEC, "CACHEADA_DB", almacenamiento=almacenamiento,
+                        plataforma=plataforma)
+
+    async def comprobar():
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as c:
+            alta = await c.post("/productos/bulk", json=[{"nombre": "a", "precio": 1.0}])
+            existe = alta.json()[0]["id"]
+            etag = (await c.get("/productos")).headers["etag"]
+
+            for cabecera in (etag, "*"):
+                r = await c.get("/productos/999", headers={"If-None-Match": cabecera})
+                assert r.status_code == 404, cabecera
+                r = await c.get(f"/productos/{existe}", headers={"If-None-Match": cabecera})
+                assert r.status_code == 304, cabecera
+                assert r.headers["etag"] == etag
+
+            await c.put(f"/productos/{existe}", json={"nombre": "b", "precio": 2.0})
+            r = await c.get(f"/productos/{existe}", headers={"If-None-Match": etag})
+            assert r.status_code == 200 and r.json()["nombre"] == "b"
+
+    asyncio.run(comprobar())
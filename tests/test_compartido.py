@@ -0,0 +1,117 @@
+"""
+`storage : shared` con varios workers de uvicorn: la versión reducida de
+benchmarks/bench_workers.py, más la base por defecto (sin <API>_DB),
+propia del directorio de la app y vacía en cada arranque.
+"""
+
+import contextlib
+import glob
+import hashlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from conftest import generar
+
+ESPEC = """
+api Workers {
+    resource Producto {
+        operations: listar, obtener, crear, actualizar, crearLote
+        fields {
+            nombre    : Text
+            precio    : Number
+            stock     : Number
+        }
+        cache: 256
+    }
+}
+"""
+
+WORKERS = 2
+
+pytest.importorskip("uvicorn")
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def servidor(destino, workers: int = WORKERS):
+    """uvicorn con `workers` procesos sobre main:app, sin WORKERS_DB; cede la URL."""
+    puerto  = puerto_libre()
+    entorno = {k: v for k, v in os.environ.items() if k != "WORKERS_DB"}
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=destino, env=entorno)
+    url = f"http://127.0.0.1:{puerto}"
+    try:
+        limite = time.monotonic() + 30
+        while True:
+            with contextlib.suppress(httpx.HTTPError):
+                if httpx.get(url + "/openapi.json").status_code == 200:
+                    break
+            assert time.monotonic() < limite and proceso.poll() is None, "uvicorn no arrancó"
+            time.sleep(0.2)
+        time.sleep(0.5 * workers)   # que arranquen también los demás workers
+        yield url
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=30)
+
+
+@pytest.fixture
+def apps():
+    """Dos salidas de la misma especificación en directorios distintos."""
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+        for destino in (a, b):
+            generar(ESPEC, destino, almacenamiento="shared")
+        yield a, b
+        for destino in (a, b):
+            huella = hashlib.sha1(os.path.realpath(destino).encode()).hexdigest()[:12]
+            for ruta in glob.glob(f"/dev/shm/workers-{huella}.db*") + \
+                        glob.glob(os.path.join(tempfile.gettempdir(), f"workers-{huella}.db*")):
+                os.remove(ruta)
+
+
+def producto(i: int) -> dict:
+    return {"nombre": f"P{i}", "precio": 1.5, "stock": i}
+
+
+def test_workers_ven_las_mismas_escrituras(apps):
+    with servidor(apps[0]) as url, ThreadPoolExecutor(WORKERS * 4) as hilos:
+        # Cada petición por una conexión nueva: el kernel las reparte entre workers
+        altas = list(hilos.map(lambda i: httpx.post(url + "/productos/bulk", json=[producto(i)]),
+                               range(WORKERS * 20)))
+        ids = [r.json()[0]["id"] for r in altas]
+        leidas = list(hilos.map(lambda i: httpx.get(f"{url}/productos/{i}"), ids))
+        assert [r.json()["nombre"] for r in leidas] == [f"P{n}" for n in range(len(ids))]
+
+        # Cache caliente en todos los workers; el PUT en uno la deja obsoleta en todos
+        objetivo = ids[0]
+        list(hilos.map(lambda _: httpx.get(f"{url}/productos/{objetivo}"), range(WORKERS * 8)))
+        httpx.put(f"{url}/productos/{objetivo}", json=producto(-1))
+        nombres = list(hilos.map(lambda _: httpx.get(f"{url}/productos/{objetivo}").json()["nombre"],
+                                 range(WORKERS * 8)))
+        assert set(nombres) == {"P-1"}
+
+
+def test_base_por_defecto_propia_de_la_app_y_vacia_al_arrancar(apps):
+    a, b = apps
+    with servidor(a) as url_a, servidor(b) as url_b:
+        assert httpx.post(url_a + "/productos", json=producto(1)).status_code == 201
+        assert len(httpx.get(url_a + "/productos").json()) == 1
+        assert httpx.get(url_b + "/productos").json() == []
+
+    with servidor(a) as url_a:
+        assert httpx.get(url_a + "/productos").json() == []
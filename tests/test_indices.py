@@ -0,0 +1,136 @@
+"""
+Índices secundarios (únicos y por fecha) bajo concurrencia, en proceso y
+para cada almacén, plataforma y disposición: la versión reducida de
+benchmarks/check_indices.py.
+"""
+
+import asyncio
+import itertools
+import random
+import sys
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+ESPEC = """
+api Indices {
+    resource Evento {
+        operations: listar, obtener, crear, actualizar, eliminar, crearLote
+        fields {
+            codigo : Text
+            fecha  : Date
+            sala   : Text
+        }
+        indexes { codigo unique; fecha; sala }
+    }
+}
+"""
+
+FECHAS = ("2024-01-15T00:00:00", "2024-02-01T09:30:00", "2024-03-10T18:00:00")
+SALAS  = ("norte", "sur")
+VARIANTES = list(itertools.product(("memory", "sqlite", "shared"),
+                                   ("fastapi", "fastapi-async"),
+                                   ("single", "routers")))
+
+
+def evento(azar: random.Random, codigo: str) -> dict:
+    return {"codigo": codigo, "fecha": azar.choice(FECHAS), "sala": azar.choice(SALAS)}
+
+
+def alta_eventos(app):
+    """La ruta POST /eventos; con routers, dentro del router ya montado."""
+    rutas = list(app.routes)
+    while rutas:
+        ruta = rutas.pop()
+        if hasattr(ruta, "original_router"):
+            rutas += ruta.original_router.routes
+        elif getattr(ruta, "path", None) == "/eventos" and "POST" in ruta.methods:
+            return ruta
+
+
+async def primera_peticion(app):
+    """Con routers, las rutas se montan al atender la primera petición."""
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://test") as c:
+        await c.get("/eventos")
+
+
+@pytest.fixture(autouse=True)
+def cambios_de_hilo_frecuentes():
+    """Las carreras entre handlers del threadpool aparecen en pocas peticiones."""
+    anterior = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(anterior)
+
+
+@pytest.mark.parametrize("almacenamiento,plataforma,disposicion", VARIANTES)
+def test_indices_sin_duplicados_y_filtros_coherentes(app_generada, almacenamiento, plataforma, disposicion):
+    main = app_generada(ESPEC, "INDICES_DB", almacenamiento=almacenamiento,
+                        plataforma=plataforma, disposicion=disposicion)
+
+    async def comprobar():
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as c:
+            azar = random.Random(7)
+
+            repetido = await asyncio.gather(*[
+                c.post("/eventos", json=evento(azar, "repetido")) for _ in range(20)])
+            assert sorted(r.status_code for r in repetido) == [201] + [409] * 19
+
+            lotes = await asyncio.gather(*[
+                c.post("/eventos/bulk", json=[evento(azar, "lote"), evento(azar, "lote")])
+                for _ in range(4)])
+            assert sum(f["status"] == 201 for r in lotes for f in r.json()) == 1
+
+            async def operacion(i: int):
+                codigo = f"c{azar.randrange(10)}"
+                if i % 4 == 3:
+                    await c.delete(f"/eventos/{azar.randrange(i + 1)}")
+                elif i % 4 == 2:
+                    await c.put(f"/eventos/{azar.randrange(i + 1)}", json=evento(azar, codigo))
+                else:
+                    await c.post("/eventos", json=evento(azar, codigo))
+            await asyncio.gather(*[operacion(i) for i in range(120)])
+
+            eventos = (await c.get("/eventos")).json()
+            codigos = [e["codigo"] for e in eventos]
+            assert len(codigos) == len(set(codigos))
+            for campo, valores in (("fecha", FECHAS), ("sala", SALAS)):
+                for valor in valores:
+                    r = await c.get("/eventos", params={campo: valor})
+                    assert r.status_code == 200
+                    assert sorted(e["codigo"] for e in r.json()) == \
+                        sorted(e["codigo"] for e in eventos if e[campo] == valor)
+
+    asyncio.run(comprobar())
+
+
+@pytest.mark.parametrize("almacenamiento,disposicion",
+                         itertools.product(("memory", "sqlite", "shared"), ("single", "routers")))
+def test_alta_unica_desde_varios_hilos(app_generada, almacenamiento, disposicion):
+    """Handlers síncronos llamados a la vez desde hilos, como el threadpool."""
+    main = app_generada(ESPEC, "INDICES_DB", almacenamiento=almacenamiento,
+                        disposicion=disposicion)
+    asyncio.run(primera_peticion(main.app))
+    ruta   = alta_eventos(main.app)
+    modelo = typing.get_type_hints(ruta.endpoint)["data"]
+
+    for ronda in range(5):
+        salida = threading.Barrier(8)
+
+        def alta(_):
+            dato = modelo(codigo=f"hilos{ronda}", fecha=FECHAS[0], sala=SALAS[0])
+            salida.wait()
+            try:
+                ruta.endpoint(data=dato)
+                return True
+            except HTTPException:
+                return False
+
+        with ThreadPoolExecutor(8) as hilos:
+            assert sum(hilos.map(alta, range(8))) == 1
@@ -0,0 +1,58 @@
+"""`?fields=`: listado, página y elemento con sólo los campos pedidos."""
+
+import asyncio
+
+import httpx
+import pytest
+
+ESPEC = """
+api Proyeccion {
+    resource Factura {
+        operations: listar, obtener, crear
+        fields {
+            numero : Number
+            total  : Number
+            estado : Text
+        }
+        pagination: limit 2 max 10
+    }
+
+    resource Nota {
+        operations: listar, obtener, crear
+        fields {
+            texto : Text
+            autor : Text
+        }
+        cache: 16
+    }
+}
+"""
+
+
+@pytest.mark.parametrize("almacenamiento", ("memory", "sqlite"))
+@pytest.mark.parametrize("serializacion", ("pydantic", "fast"))
+def test_proyeccion_de_campos(app_generada, almacenamiento, serializacion):
+    main = app_generada(ESPEC, "PROYECCION_DB", almacenamiento=almacenamiento,
+                        serializacion=serializacion)
+
+    async def comprobar():
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as c:
+            for i in range(3):
+                await c.post("/facturas", json={"numero": i, "total": 10.0 * i, "estado": "nueva"})
+                await c.post("/notas", json={"texto": f"t{i}", "autor": "ana"})
+
+            pagina = (await c.get("/facturas", params={"fields": "total,numero"})).json()
+            assert pagina["items"] == [{"total": 0.0, "numero": 0}, {"total": 10.0, "numero": 1}]
+            assert pagina["next_cursor"] is not None
+            siguiente = (await c.get("/facturas", params={"fields": "estado",
+                                                          "cursor": pagina["next_cursor"]})).json()
+            assert siguiente == {"items": [{"estado": "nueva"}], "next_cursor": None}
+
+            notas = (await c.get("/notas", params={"fields": "autor"})).json()
+            assert notas == [{"autor": "ana"}] * 3
+            nota = (await c.get("/notas/1", params={"fields": "texto,autor,texto"})).json()
+            assert list(nota) == ["texto", "autor"] and nota["autor"] == "ana"
+            assert (await c.get("/notas", params={"fields": "nada"})).status_code == 422
+
+    asyncio.run(comprobar())
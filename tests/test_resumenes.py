@@ -0,0 +1,80 @@
+"""
+Resúmenes mantenidos en las escrituras frente a recalcularlos desde el
+listado, para cada almacén: la versión reducida de
+benchmarks/check_resumenes.py.
+"""
+
+import asyncio
+import random
+
+import httpx
+import pytest
+
+ESPEC = """
+api Resumenes {
+    resource Venta {
+        operations: listar, obtener, crear, actualizar, eliminar, crearLote
+        fields {
+            importe   : Number
+            estado    : Text
+            canal     : Text
+        }
+        resumen porEstado by estado { ventas : count; ingresos : sum importe }
+        resumen total { ventas : count; ingresos : sum importe }
+    }
+}
+"""
+
+ESTADOS = ("nuevo", "pagado", "enviado", "cancelado")
+
+
+def venta(azar: random.Random) -> dict:
+    return {"importe": round(azar.uniform(1, 500), 2), "estado": azar.choice(ESTADOS),
+            "canal": azar.choice(("web", "tienda"))}
+
+
+def recalcular(ventas: list) -> tuple:
+    """Los dos resúmenes de ESPEC, calculados recorriendo todas las ventas."""
+    grupos = {}
+    for v in ventas:
+        fila = grupos.setdefault(v["estado"], {"group": v["estado"], "ventas": 0, "ingresos": 0.0})
+        fila["ventas"]   += 1
+        fila["ingresos"] += v["importe"]
+    total = {"ventas": len(ventas), "ingresos": sum(v["importe"] for v in ventas)}
+    return [grupos[g] for g in sorted(grupos)], [total]
+
+
+def comparable(filas: list) -> list:
+    return [{**f, "ingresos": pytest.approx(f["ingresos"])} for f in filas]
+
+
+@pytest.mark.parametrize("almacenamiento", ("memory", "sqlite", "shared"))
+def test_resumenes_coinciden_con_el_recalculo(app_generada, almacenamiento):
+    main = app_generada(ESPEC, "RESUMENES_DB", almacenamiento=almacenamiento)
+
+    async def comprobar():
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as c:
+            azar, ids = random.Random(7), []
+            for _ in range(8):
+                for _ in range(40):
+                    operacion = azar.random()
+                    if operacion < 0.35:
+                        assert (await c.post("/ventas", json=venta(azar))).status_code == 201
+                    elif operacion < 0.45 or len(ids) < 2:
+                        r = await c.post("/ventas/bulk",
+                                         json=[venta(azar) for _ in range(azar.randint(1, 10))])
+                        assert r.status_code == 207
+                        ids += [fila["id"] for fila in r.json()]
+                    elif operacion < 0.75:
+                        r = await c.put(f"/ventas/{azar.choice(ids)}", json=venta(azar))
+                        assert r.status_code == 200
+                    else:
+                        r = await c.delete(f"/ventas/{ids.pop(azar.randrange(len(ids)))}")
+                        assert r.status_code == 200
+
+                por_estado, total = recalcular((await c.get("/ventas")).json())
+                assert (await c.get("/ventas/resumen/porEstado")).json() == comparable(por_estado)
+                assert (await c.get("/ventas/resumen/total")).json() == comparable(total)
+
+    asyncio.run(comprobar())